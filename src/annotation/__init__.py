@@ -1,2 +1,4 @@
+from .span_array import SpanArray
 from .sequence_annotation import SequenceLabelAnnotation
-from .classification_annotation import ClassificationAnnotation
\ No newline at end of file
+from .classification_annotation import ClassificationAnnotation
+from .auto_accept import AutoAcceptPolicy
\ No newline at end of file
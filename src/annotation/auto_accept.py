@@ -0,0 +1,90 @@
+from random import Random
+from typing import List
+from i_entities import ISample
+from utils.config_loader import ConfigLoader
+
+class AutoAcceptPolicy:
+    """
+    Decides which model-generated annotations can be accepted without a human validation.
+
+    An annotation is auto-accepted when its per-sample confidence meets the configured threshold.
+    A random audit fraction of those confident annotations is still sent to the annotators, so the
+    quality of the auto-accepted annotations can be monitored through the acceptance rate.
+
+    Attributes:
+        threshold (float): The minimum confidence required to auto-accept an annotation. None disables the policy.
+        audit_fraction (float): The fraction of confident annotations that are still validated by a human.
+    """
+
+    ANNOTATOR = 'auto-accept'  # The annotator recorded on auto-accepted annotations.
+
+    def __init__(self, threshold: float = None, audit_fraction: float = 0.0, seed: int = None) -> None:
+        """
+        Initializes the policy.
+
+        Args:
+            threshold (float, optional): The minimum confidence to auto-accept an annotation. Defaults to None (disabled).
+            audit_fraction (float): The fraction of confident annotations sent to humans anyway. Defaults to 0.
+            seed (int, optional): The seed of the random audit selection. Defaults to None.
+        """
+        if audit_fraction < 0 or audit_fraction > 1:
+            raise ValueError('audit-fraction must be between 0 and 1')
+        self.threshold = threshold
+        self.audit_fraction = audit_fraction
+        self._random = Random(seed)
+
+    @classmethod
+    def from_config(cls, config: ConfigLoader) -> 'AutoAcceptPolicy':
+        """
+        Creates the policy from the `auto-accept` section of the configuration.
+
+        Args:
+            config (ConfigLoader): The configuration loader.
+
+        Returns:
+            AutoAcceptPolicy: The configured policy, disabled when the section is missing or not enabled.
+        """
+        params = config.get('auto-accept') or {}
+        if not params.get('enabled', False):
+            return cls()
+        return cls(params.get('threshold'), params.get('audit-fraction', 0.0), params.get('seed'))
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold is not None
+
+    def is_confident(self, sample: ISample) -> bool:
+        """
+        Checks whether the annotation of a sample meets the confidence threshold.
+
+        Args:
+            sample (ISample): A sample holding a model-generated annotation.
+
+        Returns:
+            bool: True if the annotation confidence is known and meets the threshold.
+        """
+        confidence = getattr(sample.labels, 'confidence', None)
+        return self.enabled and confidence is not None and confidence >= self.threshold
+
+    def apply(self, samples: List[ISample]) -> List[ISample]:
+        """
+        Marks the confident annotations that are not selected for audit as accepted.
+
+        The accepted annotations are flagged as valid with the `auto-accept` annotator, and their samples
+        are marked as validated. The caller is responsible for persisting them.
+
+        Args:
+            samples (List[ISample]): The samples annotated by the model.
+
+        Returns:
+            List[ISample]: The samples whose annotations were auto-accepted.
+        """
+        accepted = []
+        for sample in samples:
+            if not self.is_confident(sample) or self._random.random() < self.audit_fraction:
+                continue
+            sample.labels.is_valid = True
+            sample.labels.annotator = self.ANNOTATOR
+            sample.validated = True
+            accepted.append(sample)
+        return accepted
@@ -22,6 +22,8 @@ class ClassificationAnnotation(IAnnotation):
             Returns the name of the annotation type, which is "Classification" for this class.
     """
 
+    __slots__ = ()
+
     def __init__(self, sample_id, label: Enum, annotator_id=None, iteration_id=None, is_valid=False):
         """
         Initializes a ClassificationAnnotation object with the given parameters.
@@ -1,5 +1,10 @@
+from collections import Counter
+from collections.abc import Mapping
+from difflib import SequenceMatcher
+import numpy as np
 from i_entities import IAnnotation
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+from .span_array import SpanArray
 
 class SequenceLabelAnnotation(IAnnotation):
     """
@@ -19,6 +24,8 @@ class SequenceLabelAnnotation(IAnnotation):
         annotator_id (Any, optional): The ID of the annotator who made the annotation.
         iteration_id (Any, optional): The ID of the iteration in which the annotation was made.
         is_valid (bool): A boolean flag indicating whether the annotation is valid or not.
+        scores (List[float], optional): The model's confidence for each span, aligned with `label`.
+        confidence (float, optional): The model's confidence that the whole set of spans is correct.
 
     Methods:
         get_annotation_name() -> str:
@@ -28,8 +35,13 @@ class SequenceLabelAnnotation(IAnnotation):
             Returns the list of labels, where each label is represented as a tuple of 
             (start_index, end_index, label).
     """
+
+    __slots__ = ('scores',)
+    _nested_fields = ('label',)
+    compact_spans = False  # Whether the spans are stored as a SpanArray, see `set_compact_spans`
     
-    def __init__(self, sample_id: Any, labels: List[Tuple[int, int, str]], annotator_id: Any = None, iteration_id: Any = None, is_valid: bool = None):
+    def __init__(self, sample_id: Any, labels: List[Tuple[int, int, str]], annotator_id: Any = None, iteration_id: Any = None, is_valid: bool = None,
+                 scores: List[float] = None, confidence: float = None):
         """
         Initializes a SequenceLabelAnnotation object with the given parameters.
 
@@ -43,10 +55,85 @@ class SequenceLabelAnnotation(IAnnotation):
             annotator_id (Any, optional): The ID of the annotator. Defaults to None.
             iteration_id (Any, optional): The ID of the iteration in which the annotation was made. Defaults to None.
             is_valid (bool): A flag indicating whether the annotation is valid. Defaults to None.
+            scores (List[float], optional): Per-span confidence scores, aligned with `labels`. Defaults to None.
+            confidence (float, optional): Per-sample confidence score. Defaults to None.
         """
         super().__init__(sample_id, labels, annotator_id, iteration_id, is_valid)
-        self.label: List[Tuple[int, int, str]] = labels
+        self.label: List[Tuple[int, int, str]] = SpanArray.from_spans(labels) if self.compact_spans and labels is not None else labels
+        self.scores: Optional[List[float]] = scores
+        self.confidence: Optional[float] = confidence
+
+    @classmethod
+    def set_compact_spans(cls, enabled: bool):
+        """
+        Sets whether the spans of the new and deserialized annotations are stored as a `SpanArray`, columns of
+        int32 offsets and label ids serialized as binary, instead of a list of tuples. Spans stored in either
+        form are read in both modes.
+
+        Args:
+            enabled (bool): Whether the spans are stored as a `SpanArray`.
+        """
+        cls.compact_spans = enabled
+
+    @classmethod
+    def deserialize(cls, data: dict | Any):
+        """
+        Deserializes a sequence label annotation, including the model confidence scores when present.
+
+        Args:
+            data (dict | Any): The serialized annotation or the raw list of spans.
+
+        Returns:
+            SequenceLabelAnnotation: The deserialized annotation.
+        """
+        obj = super().deserialize(data)
+        obj.scores = data.get('scores') if isinstance(data, dict) else None
+        if isinstance(obj.label, list):
+            if cls.compact_spans:
+                obj.label = SpanArray.from_spans(obj.label)
+        elif isinstance(obj.label, Mapping):
+            obj.label = SpanArray.deserialize(obj.label)
+        return obj
     
+    def transfer(self, source_text: str, target_text: str, sample_id: Any) -> 'SequenceLabelAnnotation':
+        """
+        Aligns the spans of this annotation to a near-duplicate text.
+
+        The texts are aligned with `difflib.SequenceMatcher`, and each span is moved by the offset of the
+        matching block that contains it. A span that overlaps an edited part of the text cannot be moved
+        reliably, in which case the annotation is not transferred at all.
+
+        Args:
+            source_text (str): The text of the annotated sample.
+            target_text (str): The text of the sample receiving the annotation.
+            sample_id (Any): The ID of the sample receiving the annotation.
+
+        Returns:
+            SequenceLabelAnnotation: The aligned annotation, or None if a span cannot be aligned.
+        """
+        blocks = SequenceMatcher(None, source_text, target_text, autojunk=False).get_matching_blocks()
+        spans = []
+        for start, end, label in self.get_value() or []:
+            block = next((block for block in blocks if block.a <= start and end <= block.a + block.size), None)
+            if block is None:
+                return None
+            offset = block.b - block.a
+            spans.append((start + offset, end + offset, label))
+        return SequenceLabelAnnotation(sample_id, spans, iteration_id=self.iteration, is_valid=self.is_valid)
+
+    def label_counts(self) -> Dict[str, int]:
+        """
+        Counts the spans of each label.
+
+        Returns:
+            Dict[str, int]: The number of spans of each label.
+        """
+        value = self.get_value()
+        if isinstance(value, SpanArray):
+            counts = np.bincount(value.label_ids, minlength=len(value.vocabulary))
+            return {label: int(count) for label, count in zip(value.vocabulary, counts) if count}
+        return dict(Counter(str(label) for _, _, label in value or []))
+
     @classmethod
     def get_annotation_name(cls) -> str:
         """
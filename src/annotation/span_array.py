@@ -0,0 +1,117 @@
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+from i_entities.serializable import Serializable
+
+SPAN_DTYPE = np.dtype('<i4')  # Little-endian int32, the layout of the serialized spans
+
+
+class SpanArray(Serializable, Sequence):
+    """
+    A compact, read-only sequence of (start, end, label) spans, stored as columns.
+
+    The spans are an int32 array of three rows: the starts, the ends and the label ids, which index
+    `vocabulary`, the distinct labels of the spans, interned. Indexing and iterating yield (start, end, label)
+    tuples as the list of tuples it replaces, and a SpanArray equals the list of the same spans. `starts`,
+    `ends` and `label_ids` are views of the columns for vectorized code, e.g. the metrics.
+
+    A SpanArray is serialized as the bytes of its columns (a BSON binary in MongoDB) and its vocabulary.
+    Deserializing it wraps the bytes without copying them.
+
+    Attributes:
+        columns (np.ndarray): The (3, n) int32 array of the starts, ends and label ids.
+        vocabulary (Tuple[str, ...]): The label of each label id.
+    """
+
+    __slots__ = ('columns', 'vocabulary')
+
+    def __init__(self, columns: np.ndarray, vocabulary: Tuple[str, ...]) -> None:
+        self.columns = columns
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def from_spans(cls, spans: Iterable[Tuple[int, int, str]]) -> 'SpanArray':
+        """
+        Creates a SpanArray from (start, end, label) spans, keeping their order.
+
+        Args:
+            spans (Iterable[Tuple[int, int, str]]): The spans, as tuples or lists.
+
+        Returns:
+            SpanArray: The spans.
+        """
+        if isinstance(spans, SpanArray):
+            return spans
+        codes: Dict[str, int] = {}
+        rows = [(start, end, codes.setdefault(sys.intern(str(label)), len(codes))) for start, end, label in spans]
+        columns = np.ascontiguousarray(np.array(rows, dtype=SPAN_DTYPE).reshape(-1, 3).T)
+        return cls(columns, tuple(codes))
+
+    @property
+    def starts(self) -> np.ndarray:
+        """The start of each span."""
+        return self.columns[0]
+
+    @property
+    def ends(self) -> np.ndarray:
+        """The end of each span."""
+        return self.columns[1]
+
+    @property
+    def label_ids(self) -> np.ndarray:
+        """The index of the label of each span in `vocabulary`."""
+        return self.columns[2]
+
+    def __len__(self) -> int:
+        return self.columns.shape[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SpanArray(self.columns[:, index], self.vocabulary)
+        start, end, label = self.columns[:, index].tolist()
+        return start, end, self.vocabulary[label]
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        vocabulary = self.vocabulary
+        for start, end, label in zip(*self.columns.tolist()):
+            yield start, end, vocabulary[label]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SpanArray) or (isinstance(other, Sequence) and not isinstance(other, str)):
+            return len(self) == len(other) and all(span == tuple(other_span) for span, other_span in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'SpanArray({self.to_list()!r})'
+
+    def to_list(self) -> List[Tuple[int, int, str]]:
+        """Returns the spans as a list of (start, end, label) tuples."""
+        return list(self)
+
+    def serialize(self) -> dict:
+        """
+        Serializes the spans as the bytes of the columns, row after row, and the vocabulary.
+
+        Returns:
+            dict: The `spans` bytes and the `labels` of the label ids.
+        """
+        return {'spans': np.ascontiguousarray(self.columns, dtype=SPAN_DTYPE).tobytes(), 'labels': list(self.vocabulary)}
+
+    @classmethod
+    def deserialize(cls, data: Mapping) -> 'SpanArray':
+        """
+        Deserializes spans serialized by `serialize`. The columns are a read-only view of the bytes.
+
+        Args:
+            data (Mapping): The `spans` bytes and the `labels` of the label ids.
+
+        Returns:
+            SpanArray: The spans.
+        """
+        if data is None:
+            return None
+        columns = np.frombuffer(data['spans'], dtype=SPAN_DTYPE).reshape(3, -1)
+        return cls(columns, tuple(sys.intern(label) for label in data['labels']))
@@ -1,17 +1,29 @@
 import asyncio
 import json
 import threading
-from typing import Any, List
+from datetime import datetime
+from typing import Any, Dict, List, Set, Tuple
 from i_entities import IModel
 from i_entities import ISample
 from i_entities import IDAO
 from i_entities import Iteration
 from i_entities import IStopCondition
 from i_entities import Experiment
+from i_entities import Checkpoint
+from i_entities import JobType
+from i_entities import QueuedJob
 from selector import SelectorFactory
+from stopping_conditions import StopConditionFactory
+from annotation import AutoAcceptPolicy
+from api.training import TrainingProcess
+from api.prefetch import PreparedIteration
+from api.scheduler import JobScheduler
 from metric import MetricFactory
 from i_entities import IterationState
+from i_entities import IterationTransitionError
 from utils.config_loader import ConfigLoader
+from utils.near_duplicates import NearDuplicateIndex
+from utils.holdout import split_holdout
 
 
 class AnnotationController:
@@ -20,7 +32,12 @@ class AnnotationController:
     and stopping conditions. It interacts with the model, database (DAO), and annotation process.
     """
 
-    def __init__(self, model: IModel, dao: IDAO, config: ConfigLoader) -> None:
+    _active_iterations = set()  # The iterations being fine-tuned or annotated by this process
+    _prepared_iterations = {}  # The id of an iteration being validated -> the next iteration, prepared by this process
+    _prepare_lock = threading.Lock()
+    _scheduler: JobScheduler = None  # The scheduler running the background jobs of all the controllers of this process
+
+    def __init__(self, model: IModel, dao: IDAO, config: ConfigLoader, recover: bool = True) -> None:
         """
         Initializes the AnnotationController with the given model, data access object (DAO), and configuration.
 
@@ -28,35 +45,212 @@ class AnnotationController:
             model (IModel): The model responsible for generating annotations.
             dao (IDAO): The data access object for interacting with the database.
             config (ConfigLoader): The configuration loader for managing app settings.
+            recover (bool): Whether to reconcile the state of the experiment and resume its interrupted work. Defaults to True.
         """
         self._model = model
+        self.model_params = config.get('model-params') or {}  # Keyword arguments of the model class, to load the saved models
         self._dao: IDAO = dao
-        self._stopping_conditions: List[IStopCondition] = []
+        self._stopping_conditions: List[IStopCondition] = StopConditionFactory(config).get_conditions(dao, type(model), self.model_params)
         self.current_iteration: Iteration = None
+        self.last_iteration: Iteration = None  # The latest completed iteration
+        self._latest_model: IModel = None  # The fine-tuned model of the latest iteration, once loaded
         self.position = 0
         self.config = config
-        self.max_iteration = config.get('max-iteration', 10)  # Maximum number of iterations
+        self.max_iteration = config.get('max-iterations') or None  # Maximum number of iterations, None for no limit
         self.sample_selector = SelectorFactory(self.config).get_selector()  # Sample selector
-        #self.metrics = MetricFactory(self.config).get_metric()
+        self.selector_params = {'embedding-store': config.get('embedding-store'),
+                                **(config.get('selector-params') or {})}  # Parameters of the sample selector
+        self.metrics = MetricFactory(self.config).get_metric()  # Metrics evaluated on the held-out gold samples
+        evaluation = config.get('evaluation') or {}
+        self.holdout_fraction = evaluation.get('holdout-fraction', 0.0)  # Fraction of the gold set kept out of training
+        self.evaluation_size = evaluation.get('max-samples')  # Maximum number of held-out samples evaluated, None for all
         self.sample_size = config.get('sample-size', 100)  # Size of each sample set per iteration
-        self.loadExperiment()
+        self.auto_accept = AutoAcceptPolicy.from_config(config)  # Policy accepting confident annotations without validation
+        self.training_process = TrainingProcess.from_config(config)  # Worker process for fine-tuning, None to train in a thread
+        self.scheduler = self.shared_scheduler(config)  # Runs the background jobs
+        self.near_duplicates = NearDuplicateIndex.from_config(config, dao)  # Index of near-duplicate samples, None when disabled
+        self.job_settings = config.get('jobs') or {}
+        self.queue_jobs = self.job_settings.get('queue', False)  # Whether the steps run in worker processes, through the job queue
+        pipeline = config.get('pipeline') or {}
+        # Fraction of validated samples from which the next iteration is prepared, None to run iterations serially.
+        # The preparation runs in the process of the controller, so it is disabled when workers run the steps.
+        prefetch = pipeline.get('enabled', False) and not self.queue_jobs
+        self.prefetch_fraction = pipeline.get('completion-fraction', 0.8) if prefetch else None
+        self.loadExperiment(recover)
+
+    @classmethod
+    def shared_scheduler(cls, config: ConfigLoader) -> JobScheduler:
+        """
+        Returns the job scheduler of the process, creating it on first use.
+
+        The user interface creates a controller per interaction, so the scheduler is shared by all the
+        controllers: its event loop and worker pools live as long as the process.
+
+        Args:
+            config (ConfigLoader): The configuration loader, with the `scheduler` settings.
+
+        Returns:
+            JobScheduler: The scheduler.
+        """
+        with cls._prepare_lock:
+            if AnnotationController._scheduler is None:
+                AnnotationController._scheduler = JobScheduler.from_config(config)
+            return AnnotationController._scheduler
 
     def saveExperiment(self, status: str = None):
+        iteration = self.current_iteration or self.last_iteration  # No iteration is current once the process ends
         if not status:
-            status = self.current_iteration.status
-        self._dao.saveExperiment(Experiment(self.current_iteration._id,self.position, status))
+            status = iteration.status
+        self._dao.saveExperiment(Experiment(iteration._id if iteration else None, self.position, status))
 
-    def loadExperiment(self):
+    def loadExperiment(self, recover: bool = True):
         experiment = self._dao.getExperiment()
         if experiment:
             self.current_iteration = self._dao.getIteration(experiment.current_iteration)
             self.position = experiment.position
-        
+            if recover and experiment.status != 'PROCESS COMPLETE':
+                self.adopt_open_iteration(experiment)
+            if self.current_iteration is not None and self.current_iteration.status == IterationState.COMPLETE:
+                self.last_iteration = self.current_iteration
+            if recover and experiment.status != 'PROCESS COMPLETE':
+                self.resume_interrupted_iteration()
+
+    def adopt_open_iteration(self, experiment: Experiment):
+        """
+        Makes the latest open iteration the current one when the experiment does not point to it yet, i.e.
+        the process stopped between saving a new iteration and saving the experiment.
 
-    def run_in_background(self, func, *args):
-        loop = asyncio.new_event_loop()  # Create a new event loop for the background task
-        asyncio.set_event_loop(loop)  # Set the event loop for the thread
-        loop.run_until_complete(func(*args))  # Run the async function until completion
+        Args:
+            experiment (Experiment): The latest saved experiment.
+        """
+        position = self.current_iteration.position if self.current_iteration is not None else 0
+        iterations = [iteration for iteration in self._dao.getOpenIterations(experiment.create_time)
+                      if iteration.position > position]
+        if iterations:
+            self.current_iteration = iterations[-1]
+            self.position = self.current_iteration.position
+            print(f'Recovering iteration {self.position}, saved while the experiment was not')
+            self.saveExperiment()
+
+    def transition_iteration(self, status: IterationState):
+        """
+        Moves the current iteration to a new state, saving it with a compare-and-set update so the move
+        only happens if no other task moved the iteration meanwhile, and records the state in the experiment.
+
+        Args:
+            status (IterationState): The new state.
+
+        Raises:
+            IterationTransitionError: If the move is not allowed, or the iteration is no longer in the state
+                                      the controller last saw.
+        """
+        iteration = self.current_iteration
+        previous = iteration.status
+        if not IterationState(previous).can_transition(status):
+            raise IterationTransitionError(f'Iteration {iteration.position} cannot move from {previous} to {status}')
+        iteration.status = status
+        if status == IterationState.COMPLETE:
+            iteration.end_time = datetime.now()
+        if not self._dao.transitionIteration(iteration, previous):
+            iteration.status = previous
+            raise IterationTransitionError(f'Iteration {iteration.position} is no longer {previous}')
+        self.saveExperiment(status)
+
+    def dispatch(self, job_type: JobType, payload: dict = None, key: str = None):
+        """
+        Runs a step of the annotation process in the background.
+
+        When the `jobs.queue` configuration is enabled, the step is enqueued in the database and run by a
+        worker process (see `worker.py`), so the compute can be spread over several processes or machines.
+        Otherwise it is run by the job scheduler of this process.
+
+        Args:
+            job_type (JobType): The step to run.
+            payload (dict, optional): The arguments of the step. Defaults to None.
+            key (str, optional): Identifies the logical work of the step, so it is not run twice concurrently.
+                                 Defaults to None.
+        """
+        payload = payload or {}
+        if self.queue_jobs:
+            job = QueuedJob(job_type, payload, f'{job_type}:{key}' if key is not None else None,
+                            self.job_settings.get('max-attempts', 3))
+            self._dao.enqueueJob(job)
+        else:
+            self.scheduler.submit(self.run_job, job_type, payload, name=job_type.lower(),
+                                  key=(job_type, key) if key is not None else None)
+
+    async def run_job(self, job_type: JobType, payload: dict):
+        """
+        Runs a step of the annotation process.
+
+        A step may run again after a failure or after its worker was lost, so each step checks the state of
+        the experiment first and does nothing if its work is already done.
+
+        Args:
+            job_type (JobType): The step to run.
+            payload (dict): The arguments of the step.
+
+        Raises:
+            ValueError: If the step is unknown.
+        """
+        if job_type == JobType.SELECT:
+            position = payload.get('position', self.position)
+            if self.current_iteration is not None and self.current_iteration.position >= position:
+                print(f'Iteration {position} was already started')
+                return
+            self.position = position
+            await self.startIteration()
+        elif job_type in (JobType.FINETUNE, JobType.ANNOTATE):
+            iteration = await asyncio.to_thread(self._dao.getIteration, payload['iteration'])
+            expected = IterationState.FINETUNING if job_type == JobType.FINETUNE else IterationState.ANNOTATING
+            if iteration is None or iteration.status != expected:
+                print(f'Skipping {job_type.lower()}, the iteration is no longer {expected}')
+                return
+            self.current_iteration = iteration
+            await self.resume_iteration()
+        elif job_type == JobType.EVALUATE:
+            iteration = await asyncio.to_thread(self._dao.getIteration, payload['iteration'])
+            if iteration is None or iteration.model_id is None or iteration.metrics:
+                print('Skipping evaluate, the iteration is already evaluated')
+                return
+            await self.evaluate_iteration(iteration)
+        elif job_type == JobType.FINALIZE:
+            await self.finalize_process()
+        else:
+            raise ValueError(f'Unknown job type: {job_type}')
+
+    def resume_interrupted_iteration(self):
+        """
+        Resumes the work of the current iteration in the background if it was interrupted, i.e. no task of
+        this process is working on it, according to its state:
+
+        - initialized or started: the iteration is moved to fine-tuning, and fine-tuned;
+        - fine-tuning: the fine-tuning is resumed from the latest checkpoint;
+        - annotating: the samples without a model annotation are annotated;
+        - validating: the iteration is ended if every sample is validated;
+        - complete: the next iteration is started, or the process finalized.
+
+        The resumed work is deduplicated, so this is safe to call from every new controller.
+        """
+        iteration = self.current_iteration
+        if iteration is None or iteration._id in self._active_iterations:
+            return
+        if iteration.status in (IterationState.INITIALIZED, IterationState.STARTED):
+            try:
+                self.transition_iteration(IterationState.FINETUNING)
+            except IterationTransitionError:
+                return  # Moved by another task
+        if iteration.status == IterationState.VALIDATING:
+            if not self._dao.getPendingAnnotation(iteration._id):
+                self.check_iteration_complete()
+        elif iteration.status == IterationState.COMPLETE:
+            self.scheduler.submit(self.run_iterative_process, key=('next-iteration', iteration._id))
+        elif iteration.status in (IterationState.FINETUNING, IterationState.ANNOTATING):
+            print(f'Resuming iteration {iteration.position} interrupted while {iteration.status}')
+            job_type = JobType.FINETUNE if iteration.status == IterationState.FINETUNING else JobType.ANNOTATE
+            if not self.queue_jobs:
+                self._active_iterations.add(iteration._id)
+            self.dispatch(job_type, {'iteration': iteration._id}, str(iteration._id))
 
     def validate_annotation(self, sample: ISample, is_valid: bool = False):
         """
@@ -71,6 +265,10 @@ class AnnotationController:
         self._dao.updateAnnotation(sample)
         if is_valid:
             self._dao.saveSampleAnnotation(sample)  # Save valid annotations to samples
+            validated = [sample]
+            if self.near_duplicates is not None:
+                validated += self.near_duplicates.propagate(sample, self.current_iteration._id)  # Annotate its near-duplicates too
+            self._dao.unindexLabels([sample._id for sample in validated])  # Validated samples are no longer pending
         self.check_iteration_complete()  # Check if stopping conditions are met after each validation
 
     async def run_iterative_process(self):
@@ -81,13 +279,17 @@ class AnnotationController:
 
         If the number of iterations exceeds the maximum, the process is finalized.
         """
-        if self.position < self.max_iteration or not self.evaluate_stopping_conditions() or len(self._dao.getPendingSamples()) > 0:
+        # The iteration that was completed last identifies the step, there is none before the first iteration
+        key = str(self.last_iteration._id) if self.last_iteration is not None else None
+        below_limit = self.max_iteration is None or self.position < self.max_iteration
+        has_pending = next(iter(self._dao.iterPendingSampleIds(1)), None) is not None
+        if below_limit and has_pending and not await self.scheduler.run_cpu(self.evaluate_stopping_conditions):
             self.position += 1
             # Start a new iteration in background
             print("running iterative process")
-            threading.Thread(target=self.run_in_background, args=(self.startIteration,), name='Iteration_thread').start()
+            self.dispatch(JobType.SELECT, {'position': self.position}, key)
         else:
-            self.finalize_process()
+            self.dispatch(JobType.FINALIZE, key=key)
 
     def run_process(self):
         """
@@ -97,7 +299,7 @@ class AnnotationController:
         """
         print('Process Initialized')
         self._dao.saveExperiment(Experiment(None,0))
-        threading.Thread(target=self.run_in_background, args=(self.run_iterative_process,), name='Process thread').start()
+        self.scheduler.submit(self.run_iterative_process)
 
     async def finalize_process(self):
         """
@@ -108,23 +310,20 @@ class AnnotationController:
         """
         # Annotate all remaining samples and persist
         samples = self._dao.getPendingSamples()
-        samples = self._model.generateAnnotation(samples)
+        model = await asyncio.to_thread(self.latest_model) or self._model  # The model of the latest iteration
+        samples = await self.scheduler.run_cpu(model.generateAnnotation, samples, None)
         self._dao.saveAnnotations([sample.labels for sample in samples])
         for sample in samples:
             sample.validated = True
             self._dao.saveSampleAnnotation(sample)
         self._dao.saveAnnotations([sample.labels for sample in samples])
         
-        golden_samples = self._dao.getGoldenSamples()
-        await asyncio.to_thread(self._model.finetune, self._dao.getGoldenSamples(False))
-        generated = await asyncio.to_thread(self._model.generateAnnotation, golden_samples.copy())
-        
-        metrics = {}
-        for metric in self.metrics:
-            metrics[metric.__name__]=metric.evaluate(generated, golden_samples)
-        
-        with open('metrics.json') as f:
-            json.dump(metrics,f)
+        training, _ = await asyncio.to_thread(self.split_gold_samples)
+        model = await self.finetune(self._model.copy(), training, save_checkpoints=False)
+        metrics = await self.evaluate_model(model)
+
+        with open('metrics.json', 'w') as f:
+            json.dump(metrics, f, indent=2, default=str)
         self.saveExperiment('PROCESS COMPLETE')
 
     def check_iteration_complete(self):
@@ -134,9 +333,57 @@ class AnnotationController:
 
         This method is typically invoked after validating an annotation.
         """
-        if not self._dao.getPendingAnnotation(self.current_iteration._id):
+        pending = self._dao.getPendingAnnotation(self.current_iteration._id)
+        if not pending:
             print('Ending Iteration')
-            threading.Thread(target=self.run_in_background,args=(self.end_iteration,),name='end iteration Thread').start()  # End the current iteration if all samples have been validated.
+            # End the current iteration if all samples have been validated, once even if validations finish together
+            self.scheduler.submit(self.end_iteration, key=('end-iteration', self.current_iteration._id))
+        else:
+            self.prepare_next_iteration()
+
+    def prepare_next_iteration(self):
+        """
+        Starts preparing the next iteration in the background once the validated fraction of the current
+        iteration reaches the `pipeline.completion-fraction` configuration.
+
+        The pending annotations are only counted when the next iteration could be prepared.
+        """
+        iteration = self.current_iteration
+        if self.prefetch_fraction is None or iteration is None or iteration.status != IterationState.VALIDATING \
+                or not iteration.sample_ids or iteration._id in self._prepared_iterations:
+            return
+        total = len(iteration.sample_ids)
+        pending = self._dao.countPendingAnnotations(iteration._id)
+        if (total - pending) / total < self.prefetch_fraction:
+            return
+        with self._prepare_lock:
+            if iteration._id in self._prepared_iterations:
+                return
+            prepared = self._prepared_iterations[iteration._id] = PreparedIteration(iteration._id)
+        print(f'Preparing the next iteration, {total - pending} of {total} samples validated')
+        prepared.job = self.scheduler.submit(self.prefetch_iteration, prepared, set(iteration.sample_ids), key=('prepare-iteration', iteration._id))
+
+    async def prefetch_iteration(self, prepared: PreparedIteration, excluded: Set[Any]):
+        """
+        Selects the samples of the next iteration, excluding the samples of the current iteration, fine-tunes
+        a model on the validations available so far and annotates the samples, without persisting anything.
+
+        Args:
+            prepared (PreparedIteration): Receives the samples, the model and the annotations.
+            excluded (Set[Any]): The ids of the samples of the current iteration, which may end meanwhile.
+        """
+        try:
+            model = await asyncio.to_thread(self.latest_model)
+            prepared.samples = await asyncio.to_thread(self.select_samples, model, excluded)
+            tset, _ = await asyncio.to_thread(self.split_gold_samples)
+            prepared.model = await self.finetune(self._model.copy(), tset, save_checkpoints=False)
+            prepared.annotated = await self.scheduler.run_cpu(prepared.model.generateAnnotation, prepared.samples, None)
+            print('The next iteration is prepared')
+        except Exception as e:
+            prepared.error = e
+            print(f'Unable to prepare the next iteration: {e}')
+        finally:
+            prepared.done.set()
 
     def persistModelAnnotations(self, samples: List[ISample]):
         """
@@ -157,11 +404,177 @@ class AnnotationController:
         This method runs asynchronously, and the fine-tuning process is executed
         in a separate background task.
         """
-        samples = self.sample_selector(self._dao).select(self.sample_size)  # Select the sample for annotation
+        prepared = None
+        if self.last_iteration is not None:
+            with self._prepare_lock:
+                prepared = self._prepared_iterations.pop(self.last_iteration._id, None)
+        if prepared is not None:
+            if prepared.job is not None:
+                await self.scheduler.wait(prepared.job)
+            if prepared.ready:
+                await self.promote_iteration(prepared)
+                return
+
+        model = await asyncio.to_thread(self.latest_model)
+        samples = self.select_samples(model)
         
         # Run fine-tuning in a background task
         await self.finetune_and_process(samples)
 
+    def select_samples(self, model: IModel, exclude: set = None) -> List[ISample]:
+        """
+        Selects the samples of an iteration with the configured sample selector.
+
+        Args:
+            model (IModel): The model of the latest iteration, or None.
+            exclude (set, optional): The ids of the samples that must not be selected. Defaults to None.
+
+        Returns:
+            List[ISample]: The selected samples.
+        """
+        selector = self.sample_selector(self._dao, model, self.selector_params, exclude)
+        if self.selector_params.get('one-per-cluster'):
+            return selector.select_representatives(self.sample_size)  # Select one sample per near-duplicate cluster
+        return selector.select(self.sample_size)  # Select the sample for annotation
+
+    async def promote_iteration(self, prepared: PreparedIteration):
+        """
+        Starts the next iteration from a prepared iteration, persisting its model and its annotations.
+
+        The samples validated since the preparation, e.g. through near-duplicates, are left out.
+
+        Args:
+            prepared (PreparedIteration): The prepared iteration.
+        """
+        ids = [sample._id for sample in prepared.samples]
+        pending = {sample._id for sample in await asyncio.to_thread(self._dao.getSamples, ids) if not sample.validated}
+        annotated = [sample for sample in prepared.annotated if sample._id in pending]
+        print(f'Starting the prepared iteration with {len(annotated)} samples')
+
+        # The model is saved first, so a recovered iteration always has the model that annotates it
+        model = prepared.model
+        model.id = await asyncio.to_thread(self._dao.saveModel, model)
+        self._latest_model = model
+        self.current_iteration = Iteration(self.position, model.id, [sample._id for sample in annotated])
+        self.current_iteration.status = IterationState.ANNOTATING
+        self.current_iteration._id = await asyncio.to_thread(self._dao.saveIteration, self.current_iteration)
+        iteration_id = self.current_iteration._id
+        self._active_iterations.add(iteration_id)
+        try:
+            self.saveExperiment(self.current_iteration.status)
+            for sample in annotated:
+                sample.labels.iteration = iteration_id
+            await self.annotate_iteration(model, annotated, generated=True)
+        finally:
+            self._active_iterations.discard(iteration_id)
+
+    def latest_model(self) -> IModel:
+        """
+        Returns the fine-tuned model of the latest completed iteration, used by model-based selectors.
+
+        Returns:
+            IModel: The model, or None if no iteration has been completed yet.
+        """
+        iteration = self.last_iteration
+        if iteration is None or iteration.model_id is None:
+            return None
+        if self._latest_model is None or self._latest_model.id != iteration.model_id:
+            self._latest_model = self._dao.loadModel(type(self._model), iteration.model_id, self.model_params)
+        return self._latest_model
+
+    def split_gold_samples(self) -> Tuple[List[ISample], List[ISample]]:
+        """
+        Splits the annotated samples into the training samples and the held-out samples.
+
+        The held-out samples are a stable fraction of the gold set, chosen by sample id, so they are never
+        used for training and the metrics of all the iterations are computed on the same samples.
+
+        Returns:
+            Tuple[List[ISample], List[ISample]]: The gold and validated samples used for training, and the
+                                                 held-out gold samples, at most `max-samples` of them.
+        """
+        training, held_out = split_holdout(self._dao.getGoldenSamples(True), self.holdout_fraction)
+        training += self._dao.getGoldenSamples(False)
+        return training, held_out[:self.evaluation_size]
+
+    async def evaluate_model(self, model: IModel) -> Dict[str, Any]:
+        """
+        Evaluates a model with the configured metrics on the held-out gold samples.
+
+        Args:
+            model (IModel): The fine-tuned model.
+
+        Returns:
+            Dict[str, Any]: The result of each metric, by metric name. Empty when nothing is held out.
+        """
+        _, held_out = await asyncio.to_thread(self.split_gold_samples)
+        if not held_out or not self.metrics:
+            return {}
+        generated = await self.scheduler.run_cpu(model.generateAnnotation, held_out, None)
+        return {metric.__name__: metric.evaluate(generated, held_out) for metric in self.metrics}
+
+    async def evaluate_iteration(self, iteration: Iteration):
+        """
+        Evaluates the model of an iteration on the held-out gold samples and stores the metrics with the iteration.
+
+        Args:
+            iteration (Iteration): The iteration, with its model saved.
+        """
+        model = self._latest_model
+        if model is None or model.id != iteration.model_id:
+            model = await asyncio.to_thread(self._dao.loadModel, type(self._model), iteration.model_id, self.model_params)
+        metrics = await self.evaluate_model(model)
+        if metrics:
+            await asyncio.to_thread(self._dao.saveIterationMetrics, iteration._id, metrics)
+            print(f'Metrics of iteration {iteration.position} saved')
+
+    async def finetune(self, model: IModel, samples: List[ISample], checkpoint: Checkpoint = None,
+                       save_checkpoints: bool = True) -> IModel:
+        """
+        Fine-tunes a model on the given samples without blocking the event loop.
+
+        When the `finetune` configuration isolates training, the model is trained in a worker process,
+        so the training does not compete for the GIL with the user interface. Otherwise it is trained
+        in a separate thread. The checkpoints taken by the model are persisted with the current iteration.
+
+        Args:
+            model (IModel): The model to fine-tune.
+            samples (List[ISample]): The annotated samples used for training.
+            checkpoint (Checkpoint, optional): The checkpoint to resume the fine-tuning from. Defaults to None.
+            save_checkpoints (bool): Whether the checkpoints are persisted with the current iteration. Defaults to True.
+
+        Returns:
+            IModel: The fine-tuned model.
+        """
+        iteration_id = self.current_iteration._id if self.current_iteration and save_checkpoints else None
+
+        def save_checkpoint(batch: int, state: bytes):
+            if iteration_id is not None:
+                self._dao.saveCheckpoint(Checkpoint(iteration_id, batch), state)
+                print(f'Checkpoint saved after {batch} minibatches')
+
+        resume_from = None
+        if checkpoint is not None:
+            resume_from = (checkpoint.batch, await asyncio.to_thread(self._dao.loadCheckpointState, checkpoint))
+            print(f'Resuming fine-tuning after {checkpoint.batch} minibatches')
+
+        if self.training_process is None:
+            start_batch = 0
+            if resume_from is not None:
+                start_batch = resume_from[0]
+                model.load_checkpoint(resume_from[1])
+            await self.scheduler.run_cpu(model.finetune, samples, start_batch,
+                                         lambda batch: save_checkpoint(batch, model.save_checkpoint().getvalue()))
+            return model
+        return await asyncio.to_thread(self.training_process.run, model, samples, resume_from, save_checkpoint)
+
+    def cancel_finetuning(self):
+        """
+        Cancels the fine-tuning running in the worker process, if any.
+        """
+        if self.training_process is not None:
+            self.training_process.cancel()
+
     async def finetune_and_process(self, samples: List[ISample]):
         """
         Fine-tune the model asynchronously and process the results.
@@ -173,40 +586,115 @@ class AnnotationController:
         # Create a new iteration and save it
         self.current_iteration = Iteration(self.position, None, [sample._id for sample in samples])
         self.current_iteration.status = IterationState.FINETUNING
-        self.saveExperiment(self.current_iteration.status)
         self.current_iteration._id = await asyncio.to_thread(self._dao.saveIteration, self.current_iteration)
+        self.saveExperiment(self.current_iteration.status)
+        iteration_id = self.current_iteration._id
+        if self.queue_jobs:
+            self.dispatch(JobType.FINETUNE, {'iteration': iteration_id}, str(iteration_id))  # Fine-tuned by any worker
+            return
+        self._active_iterations.add(iteration_id)
+        try:
+            model = await self.finetune_iteration(model)
+            await self.annotate_iteration(model, samples)
+        finally:
+            self._active_iterations.discard(iteration_id)
+
+    async def finetune_iteration(self, model: IModel, checkpoint: Checkpoint = None) -> IModel:
+        """
+        Fine-tunes the model of the current iteration on the validated samples, saves it
+        and moves the iteration to the annotating state.
 
+        Args:
+            model (IModel): A copy of the base model.
+            checkpoint (Checkpoint, optional): The checkpoint to resume the fine-tuning from. Defaults to None.
+
+        Returns:
+            IModel: The fine-tuned model.
+        """
         # Start the fine-tuning process
         print('Finetuning is starting')
-        gold_set = await asyncio.to_thread(self._dao.getGoldenSamples,True)
-        tset = gold_set + await asyncio.to_thread(self._dao.getGoldenSamples, False)
-        await asyncio.to_thread(model.finetune, tset)  # Run fine-tuning in a separate thread
+        tset, _ = await asyncio.to_thread(self.split_gold_samples)
+        model = await self.finetune(model, tset, checkpoint)
         print('Finetuning is complete')
 
         # Once fine-tuning is done, continue with the rest of the function
         model_id = await asyncio.to_thread(self._dao.saveModel, model)  # Save the fine-tuned model
+        model.id = model_id
+        self._latest_model = model
 
         # update iteration and save it
         self.current_iteration.model_id = model_id
-        self.current_iteration.status = IterationState.ANNOTATING
-        await asyncio.to_thread(self._dao.updateIteration, self.current_iteration)
-        self.saveExperiment(self.current_iteration.status)
+        await asyncio.to_thread(self.transition_iteration, IterationState.ANNOTATING)
+        await asyncio.to_thread(self._dao.deleteCheckpoints, self.current_iteration._id)
+        return model
+
+    async def annotate_iteration(self, model: IModel, samples: List[ISample], generated: bool = False):
+        """
+        Annotates the samples of the current iteration with its fine-tuned model and moves
+        the iteration to the validating state.
 
-        # Generate annotations for the samples and persist them
-        samples = model.generateAnnotation(samples,self.current_iteration._id)
+        Args:
+            model (IModel): The fine-tuned model of the iteration.
+            samples (List[ISample]): The samples that still have to be annotated.
+            generated (bool): Whether the samples were already annotated by the model. Defaults to False.
+        """
+        # Generate annotations for the samples, auto-accept the confident ones and persist them
+        if not generated:
+            samples = await self.scheduler.run_cpu(model.generateAnnotation, samples, self.current_iteration._id)
+        accepted = self.auto_accept.apply(samples)
         await self.persistModelAnnotations(samples)
+        validated = list(accepted)
+        for sample in accepted:
+            await asyncio.to_thread(self._dao.saveSampleAnnotation, sample)
+            if self.near_duplicates is not None:
+                validated += await asyncio.to_thread(self.near_duplicates.propagate, sample, self.current_iteration._id)
+        if validated:
+            await asyncio.to_thread(self._dao.unindexLabels, [sample._id for sample in validated])
 
         # Update iteration status to "validating"
-        self.current_iteration.status = IterationState.VALIDATING
-        await asyncio.to_thread(self._dao.updateIteration, self.current_iteration)
-        await asyncio.to_thread(self.saveExperiment, self.current_iteration.status)
+        await asyncio.to_thread(self.transition_iteration, IterationState.VALIDATING)
+        if self.metrics and self.holdout_fraction:
+            # Evaluated in the background while the annotations are validated
+            self.dispatch(JobType.EVALUATE, {'iteration': self.current_iteration._id}, str(self.current_iteration._id))
+        if accepted:
+            print(f'{len(accepted)} of {len(samples)} annotations were auto-accepted')
+            self.check_iteration_complete()  # Every annotation may have been accepted already
+
+    async def resume_iteration(self):
+        """
+        Resumes the current iteration after it was interrupted while fine-tuning or annotating.
+
+        An interrupted fine-tuning is resumed from the latest checkpoint of the iteration, or restarted
+        when there is none. The samples of the iteration without a model annotation are then annotated,
+        by the same task or, when the steps run through the job queue, by the next annotation job.
+        """
+        iteration = self.current_iteration
+        self._active_iterations.add(iteration._id)
+        try:
+            if iteration.status == IterationState.FINETUNING:
+                checkpoint = await asyncio.to_thread(self._dao.getCheckpoint, iteration._id)
+                model = await self.finetune_iteration(self._model.copy(), checkpoint)
+                if self.queue_jobs:
+                    self.dispatch(JobType.ANNOTATE, {'iteration': iteration._id}, str(iteration._id))
+                    return
+            else:
+                model = await asyncio.to_thread(self._dao.loadModel, type(self._model), iteration.model_id, self.model_params)
+
+            annotated = {annotation.sample_id for annotation in await asyncio.to_thread(self._dao.getIterationAnnotations, iteration._id)}
+            samples = await asyncio.to_thread(self._dao.getSamples, [sample_id for sample_id in iteration.sample_ids if sample_id not in annotated])
+            await self.annotate_iteration(model, samples)
+        finally:
+            self._active_iterations.discard(iteration._id)
 
     async def persistModelAnnotations(self, samples: List[ISample]):
         """
         Persist the annotations generated by the fine-tuned model.
         """
         # This can involve saving annotations to the database
-        await asyncio.to_thread(self._dao.saveAnnotations, [sample.labels for sample in samples])
+        ids = await asyncio.to_thread(self._dao.saveAnnotations, [sample.labels for sample in samples])
+        for sample, annotation_id in zip(samples, ids or []):
+            sample.labels._id = annotation_id
+        await asyncio.to_thread(self._dao.indexLabels, samples)  # Keep the predicted label counts of pending samples
 
     async def end_iteration(self):
         """
@@ -215,10 +703,14 @@ class AnnotationController:
 
         This method is typically called after a stopping condition is met.
         """
-        self.current_iteration.status = IterationState.COMPLETE
-        self._dao.updateIteration(self.current_iteration)
+        try:
+            self.transition_iteration(IterationState.COMPLETE)
+        except IterationTransitionError as e:
+            print(f'The iteration was not ended: {e}')  # Ended by another task
+            return
+        self.last_iteration = self.current_iteration
         self.current_iteration = None  # Reset current iteration
-        threading.Thread(target=self.run_in_background, args=(self.run_iterative_process,), name='Process thread').start()  # Start the next iteration if needed
+        self.scheduler.submit(self.run_iterative_process, key=('next-iteration', self.last_iteration._id))  # Start the next iteration if needed
 
     def evaluate_stopping_conditions(self) -> bool:
         """
@@ -227,7 +719,9 @@ class AnnotationController:
         Returns:
             bool: True if any of the stopping conditions are met, False otherwise.
         """
+        if self.last_iteration is None:
+            return False  # No iteration has been completed yet
         for condition in self._stopping_conditions:
-            if condition.evaluate(self.current_iteration):  # Evaluate each stopping condition
+            if condition.evaluate(self.last_iteration):  # Evaluate each stopping condition
                 return True
         return False
@@ -0,0 +1,38 @@
+import threading
+from typing import Any, List
+from i_entities import IModel
+from i_entities import ISample
+
+
+class PreparedIteration:
+    """
+    The next iteration, prepared speculatively while the current iteration is being validated.
+
+    The samples of the next iteration are selected among the samples that are not part of the current
+    iteration, the model is fine-tuned on the validations available at that time, and the annotations are
+    generated, so the next iteration can be promoted as soon as the current one is complete. Nothing is
+    persisted until the promotion.
+
+    Attributes:
+        after (Any): The id of the iteration being validated when the preparation started.
+        samples (List[ISample]): The selected samples, or None until they are selected.
+        model (IModel): The fine-tuned model, or None until the fine-tuning is complete.
+        annotated (List[ISample]): The samples annotated by the model, or None until they are annotated.
+        error (Exception): The error that interrupted the preparation, if any.
+        done (threading.Event): Set once the preparation is complete or has failed.
+        job (Job): The scheduler job preparing the iteration.
+    """
+
+    def __init__(self, after: Any) -> None:
+        self.after = after
+        self.samples: List[ISample] = None
+        self.model: IModel = None
+        self.annotated: List[ISample] = None
+        self.error: Exception = None
+        self.done = threading.Event()
+        self.job = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the iteration was fully prepared without error."""
+        return self.done.is_set() and self.error is None and self.annotated is not None
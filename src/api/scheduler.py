@@ -0,0 +1,240 @@
+import asyncio
+import datetime
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List
+from i_entities import JobState
+
+
+class Job:
+    """
+    A unit of work run by the `JobScheduler`.
+
+    Attributes:
+        id (str): The unique identifier of the job.
+        name (str): A readable name of the job.
+        key (Hashable): The key of the logical work done by the job, used to deduplicate jobs, or None.
+        state (JobState): The state of the job.
+        error (str): The traceback of the error that failed the job, if any.
+        create_time (datetime.datetime): When the job was submitted.
+        start_time (datetime.datetime): When the job started running, if it did.
+        end_time (datetime.datetime): When the job finished, if it did.
+        future (Future): The future of the job result.
+    """
+
+    def __init__(self, name: str, key: Hashable = None) -> None:
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.key = key
+        self.state = JobState.PENDING
+        self.error: str = None
+        self.create_time = datetime.datetime.now()
+        self.start_time: datetime.datetime = None
+        self.end_time: datetime.datetime = None
+        self.future: Future = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JobState.DONE, JobState.FAILED, JobState.CANCELLED)
+
+
+class JobScheduler:
+    """
+    Runs the background work of the application on a single long-lived event loop.
+
+    The event loop runs in a dedicated daemon thread for the lifetime of the process, and every job is
+    a coroutine scheduled on it. Blocking work is delegated to two bounded thread pools: the IO pool,
+    which is also the default executor of the loop and thus serves `asyncio.to_thread`, and the CPU pool,
+    used with `run_cpu` for model work, so the number of threads never grows with the number of jobs.
+
+    Jobs are tracked by id with their state, can be cancelled, and are deduplicated by key: submitting a
+    job whose key matches a job that is pending, running or done returns that job instead of running the
+    same work twice. Failed and cancelled jobs can be submitted again.
+
+    Attributes:
+        cpu_workers (int): The number of threads of the CPU pool.
+        io_workers (int): The number of threads of the IO pool.
+        history (int): The number of finished jobs kept for status queries.
+    """
+
+    def __init__(self, cpu_workers: int = 1, io_workers: int = 4, history: int = 1000) -> None:
+        """
+        Starts the event loop thread and the worker pools.
+
+        Args:
+            cpu_workers (int): The number of threads of the CPU pool. Defaults to 1.
+            io_workers (int): The number of threads of the IO pool. Defaults to 4.
+            history (int): The number of finished jobs kept for status queries. Defaults to 1000.
+        """
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.history = history
+        self._cpu_pool = ThreadPoolExecutor(cpu_workers, thread_name_prefix='cpu-job')
+        self._io_pool = ThreadPoolExecutor(io_workers, thread_name_prefix='io-job')
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._io_pool)
+        self._jobs: Dict[str, Job] = {}
+        self._keys: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run_loop, name='Job scheduler', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config) -> 'JobScheduler':
+        """
+        Creates a scheduler from the `scheduler` configuration section.
+
+        Args:
+            config (ConfigLoader): The configuration loader.
+
+        Returns:
+            JobScheduler: The scheduler.
+        """
+        settings = config.get('scheduler') or {}
+        return cls(settings.get('cpu-workers', 1), settings.get('io-workers', 4), settings.get('history', 1000))
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, func: Callable, *args, name: str = None, key: Hashable = None) -> Job:
+        """
+        Schedules a coroutine function on the event loop.
+
+        Args:
+            func (Callable): The coroutine function.
+            *args: The arguments of the coroutine function.
+            name (str, optional): A readable name of the job. Defaults to the function name.
+            key (Hashable, optional): The key of the logical work done by the job. Defaults to None (never deduplicated).
+
+        Returns:
+            Job: The new job, or the existing job with the same key.
+        """
+        with self._lock:
+            if key is not None:
+                existing = self._keys.get(key)
+                if existing is not None and existing.state in (JobState.PENDING, JobState.RUNNING, JobState.DONE):
+                    return existing
+            job = Job(name or getattr(func, '__name__', 'job'), key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._keys[key] = job
+            self._prune()
+        job.future = asyncio.run_coroutine_threadsafe(self._run(job, func, *args), self._loop)
+        return job
+
+    async def _run(self, job: Job, func: Callable, *args) -> Any:
+        job.state = JobState.RUNNING
+        job.start_time = datetime.datetime.now()
+        try:
+            result = await func(*args)
+            job.state = JobState.DONE
+            return result
+        except asyncio.CancelledError:
+            job.state = JobState.CANCELLED
+            raise
+        except Exception:
+            job.state = JobState.FAILED
+            job.error = traceback.format_exc()
+            print(f'Job {job.name} failed:\n{job.error}')
+            raise
+        finally:
+            job.end_time = datetime.datetime.now()
+
+    def _prune(self):
+        """Forgets the oldest finished jobs beyond `history`."""
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job.id]
+            if self._keys.get(job.key) is job:
+                del self._keys[job.key]
+
+    async def run_cpu(self, func: Callable, *args) -> Any:
+        """
+        Runs a blocking, CPU-bound function in the CPU pool from a job.
+
+        Args:
+            func (Callable): The function.
+            *args: The arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._cpu_pool, func, *args)
+
+    async def wait(self, job: Job) -> Any:
+        """
+        Waits for a job from another job, without blocking a worker thread.
+
+        Args:
+            job (Job): The job to wait for.
+
+        Returns:
+            Any: The result of the job, or None if it failed or was cancelled.
+        """
+        try:
+            # Shielded, so cancelling the waiting job does not cancel the awaited one
+            return await asyncio.shield(asyncio.wrap_future(job.future))
+        except asyncio.CancelledError:
+            if job.future.cancelled():
+                return None
+            raise
+        except Exception:
+            return None
+
+    def get(self, job_id: str) -> Job:
+        """Returns the job with the given id, or None if it is unknown or was forgotten."""
+        return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> JobState:
+        """Returns the state of the job with the given id, or None if it is unknown."""
+        job = self.get(job_id)
+        return job.state if job else None
+
+    def jobs(self, active: bool = False) -> List[Job]:
+        """
+        Returns the known jobs, in submission order.
+
+        Args:
+            active (bool): Whether to return only the pending and running jobs. Defaults to False.
+
+        Returns:
+            List[Job]: The jobs.
+        """
+        with self._lock:
+            return [job for job in self._jobs.values() if not (active and job.finished)]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancels a pending or running job. A running job is cancelled at its next `await`; the blocking
+        work it delegated to a thread pool runs to completion, but its result is discarded.
+
+        Args:
+            job_id (str): The id of the job.
+
+        Returns:
+            bool: True if the cancellation was requested, False if the job is unknown or finished.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.state == JobState.PENDING:
+            job.state = JobState.CANCELLED
+        job.future.cancel()  # Propagated to the task on the event loop
+        return True
+
+    def shutdown(self, wait: bool = True):
+        """
+        Cancels the active jobs and stops the event loop and the worker pools.
+
+        Args:
+            wait (bool): Whether to wait for the worker threads to finish. Defaults to True.
+        """
+        for job in self.jobs(active=True):
+            self.cancel(job.id)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._cpu_pool.shutdown(wait)
+        self._io_pool.shutdown(wait)
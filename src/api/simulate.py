@@ -0,0 +1,285 @@
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+import numpy as np
+from i_entities import IAnnotation
+from i_entities import IDAO
+from i_entities import ISample
+from i_entities import IterationState
+from i_entities import JobState
+from utils.config_loader import ConfigLoader
+from utils.loader import DatasetLoader
+from utils.near_duplicates import NearDuplicateIndex
+from sample import SampleFactory
+from annotation import SequenceLabelAnnotation
+from annotation import SpanArray
+from model import ModelFactory
+from dao import MemoryDAO
+from dao import MongoDAO
+from selector import DiversitySampleSelector
+from api.controller import AnnotationController
+
+
+def annotation_items(annotation: IAnnotation) -> set:
+    """Returns the comparable items of an annotation: its spans, or its label."""
+    if annotation is None:
+        return set()
+    value = annotation.get_value()
+    if isinstance(value, (list, tuple, SpanArray)):
+        return {tuple(span) for span in value}
+    return {str(value)} if value is not None else set()
+
+
+def f1_score(predicted: List[set], gold: List[set]) -> Dict[str, float]:
+    """
+    Computes the micro-averaged precision, recall and F1 score of the predicted items against the gold items.
+
+    Args:
+        predicted (List[set]): The predicted items of each sample.
+        gold (List[set]): The gold items of each sample, in the same order.
+
+    Returns:
+        Dict[str, float]: The precision, recall and F1 score.
+    """
+    true_positives = sum(len(p & g) for p, g in zip(predicted, gold))
+    predicted_count = sum(len(p) for p in predicted)
+    gold_count = sum(len(g) for g in gold)
+    precision = true_positives / predicted_count if predicted_count else 0.0
+    recall = true_positives / gold_count if gold_count else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1}
+
+
+class OracleAnnotator:
+    """
+    A simulated annotator validating model annotations against the hidden gold annotations of the samples.
+
+    An annotation is accepted when its F1 score against the gold annotation of the sample reaches
+    `min_f1`, by default only when it is identical.
+
+    Attributes:
+        gold (Dict[Any, IAnnotation]): The gold annotation of each sample id.
+        min_f1 (float): The minimum F1 score of an accepted annotation.
+    """
+
+    ID = 'oracle'  # The annotator recorded on the simulated validations
+
+    def __init__(self, gold: Dict[Any, IAnnotation], min_f1: float = 1.0) -> None:
+        self.gold = gold
+        self.min_f1 = min_f1
+
+    def judge(self, sample: ISample) -> bool:
+        """Returns whether the model annotation of the sample is accepted."""
+        gold = annotation_items(self.gold.get(sample._id))
+        predicted = annotation_items(sample.labels)
+        if predicted == gold:
+            return True
+        return f1_score([predicted], [gold])['f1'] >= self.min_f1
+
+
+class Simulation:
+    """
+    Runs the annotation process end-to-end without humans, to compare sample sizes, selectors and models.
+
+    A labeled dataset is loaded with the `DatasetLoader`. A fraction of it is saved as the initial gold set,
+    and the labels of the other samples are hidden and given to an `OracleAnnotator`. The annotation
+    controller then runs its iterations as usual, in the background, and the oracle validates every
+    annotation sent for validation. The run is isolated in its own experiment of the database.
+
+    For each iteration, the report records the wall-clock time taken by the model (selection, fine-tuning
+    and annotation) and by the validations, the number of annotations per second, the accept rate, and
+    the precision, recall and F1 score of the model annotations against the hidden gold.
+
+    Attributes:
+        config (ConfigLoader): The configuration, with the overrides of the simulation.
+        dao (IDAO): The data access object, scoped to the experiment of the simulation.
+        seed (int): The seed of the random draws.
+        gold_fraction (float): The fraction of the dataset saved as the initial gold set.
+        timeout (float): The maximum number of seconds to wait for an iteration.
+    """
+
+    def __init__(self, config: ConfigLoader, dao: IDAO, seed: int = 0, gold_fraction: float = 0.1,
+                 min_f1: float = 1.0, timeout: float = 3600) -> None:
+        self.config = config
+        self.dao = dao
+        self.seed = seed
+        self.gold_fraction = gold_fraction
+        self.min_f1 = min_f1
+        self.timeout = timeout
+        self.oracle: OracleAnnotator = None
+        self.controller: AnnotationController = None
+
+    def load(self, dataset: str):
+        """
+        Loads a labeled dataset, saves the initial gold set and the samples with hidden labels.
+
+        Args:
+            dataset (str): The path of the labeled dataset (JSON or CSV).
+        """
+        near_duplicates = NearDuplicateIndex.from_config(self.config, self.dao)
+        samples = DatasetLoader(dataset, SampleFactory(self.config).get_sample(), True, near_duplicates).run()
+        random.Random(self.seed).shuffle(samples)
+        gold_size = max(int(len(samples) * self.gold_fraction), 1)
+        hidden = {}
+        for index, sample in enumerate(samples[gold_size:], gold_size):
+            hidden[index] = sample.labels  # Hidden from the process, known to the oracle
+            sample.labels = None
+            sample.validated = False
+            sample.gold_set = False
+        self.dao.saveSamples(samples)
+        if self.config.get('embedding-store'):
+            DiversitySampleSelector.index_samples(self.config.get('embedding-store'), samples)
+        self.oracle = OracleAnnotator({samples[index]._id: labels for index, labels in hidden.items()}, self.min_f1)
+        print(f'Simulating with {gold_size} gold samples and {len(hidden)} samples to annotate')
+
+    def wait_for_validation(self, position: int, started: datetime):
+        """
+        Waits until the iteration at the given position is sent for validation.
+
+        Returns:
+            Iteration: The iteration, or None if the process stopped before starting it.
+
+        Raises:
+            RuntimeError: If a background job failed.
+            TimeoutError: If the iteration is not ready within the timeout.
+        """
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            iteration = self.controller.current_iteration
+            # Ended already when every annotation was auto-accepted
+            for candidate in (iteration, self.controller.last_iteration):
+                if candidate is not None and candidate.position == position and \
+                        candidate.status in (IterationState.VALIDATING, IterationState.COMPLETE):
+                    return candidate
+            failed = [job for job in self.controller.scheduler.jobs()
+                      if job.state == JobState.FAILED and job.create_time >= started]
+            if failed:
+                raise RuntimeError(f'Job {failed[0].name} failed:\n{failed[0].error}')
+            jobs = self.controller.scheduler.jobs(active=True)
+            if iteration is None and not jobs and next(iter(self.dao.iterPendingSampleIds(1)), None) is None:
+                return None  # Every sample is annotated
+            time.sleep(0.05)
+        raise TimeoutError(f'Iteration {position} was not ready within {self.timeout} seconds')
+
+    def validate(self, iteration) -> Dict[str, int]:
+        """Validates every pending annotation of the iteration with the oracle."""
+        accepted = rejected = 0
+        sample = self.dao.getPendingAnnotation(iteration._id)
+        while sample is not None:
+            is_valid = self.oracle.judge(sample)
+            sample.labels.annotator = OracleAnnotator.ID
+            self.controller.validate_annotation(sample, is_valid)
+            accepted += is_valid
+            rejected += not is_valid
+            sample = self.dao.getPendingAnnotation(iteration._id)
+        return {'accepted': accepted, 'rejected': rejected}
+
+    def score(self, iteration) -> Dict[str, float]:
+        """Scores the model annotations of the iteration against the hidden gold annotations."""
+        annotations = [annotation for annotation in self.dao.getIterationAnnotations(iteration._id)
+                       if annotation.sample_id in self.oracle.gold and annotation.annotator != NearDuplicateIndex.ANNOTATOR]
+        return f1_score([annotation_items(annotation) for annotation in annotations],
+                        [annotation_items(self.oracle.gold[annotation.sample_id]) for annotation in annotations])
+
+    def run(self, iterations: int, output: str = None) -> dict:
+        """
+        Runs the annotation process for a number of iterations, or until every sample is annotated.
+
+        Args:
+            iterations (int): The number of iterations.
+            output (str, optional): The path of the JSON report, rewritten after each iteration. Defaults to None.
+
+        Returns:
+            dict: The report.
+        """
+        model = ModelFactory(self.config).get_model()
+        self.controller = AnnotationController(model(**(self.config.get('model-params') or {})), self.dao, self.config)
+        report = {'experiment': self.dao.experiment_id, 'seed': self.seed, 'sample-size': self.controller.sample_size,
+                  'selector': self.config.get('Selector'), 'model': self.config.get('modelName'), 'iterations': []}
+        started = datetime.now()
+        start = time.monotonic()
+        self.controller.run_process()
+        try:
+            for position in range(1, iterations + 1):
+                iteration_start = time.monotonic()
+                iteration = self.wait_for_validation(position, started)
+                if iteration is None:
+                    print('Every sample is annotated, the simulation stops')
+                    break
+                model_seconds = time.monotonic() - iteration_start
+                annotations = len(iteration.sample_ids)
+                validation_start = time.monotonic()
+                counts = self.validate(iteration)
+                validation_seconds = time.monotonic() - validation_start
+                validated = counts['accepted'] + counts['rejected']
+                record = {
+                    'iteration': position,
+                    'samples': annotations,
+                    'model-seconds': model_seconds,
+                    'validation-seconds': validation_seconds,
+                    'annotations-per-second': annotations / model_seconds if model_seconds else None,
+                    **counts,
+                    'accept-rate': counts['accepted'] / validated if validated else None,
+                    **self.score(iteration),
+                }
+                report['iterations'].append(record)
+                report['total-seconds'] = time.monotonic() - start
+                print(json.dumps(record))
+                if output:
+                    with open(output, 'w') as f:
+                        json.dump(report, f, indent=2)
+        finally:
+            self.controller.scheduler.shutdown(wait=False)  # Cancels the preparation of the next iteration
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the annotation process with a simulated annotator validating against the gold labels.')
+    parser.add_argument('dataset', help='The labeled dataset (JSON or CSV).')
+    parser.add_argument('--config', default='config.yaml', help='The configuration file.')
+    parser.add_argument('--iterations', type=int, default=5, help='The number of iterations.')
+    parser.add_argument('--sample-size', type=int, help='The number of samples per iteration, from the configuration by default.')
+    parser.add_argument('--selector', help='The sample selector, from the configuration by default.')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the random draws.')
+    parser.add_argument('--gold-fraction', type=float, default=0.1, help='The fraction of the dataset saved as the initial gold set.')
+    parser.add_argument('--min-f1', type=float, default=1.0, help='The minimum F1 score of an annotation accepted by the oracle.')
+    parser.add_argument('--timeout', type=float, default=3600, help='The maximum number of seconds to wait for an iteration.')
+    parser.add_argument('--experiment', help='The experiment of the simulation, a new one by default.')
+    parser.add_argument('--backend', choices=['mongo', 'memory'], default='mongo',
+                        help='The database: the MongoDB server of the configuration, or in memory.')
+    parser.add_argument('--output', default='simulation.json', help='The JSON report.')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    config = ConfigLoader(args.config)
+    if args.sample_size:
+        config.set('sample-size', args.sample_size)
+    if args.selector:
+        config.set('Selector', args.selector)
+    config.set('max-iterations', None)  # The simulation stops the process after its iterations
+    config.set('selector-params', {**(config.get('selector-params') or {}), 'seed': args.seed})
+    config.set('auto-accept', {**(config.get('auto-accept') or {}), 'seed': args.seed})
+    config.set('jobs', {**(config.get('jobs') or {}), 'queue': False})  # The oracle validates in this process
+    # A prefetched iteration would be prepared while the previous one is validated, skewing its model-seconds
+    config.set('pipeline', {**(config.get('pipeline') or {}), 'enabled': False})
+
+    experiment = args.experiment or f'simulation-{args.seed}-{datetime.now():%Y%m%d%H%M%S}'
+    if args.backend == 'memory':
+        dao = MemoryDAO(experiment_id=experiment)
+    else:
+        dao = MongoDAO(config.get('connection-string'), config.get('database-name'), experiment,
+                       config.get('raw-samples', False))
+    dao.set_sample_class(SampleFactory(config).get_sample())
+    SequenceLabelAnnotation.set_compact_spans(config.get('compact-spans', False))
+    simulation = Simulation(config, dao, args.seed, args.gold_fraction, args.min_f1, args.timeout)
+    simulation.load(args.dataset)
+    simulation.run(args.iterations, args.output)
+    print(f'Report saved to {args.output}')
+
+
+if __name__ == "__main__":
+    main()
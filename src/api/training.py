@@ -0,0 +1,195 @@
+import importlib
+import multiprocessing
+import os
+import time
+import traceback
+from typing import Callable, List, Tuple, Type
+from i_entities import IModel
+from i_entities import ISample
+from utils.config_loader import ConfigLoader
+
+# Environment variables limiting the threads of the numerical libraries used by the models.
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                    'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+
+class TrainingCancelledError(Exception):
+    """Raised when a fine-tuning running in a worker process is cancelled."""
+
+
+def _class_path(cls: Type) -> str:
+    return f'{cls.__module__}.{cls.__qualname__}'
+
+
+def _import_class(path: str) -> Type:
+    module_name, class_name = path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _limit_resources(cpu_threads: int, memory_limit: int):
+    """Applies the thread and memory limits to the current process, before the model libraries are imported."""
+    if cpu_threads:
+        for variable in THREAD_VARIABLES:
+            os.environ[variable] = str(cpu_threads)
+    if memory_limit:
+        import resource  # Not available on every platform
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _finetune_worker(model_path: str, model_params: dict, model_bytes: bytes, sample_path: str, samples: List[dict],
+                     checkpoint: Tuple[int, bytes], cpu_threads: int, memory_limit: int, connection):
+    """
+    Entry point of the training process.
+
+    The model and sample classes are imported by name after the resource limits are applied, so the
+    numerical libraries pick up the thread limits. The model is created with its configured parameters. Checkpoints are sent to the parent process as they
+    are taken, and the fine-tuned model is sent back as bytes.
+    """
+    try:
+        _limit_resources(cpu_threads, memory_limit)
+        model: IModel = _import_class(model_path)(**model_params)
+        model.load(model_bytes)
+        start_batch = 0
+        if checkpoint is not None:
+            start_batch, state = checkpoint
+            model.load_checkpoint(state)
+        sample_class: Type[ISample] = _import_class(sample_path)
+
+        def on_checkpoint(batch: int):
+            connection.send(('checkpoint', (batch, model.save_checkpoint().getvalue())))
+
+        model.finetune([sample_class.deserialize(sample) for sample in samples], start_batch, on_checkpoint)
+        connection.send(('done', model.save().getvalue()))
+    except MemoryError:
+        connection.send(('error', f'Fine-tuning exceeded the memory limit of {memory_limit} bytes'))
+    except Exception:
+        connection.send(('error', traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+class TrainingProcess:
+    """
+    Runs the fine-tuning of a model in a dedicated worker process.
+
+    Fine-tuning is CPU heavy and holds the GIL, so running it in the server process slows down every
+    other request. The worker process receives the serialized base model and the training set, and
+    returns the serialized fine-tuned model, which is then loaded into the caller's model.
+
+    Attributes:
+        cpu_threads (int): The maximum number of threads used by the numerical libraries in the worker.
+        memory_limit (int): The maximum address space of the worker, in bytes.
+        timeout (float): The maximum duration of a fine-tuning, in seconds.
+        model_params (dict): The keyword arguments of the model class, to create the model in the worker.
+    """
+
+    def __init__(self, cpu_threads: int = None, memory_limit: int = None, timeout: float = None,
+                 model_params: dict = None) -> None:
+        """
+        Initializes the training process settings.
+
+        Args:
+            cpu_threads (int, optional): The thread limit of the worker. Defaults to None (no limit).
+            memory_limit (int, optional): The memory limit of the worker, in bytes. Defaults to None (no limit).
+            timeout (float, optional): The fine-tuning timeout, in seconds. Defaults to None (no timeout).
+            model_params (dict, optional): The keyword arguments of the model class. Defaults to None (no arguments).
+        """
+        self.cpu_threads = cpu_threads
+        self.memory_limit = memory_limit
+        self.timeout = timeout
+        self.model_params = model_params or {}
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._cancelled = False
+
+    @classmethod
+    def from_config(cls, config: ConfigLoader) -> 'TrainingProcess':
+        """
+        Creates the training process from the `finetune` and `model-params` sections of the configuration.
+
+        Args:
+            config (ConfigLoader): The configuration loader.
+
+        Returns:
+            TrainingProcess: The configured training process, or None when fine-tuning is not isolated.
+        """
+        params = config.get('finetune') or {}
+        if not params.get('isolated', False):
+            return None
+        memory_limit = params.get('memory-limit-mb')
+        return cls(params.get('cpu-threads'), memory_limit * 1024 * 1024 if memory_limit else None, params.get('timeout'),
+                   config.get('model-params'))
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def run(self, model: IModel, samples: List[ISample], checkpoint: Tuple[int, bytes] = None,
+            on_checkpoint: Callable[[int, bytes], None] = None) -> IModel:
+        """
+        Fine-tunes a model in a worker process and blocks until it finishes.
+
+        Args:
+            model (IModel): The model to fine-tune. Its weights are replaced with the fine-tuned ones.
+            samples (List[ISample]): The annotated samples to fine-tune the model on.
+            checkpoint (Tuple[int, bytes], optional): The completed minibatches and the state to resume from. Defaults to None.
+            on_checkpoint (Callable[[int, bytes], None], optional): Called with the completed minibatches and
+                the fine-tuning state each time the worker takes a checkpoint. Defaults to None.
+
+        Returns:
+            IModel: The fine-tuned model.
+
+        Raises:
+            TrainingCancelledError: If the fine-tuning was cancelled or timed out.
+            RuntimeError: If the fine-tuning failed in the worker process.
+        """
+        self._cancelled = False
+        receiver, sender = self._context.Pipe(duplex=False)
+        sample_path = _class_path(type(samples[0])) if samples else _class_path(ISample)
+        self._process = self._context.Process(
+            target=_finetune_worker,
+            args=(_class_path(type(model)), self.model_params, model.save().getvalue(), sample_path,
+                  [sample.serialize() for sample in samples], checkpoint, self.cpu_threads, self.memory_limit, sender),
+            name='Finetune process',
+            daemon=True,
+        )
+        self._process.start()
+        sender.close()  # Only the worker writes to the pipe
+
+        message = None
+        start = time.monotonic()
+        try:
+            while message is None and not self._cancelled:
+                if self.timeout and time.monotonic() - start > self.timeout:
+                    self.cancel()
+                    break
+                if receiver.poll(0.5):
+                    try:
+                        message = receiver.recv()
+                    except EOFError:
+                        break  # The worker died without answering
+                    if message[0] == 'checkpoint':
+                        if on_checkpoint is not None:
+                            on_checkpoint(*message[1])
+                        message = None
+        finally:
+            receiver.close()
+            self._process.join(5)
+            if self._process.is_alive():
+                self._process.terminate()
+
+        if self._cancelled:
+            raise TrainingCancelledError('Fine-tuning was cancelled')
+        if message is None:
+            raise RuntimeError(f'Fine-tuning process exited unexpectedly with code {self._process.exitcode}')
+        status, payload = message
+        if status == 'error':
+            raise RuntimeError(f'Fine-tuning failed in the worker process:\n{payload}')
+        model.load(payload)
+        return model
+
+    def cancel(self):
+        """Cancels the running fine-tuning, terminating the worker process."""
+        self._cancelled = True
+        if self.running:
+            self._process.terminate()
@@ -10,15 +10,19 @@ import bcrypt
 from annotated_text import annotated_text
 from streamlit_option_menu import option_menu
 from i_entities import Annotator
+from i_entities import Experiment
 from i_entities import ISample
 from utils.loader import DatasetLoader
 from utils.config_loader import ConfigLoader
+from utils.near_duplicates import NearDuplicateIndex
+from utils.rendering import label_segments
 from annotation import SequenceLabelAnnotation
 from annotation import ClassificationAnnotation
 from sample import SampleFactory
 from model import ModelFactory
 from dao import MongoDAO
 from api.controller import AnnotationController
+from selector import DiversitySampleSelector
 
 
 class Application():
@@ -34,10 +38,15 @@ class Application():
         and prepares the annotation controller.
         """
         self.config = ConfigLoader('config.yaml')  # Load configuration from a YAML file
-        self.dao = MongoDAO(self.config.get('connection-string'), self.config.get('database-name'))  # Database connection
+        self.dao = MongoDAO(self.config.get('connection-string'), self.config.get('database-name'),
+                            self.config.get('experiment') or Experiment.DEFAULT_ID,
+                            self.config.get('raw-samples', False))  # Database connection, scoped to the experiment
         self.dao.set_sample_class(SampleFactory(self.config).get_sample())
+        SequenceLabelAnnotation.set_compact_spans(self.config.get('compact-spans', False))
         model = ModelFactory(self.config).get_model()
-        self.controller = AnnotationController(model(), self.dao, self.config)  # Annotation controller
+        model_params = self.config.get('model-params') or {}  # Keyword arguments of the model class
+        self.model = model(**model_params)
+        self.controller: AnnotationController = None  # Annotation controller of the selected experiment, see open_experiment
         self.SECRET_KEY = self.config.get('secret-key')
         self.setup()  # Set up the database
         
@@ -48,6 +57,35 @@ class Application():
         annotator = Annotator(self.config.get('master-email'), self.hash_password(self.config.get('master-password')))
         self.dao.setup_database(annotator)  # Initializes database with the master annotator
 
+    def open_experiment(self, experiment_id: str):
+        """
+        Scopes the database connection to an experiment and creates the annotation controller of the experiment.
+
+        Args:
+            experiment_id (str): The id of the experiment.
+        """
+        if self.controller is None or self.dao.experiment_id != experiment_id:
+            self.dao = self.dao.for_experiment(experiment_id)
+            self.controller = AnnotationController(self.model, self.dao, self.config)
+
+    def select_experiment(self):
+        """
+        Displays the experiment selector in the sidebar and opens the selected experiment.
+        """
+        if "experiment" not in st.session_state:
+            st.session_state.experiment = self.dao.experiment_id
+        experiments = self.dao.getExperimentIds()
+        if st.session_state.experiment not in experiments:
+            experiments.append(st.session_state.experiment)  # Created, but not started yet
+        with st.sidebar:
+            st.session_state.experiment = st.selectbox("Experiment", experiments,
+                                                       index=experiments.index(st.session_state.experiment))
+            name = st.text_input("New experiment")
+            if name and st.button("Create Experiment"):
+                st.session_state.experiment = name
+                st.rerun()
+        self.open_experiment(st.session_state.experiment)
+
     def create_user(self, username, password):
         hashed_password = self.hash_password(password)
         annotator= Annotator(username, hashed_password)
@@ -116,24 +154,7 @@ class Application():
             title (str): The title to display for the annotation visualization.
         """
         st.header(title)
-        display_text = []  # List to hold the annotated text
-        
-        current_index = 0
-        for start, end, label in annotations:
-            # Add the plain text before the annotation
-            if start > current_index:
-                display_text.append(text[current_index:start])
-            
-            # Add the annotation (text[start:end], label)
-            display_text.append((text[start:end], label))
-            current_index = end  # Update the current index
-        
-        # Add remaining plain text after the last annotation
-        if current_index < len(text):
-            display_text.append(text[current_index:])
-        
-        # Display the annotated text
-        annotated_text(*display_text)
+        annotated_text(*label_segments(text, annotations))
 
     def display_aesthetic_text(self, text, title, max_paragraph_length=200):
         """
@@ -258,8 +279,11 @@ class Application():
                 json.dump(json_data, file)
         
         try:
-            samples = DatasetLoader(filename, SampleFactory(self.config).get_sample(), annotated).run()
+            near_duplicates = NearDuplicateIndex.from_config(self.config, self.dao)
+            samples = DatasetLoader(filename, SampleFactory(self.config).get_sample(), annotated, near_duplicates).run()
             self.dao.saveSamples(samples)
+            if self.config.get('embedding-store'):
+                DiversitySampleSelector.index_samples(self.config.get('embedding-store'), samples)
             st.success('Data uploaded and saved Successfully')
         except Exception as e:
             st.error(f'Unable to save uploaded Dataset: {e}')
@@ -297,6 +321,10 @@ class Application():
                     "nav-link-selected": {"background-color": "#fff", "color": "black"},
                 }
             )
+        if page == "Login":
+            self.open_experiment(self.dao.experiment_id)
+        else:
+            self.select_experiment()
 
         # Login Page
         if page == "Login":
@@ -363,6 +391,32 @@ class Application():
                     st.write("Sample IDs in this iteration:")
                     st.write(iteration.sample_ids)
 
+                # The metrics of the model of each iteration on the held-out gold samples
+                history = self.dao.getIterationMetrics()
+                if history:
+                    st.subheader("Model Quality")
+                    rows = []
+                    for entry in history:
+                        row = {'Iteration': entry['position']}
+                        for metric, result in entry['metrics'].items():
+                            values = result if isinstance(result, dict) else {'score': result}
+                            row.update({f'{metric} {key}': value for key, value in values.items()
+                                        if isinstance(value, (int, float))})
+                        rows.append(row)
+                    st.line_chart(pandas.DataFrame(rows).set_index('Iteration'))
+
+            if self.controller.queue_jobs:
+                # The steps of the process run in worker processes, show the latest jobs of the queue
+                st.subheader("Jobs")
+                jobs = self.dao.getJobs(limit=20)
+                if jobs:
+                    st.dataframe(pandas.DataFrame([{
+                        'Type': job.type, 'State': job.state, 'Attempts': f'{job.attempts}/{job.max_attempts}',
+                        'Worker': job.worker, 'Created': job.create_time, 'Error': (job.error or '').strip().split('\n')[-1],
+                    } for job in jobs]))
+                else:
+                    st.write("No jobs yet.")
+
 
 
         # Annotation Validation Page
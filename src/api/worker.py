@@ -0,0 +1,148 @@
+import argparse
+import os
+import signal
+import socket
+import threading
+import traceback
+import uuid
+from typing import List
+from i_entities import IDAO
+from i_entities import JobType
+from i_entities import QueuedJob
+from utils.config_loader import ConfigLoader
+from sample import SampleFactory
+from annotation import SequenceLabelAnnotation
+from model import ModelFactory
+from dao import MongoDAO
+from api.controller import AnnotationController
+
+
+class Worker:
+    """
+    Runs the steps of the annotation process enqueued in the database by the user interface.
+
+    Any number of workers can run, on the same machine or on others, against the same database, and each
+    worker runs the jobs of every experiment. A worker leases one job at a time and renews the lease with
+    heartbeats while the job runs; when a lease is lost, e.g. because the job was cancelled or the worker
+    was considered dead, the job is abandoned. A failed job is put back in the queue until it reaches its
+    maximum number of attempts.
+
+    Attributes:
+        id (str): The unique identifier of the worker.
+        lease_seconds (float): The duration of a lease.
+        retry_delay (float): The delay before the first retry of a failed job, doubled at each attempt.
+        poll_interval (float): The delay between two polls of an empty queue.
+        types (List[str]): The types of job run by the worker, None for every type.
+    """
+
+    def __init__(self, dao: IDAO, model, config: ConfigLoader, types: List[str] = None) -> None:
+        """
+        Initializes the worker.
+
+        Args:
+            dao (IDAO): The data access object.
+            model (IModel): The base model fine-tuned by the jobs.
+            config (ConfigLoader): The configuration loader, with the `jobs` settings.
+            types (List[str], optional): The types of job to run. Defaults to None (every type).
+        """
+        settings = config.get('jobs') or {}
+        self.id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.dao = dao
+        self.model = model
+        self.config = config
+        self.lease_seconds = settings.get('lease-seconds', 60)
+        self.retry_delay = settings.get('retry-delay', 30)
+        self.poll_interval = settings.get('poll-interval', 2)
+        self.types = types
+        self._stop = threading.Event()
+
+    def stop(self, *args):
+        """Stops the worker once the current job is over."""
+        print(f'Worker {self.id} is stopping')
+        self._stop.set()
+
+    def run(self, once: bool = False):
+        """
+        Runs the jobs of the queue until the worker is stopped.
+
+        Args:
+            once (bool): Whether to stop once the queue is empty. Defaults to False.
+        """
+        print(f'Worker {self.id} started')
+        for experiment_id in self.dao.getExperimentIds():
+            # Re-enqueues the work interrupted by a crash, if any
+            AnnotationController(self.model, self.dao.for_experiment(experiment_id), self.config)
+        while not self._stop.is_set():
+            job = self.dao.leaseJob(self.id, self.lease_seconds, self.types)
+            if job is None:
+                if once:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+        print(f'Worker {self.id} stopped')
+
+    def run_job(self, job: QueuedJob):
+        """
+        Runs a leased job with a new controller of its experiment, renewing the lease until the job is over.
+
+        Args:
+            job (QueuedJob): The leased job.
+        """
+        print(f'Running job {job.type} {job.payload} of experiment {job.experiment} (attempt {job.attempts} of {job.max_attempts})')
+        dao = self.dao.for_experiment(job.experiment)
+        controller = AnnotationController(self.model, dao, self.config, recover=False)
+        task = controller.scheduler.submit(controller.run_job, JobType(job.type), job.payload, name=job.type.lower())
+        finished = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat():
+            while not finished.wait(self.lease_seconds / 3):
+                if not self.dao.heartbeatJob(job, self.lease_seconds):
+                    print(f'The lease of job {job.type} {job._id} was lost, cancelling it')
+                    lost.set()
+                    controller.cancel_finetuning()
+                    controller.scheduler.cancel(task.id)
+                    return
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name='Job heartbeat', daemon=True)
+        heartbeat_thread.start()
+        try:
+            task.future.result()
+        except BaseException:
+            if not lost.is_set():
+                print(f'Job {job.type} {job._id} failed')
+                self.dao.failJob(job, traceback.format_exc(), self.retry_delay)
+        else:
+            if not lost.is_set():
+                self.dao.completeJob(job)
+        finally:
+            finished.set()
+            heartbeat_thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Runs the steps of the annotation process enqueued by the user interface.')
+    parser.add_argument('--config', default='config.yaml', help='The configuration file.')
+    parser.add_argument('--types', nargs='*', choices=[job_type.value for job_type in JobType],
+                        help='The types of job to run, every type by default.')
+    parser.add_argument('--once', action='store_true', help='Stop once the queue is empty.')
+    args = parser.parse_args()
+
+    config = ConfigLoader(args.config)
+    if not (config.get('jobs') or {}).get('queue', False):
+        print('Warning: jobs.queue is disabled, the user interface runs the jobs itself')
+    dao = MongoDAO(config.get('connection-string'), config.get('database-name'),
+                   raw_samples=config.get('raw-samples', False))
+    dao.set_sample_class(SampleFactory(config).get_sample())
+    SequenceLabelAnnotation.set_compact_spans(config.get('compact-spans', False))
+    model = ModelFactory(config).get_model()
+    model_params = config.get('model-params') or {}  # Keyword arguments of the model class
+    worker = Worker(dao, model(**model_params), config, args.types)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run(args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import timeit
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from i_entities import IAnnotation
+from i_entities import Iteration
+from i_entities import IterationState
+from annotation import SequenceLabelAnnotation
+from sample import SequenceToSequenceSample
+from sample import TextClassificationSample
+from model import NERModel
+from utils.rendering import label_segments
+from benchmarks.scaling import synthetic_record
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'micro.json')
+# A fixed workload independent of the code of the repository, timed along each benchmark as a unit of machine speed
+REFERENCE_DOCUMENT = {'text': 'lorem ipsum dolor sit amet ' * 20, 'labels': [[index, index + 5, 'LABEL'] for index in range(40)],
+                      'scores': [index / 40 for index in range(40)], 'validated': False}
+
+
+def sequence_document(rng: random.Random, parts: int = 6) -> dict:
+    """
+    Returns a sample document as stored by the DAO, with a model annotation of about `2 * parts` spans
+    over a text of about `100 * parts` characters.
+    """
+    text, labels = '', []
+    for _ in range(parts):
+        record = synthetic_record(SequenceToSequenceSample.__name__, rng)
+        labels += [[start + len(text), end + len(text), label] for start, end, label in record['labels']]
+        text += record['text'] + ' '
+    return {
+        '_id': uuid.uuid4(), 'text': text, 'validated': False, 'gold_set': False, 'cluster_id': None,
+        'experiment': 'default',
+        'labels': {
+            '_id': uuid.uuid4(), 'sample_id': uuid.uuid4(), 'is_valid': None, 'iteration': uuid.uuid4(),
+            'annotator': None, 'name': SequenceLabelAnnotation.get_annotation_name(), 'label': labels,
+            'scores': [rng.random() for _ in labels], 'confidence': rng.random(), 'experiment': 'default',
+        },
+    }
+
+
+def classification_document(rng: random.Random) -> dict:
+    """Returns a validated classification sample document as stored by the DAO."""
+    record = synthetic_record(TextClassificationSample.__name__, rng)
+    return {'_id': uuid.uuid4(), 'text': record['text'], 'validated': True, 'gold_set': True, 'cluster_id': None,
+            'experiment': 'default', 'labels': {'_id': uuid.uuid4(), 'sample_id': uuid.uuid4(), 'is_valid': True,
+                                                'iteration': None, 'annotator': None, 'name': 'classification',
+                                                'label': record['labels'], 'confidence': None}}
+
+
+def iteration_document(sample_size: int = 100) -> dict:
+    """Returns the document of an iteration of `sample_size` samples, as stored by the DAO."""
+    iteration = Iteration(3, uuid.uuid4(), [uuid.uuid4() for _ in range(sample_size)])
+    iteration._id = uuid.uuid4()
+    iteration.status = IterationState.VALIDATING
+    return {**iteration.serialize(), 'experiment': 'default'}
+
+
+def benchmarks(seed: int = 0) -> Dict[str, Callable[[], Callable[[], object]]]:
+    """
+    Returns the benchmarks by name. Each benchmark is a setup function, run once, returning the function timed.
+    """
+    rng = random.Random(seed)
+    sequence = sequence_document(rng)
+    long_sequence = sequence_document(rng, 40)
+    classification = classification_document(rng)
+    iteration = iteration_document()
+
+    def generate_annotation():
+        model = NERModel()
+        samples = [SequenceToSequenceSample.deserialize(sequence_document(rng)) for _ in range(32)]
+        return lambda: model.generateAnnotation(samples, None)
+
+    return {
+        'serialize-sequence-sample': lambda: SequenceToSequenceSample.deserialize(sequence).serialize,
+        'serialize-iteration': lambda: Iteration.deserialize(iteration).serialize,
+        'deserialize-sequence-sample': lambda: lambda: SequenceToSequenceSample.deserialize(sequence),
+        'deserialize-classification-sample': lambda: lambda: TextClassificationSample.deserialize(classification),
+        'deserialize-annotation': lambda: lambda: IAnnotation.deserialize(sequence['labels']),
+        'deserialize-sequence-annotation': lambda: lambda: SequenceLabelAnnotation.deserialize(sequence['labels']),
+        'deserialize-iteration': lambda: lambda: Iteration.deserialize(iteration),
+        'label-segments': lambda: lambda: label_segments(sequence['text'], sequence['labels']['label']),
+        'label-segments-long': lambda: lambda: label_segments(long_sequence['text'], long_sequence['labels']['label']),
+        'ner-generate-annotation-32': generate_annotation,
+    }
+
+
+def reference():
+    """The reference workload, a JSON round-trip of a sample-like document."""
+    return json.loads(json.dumps(REFERENCE_DOCUMENT))
+
+
+def calibrate(timer: timeit.Timer, min_time: float) -> int:
+    """Returns the number of calls of a timer lasting at least `min_time` seconds, as `timeit` does."""
+    number, elapsed = 1, 0.0
+    while elapsed < min_time:
+        elapsed = timer.timeit(number)
+        if elapsed < min_time:
+            number *= max(2, int(min_time / max(elapsed, 1e-9)))
+    return number
+
+
+def measure(function: Callable[[], object], min_time: float = 0.2, repeat: int = 7) -> Tuple[float, float]:
+    """
+    Times a function as `timeit` does, alternating its runs with runs of the reference workload: the number
+    of calls of each is calibrated to last at least `min_time` seconds, and `repeat` runs of each are timed.
+    Each run of the function is compared with the next run of the reference, under the same load of the machine.
+
+    Returns:
+        Tuple[float, float]: The seconds per call of the function, the fastest of its runs, and its cost
+                             relative to the reference workload, the median of the ratios of the runs.
+    """
+    timer, reference_timer = timeit.Timer(function), timeit.Timer(reference)
+    number, reference_number = calibrate(timer, min_time), calibrate(reference_timer, min_time)
+    times, reference_times = [], []
+    for _ in range(repeat):
+        times.append(timer.timeit(number) / number)
+        reference_times.append(reference_timer.timeit(reference_number) / reference_number)
+    return min(times), statistics.median(time / reference_time for time, reference_time in zip(times, reference_times))
+
+
+def check(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[Tuple[str, float]]:
+    """
+    Returns the benchmarks slower than in the baseline by more than `threshold`, with their relative slowdown.
+    The results are costs relative to the reference workload, see `measure`.
+    """
+    return [(name, seconds / baseline[name] - 1) for name, seconds in results.items()
+            if baseline.get(name) and seconds / baseline[name] - 1 > threshold]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the serialization, deserialization, annotation and rendering hot paths.')
+    parser.add_argument('-k', '--filter', help='Only run the benchmarks whose name contains this text.')
+    parser.add_argument('--baseline', default=BASELINE, help='The baseline results.')
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the new baseline.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='The relative slowdown tolerated before a regression.')
+    parser.add_argument('--min-time', type=float, default=0.2, help='The minimum number of seconds of each timed run.')
+    parser.add_argument('--repeat', type=int, default=7, help='The number of timed runs of each benchmark.')
+    parser.add_argument('--output', help='The JSON report.')
+    args = parser.parse_args()
+
+    results, seconds = {}, {}
+    for name, setup in benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        try:
+            function = setup()
+        except Exception as e:  # E.g. the spaCy model is not installed
+            print(f'{name:40} skipped: {e}')
+            continue
+        seconds[name], results[name] = measure(function, args.min_time, args.repeat)
+        print(f'{name:40} {seconds[name] * 1e6:12.2f} us {results[name]:10.4f} x reference')
+
+    # The results are relative to the reference workload, the seconds depend on the machine
+    report = {'time': datetime.now().isoformat(), 'python': sys.version.split()[0], 'results': results, 'seconds': seconds}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**report, 'results': {**baseline.get('results', {}), **results},
+                       'seconds': {**baseline.get('seconds', {}), **seconds}}, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+        return
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}, save one with --save-baseline')
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        regressions = check(results, json.load(f).get('results', {}), args.threshold)
+    for name, slowdown in regressions:
+        print(f'Regression: {name} is {slowdown:.0%} slower than the baseline')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
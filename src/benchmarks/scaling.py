@@ -0,0 +1,346 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Type
+import numpy as np
+from i_entities import IDAO
+from i_entities import ISample
+from i_entities import Iteration
+from i_entities import IterationState
+from utils.config_loader import ConfigLoader
+from utils.loader import DatasetLoader
+from utils.near_duplicates import NearDuplicateIndex
+from sample import SampleFactory
+from sample import SequenceToSequenceSample
+from sample import TextClassificationSample
+from annotation import SequenceLabelAnnotation
+from model import ModelFactory
+from model import NERModel
+from model import TextClassificationModel
+from dao import MemoryDAO
+from dao import MongoDAO
+from selector import DiversitySampleSelector
+from api.controller import AnnotationController
+from api.simulate import OracleAnnotator
+
+MODELS = {
+    SequenceToSequenceSample.__name__: NERModel.__name__,
+    TextClassificationSample.__name__: TextClassificationModel.__name__,
+}  # The model benchmarked with each sample type
+
+ENTITIES = {
+    'PERSON': ['Ada Lovelace', 'Alan Turing', 'Grace Hopper', 'Edsger Dijkstra', 'Barbara Liskov'],
+    'LOCATION': ['Lisbon', 'New York', 'Buenos Aires', 'Nairobi', 'Kyoto'],
+    'ORGANIZATION': ['the United Nations', 'Acme Corporation', 'the Red Cross', 'Globex', 'Initech'],
+}
+TOPICS = {
+    'sports': ['match', 'team', 'goal', 'season', 'coach', 'league', 'player', 'score'],
+    'politics': ['election', 'minister', 'vote', 'policy', 'parliament', 'party', 'law', 'debate'],
+    'technology': ['software', 'network', 'device', 'startup', 'data', 'chip', 'cloud', 'robot'],
+    'health': ['doctor', 'vaccine', 'hospital', 'patient', 'treatment', 'virus', 'clinic', 'diet'],
+}
+FILLER = ['the', 'a', 'report', 'said', 'on', 'monday', 'after', 'new', 'with', 'from', 'about', 'during',
+          'week', 'while', 'people', 'city', 'announced', 'was', 'in', 'of']
+
+# Whether a larger value of a measurement is better, by suffix. The other measurements are informational.
+HIGHER_IS_BETTER = {'-per-second': True, '-seconds': False, '-ms': False}
+
+
+def synthetic_record(sample_type: str, rng: random.Random) -> dict:
+    """
+    Returns a labeled record in the format of the `DatasetLoader`, with random text.
+
+    Sequence samples mention a few entities of `ENTITIES` among filler words, labeled with their spans.
+    Classification samples mix words of one of the `TOPICS`, their label, with filler words.
+    """
+    if sample_type == SequenceToSequenceSample.__name__:
+        text = ''
+        labels = []
+        for _ in range(rng.randint(2, 4)):
+            text += ' '.join(rng.choices(FILLER, k=rng.randint(3, 10))) + ' '
+            label = rng.choice(list(ENTITIES))
+            entity = rng.choice(ENTITIES[label])
+            labels.append([len(text), len(text) + len(entity), label])
+            text += entity + ' '
+        text += ' '.join(rng.choices(FILLER, k=rng.randint(3, 10))) + '.'
+        return {'text': text, 'labels': labels}
+    label = rng.choice(list(TOPICS))
+    words = rng.choices(TOPICS[label], k=rng.randint(3, 8)) + rng.choices(FILLER, k=rng.randint(5, 20))
+    rng.shuffle(words)
+    return {'text': ' '.join(words) + '.', 'labels': label}
+
+
+def synthetic_corpus(sample_type: str, size: int, seed: int = 0) -> List[dict]:
+    """Returns `size` labeled records of the sample type, the same for the same seed."""
+    rng = random.Random(seed)
+    return [synthetic_record(sample_type, rng) for _ in range(size)]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Returns the value below which the given fraction of the values fall, by nearest rank."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+class ScalingBenchmark:
+    """
+    Measures the steps of an iteration of the annotation process on synthetic corpora of growing size.
+
+    For each corpus size, a labeled corpus is generated and written to a JSON file, and a fraction of it is
+    loaded as the gold set. Then each step is timed, with the configured selector, model and backend:
+
+    - ingestion of the corpus with the `DatasetLoader` and `saveSamples`, including the near-duplicate
+      detection and the embeddings of the diversity selector when they are enabled;
+    - fine-tuning of the model on the gold set;
+    - selection of the samples of an iteration;
+    - annotation of the selected samples by the fine-tuned model, and persistence of the annotations;
+    - `getPendingAnnotation` and validation round-trips, i.e. fetching the next pending annotation and
+      validating it through the controller, as the user interface does.
+
+    One annotation of the iteration is never validated, so the iteration does not end and no background
+    work runs during the measurements.
+
+    Attributes:
+        config (ConfigLoader): The configuration, with the overrides of the benchmark.
+        sample_type (str): The name of the sample class.
+        new_dao (Callable[[int], IDAO]): Returns an empty data access object for a corpus size.
+        seed (int): The seed of the corpora and of the random draws.
+        gold_fraction (float): The fraction of each corpus loaded as the gold set.
+        validations (int): The maximum number of validation round-trips measured.
+    """
+
+    def __init__(self, config: ConfigLoader, sample_type: str, new_dao: Callable[[int], IDAO], seed: int = 0,
+                 gold_fraction: float = 0.1, validations: int = 200) -> None:
+        self.config = config
+        self.sample_type = sample_type
+        self.new_dao = new_dao
+        self.seed = seed
+        self.gold_fraction = gold_fraction
+        self.validations = validations
+        self.sample_class: Type[ISample] = SampleFactory(config).get_sample()
+        self.model_class = ModelFactory(config).get_model()
+
+    def ingest(self, dao: IDAO, path: str, annotated: bool) -> List[ISample]:
+        """Loads a JSON corpus and saves its samples, as the upload of a dataset does."""
+        near_duplicates = NearDuplicateIndex.from_config(self.config, dao)
+        samples = DatasetLoader(path, self.sample_class, annotated, near_duplicates).run()
+        dao.saveSamples(samples)
+        if self.config.get('Selector') == DiversitySampleSelector.__name__:
+            DiversitySampleSelector.index_samples(self.config.get('embedding-store'), samples)
+        return samples
+
+    def run_size(self, size: int, directory: str) -> Dict[str, Any]:
+        """
+        Measures every step on a corpus of the given size.
+
+        Args:
+            size (int): The number of samples of the corpus.
+            directory (str): The directory of the generated corpus files.
+
+        Returns:
+            Dict[str, Any]: The measurements.
+        """
+        records = synthetic_corpus(self.sample_type, size, self.seed)
+        gold_size = max(int(size * self.gold_fraction), 1)
+        gold_path = os.path.join(directory, f'gold-{size}.json')
+        pool_path = os.path.join(directory, f'pool-{size}.json')
+        with open(gold_path, 'w', encoding='utf-8') as f:
+            json.dump(records[:gold_size], f)
+        with open(pool_path, 'w', encoding='utf-8') as f:
+            json.dump(records[gold_size:], f)
+
+        dao = self.new_dao(size)
+        dao.set_sample_class(self.sample_class)
+        result = {'size': size, 'gold': gold_size}
+
+        start = time.perf_counter()
+        self.ingest(dao, gold_path, True)
+        pool = self.ingest(dao, pool_path, False)
+        result['ingest-seconds'] = time.perf_counter() - start
+        result['ingest-per-second'] = size / result['ingest-seconds']
+        # The oracle knows the labels hidden by the loader
+        oracle = OracleAnnotator({sample._id: self.sample_class.deserialize(record).labels
+                                  for sample, record in zip(pool, records[gold_size:])})
+
+        model = self.model_class(**(self.config.get('model-params') or {}))
+        gold = dao.getGoldenSamples()
+        start = time.perf_counter()
+        model.finetune(gold)
+        result['finetune-seconds'] = time.perf_counter() - start
+        result['finetune-per-second'] = len(gold) / result['finetune-seconds']
+        model.id = dao.saveModel(model)
+
+        controller = AnnotationController(model, dao, self.config, recover=False)
+        start = time.perf_counter()
+        samples = controller.select_samples(model)
+        result['select-seconds'] = time.perf_counter() - start
+        result['selected'] = len(samples)
+
+        iteration = Iteration(1, model.id, [sample._id for sample in samples])
+        iteration.status = IterationState.VALIDATING
+        iteration._id = dao.saveIteration(iteration)
+        controller.current_iteration = iteration
+        start = time.perf_counter()
+        samples = model.generateAnnotation(samples, iteration._id)
+        result['annotate-seconds'] = time.perf_counter() - start
+        result['annotate-per-second'] = len(samples) / result['annotate-seconds'] if samples else None
+        start = time.perf_counter()
+        ids = dao.saveAnnotations([sample.labels for sample in samples])
+        for sample, annotation_id in zip(samples, ids or []):
+            sample.labels._id = annotation_id
+        dao.indexLabels(samples)
+        result['persist-seconds'] = time.perf_counter() - start
+
+        pending_times, round_trips = [], []
+        for _ in range(min(self.validations, len(samples) - 1)):
+            start = time.perf_counter()
+            sample = dao.getPendingAnnotation(iteration._id)
+            pending_times.append(time.perf_counter() - start)
+            if sample is None:
+                break
+            controller.validate_annotation(sample, oracle.judge(sample))
+            round_trips.append(time.perf_counter() - start)
+        result['validations'] = len(round_trips)
+        result['pending-annotation-ms'] = statistics.mean(pending_times) * 1000 if pending_times else None
+        result['validation-p50-ms'] = percentile(round_trips, 0.5) * 1000 if round_trips else None
+        result['validation-p95-ms'] = percentile(round_trips, 0.95) * 1000 if round_trips else None
+        result['validation-per-second'] = len(round_trips) / sum(round_trips) if round_trips else None
+        return result
+
+    def run(self, sizes: List[int]) -> Dict[str, Any]:
+        """
+        Measures every step on a corpus of each size.
+
+        Args:
+            sizes (List[int]): The sizes of the corpora.
+
+        Returns:
+            Dict[str, Any]: The report, with the measurements of each size.
+        """
+        report = {'sample-type': self.sample_type, 'model': self.config.get('modelName'),
+                  'selector': self.config.get('Selector'), 'seed': self.seed,
+                  'sample-size': self.config.get('sample-size'), 'time': datetime.now().isoformat(), 'sizes': []}
+        with tempfile.TemporaryDirectory() as directory:
+            self.config.set('embedding-store', {**(self.config.get('embedding-store') or {}),
+                                                'path': os.path.join(directory, 'embeddings')})
+            for size in sizes:
+                print(f'Benchmarking {size} samples')
+                result = self.run_size(size, directory)
+                print(json.dumps(result))
+                report['sizes'].append(result)
+        return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compares the measurements of a report with those of a baseline report, size by size.
+
+    Args:
+        report (Dict[str, Any]): The report.
+        baseline (Dict[str, Any]): The baseline report.
+        tolerance (float): The relative slowdown tolerated before a measurement is a regression.
+
+    Returns:
+        List[Dict[str, Any]]: The comparison of each measurement present in both reports.
+    """
+    baseline_sizes = {result['size']: result for result in baseline.get('sizes', [])}
+    comparisons = []
+    for result in report['sizes']:
+        previous = baseline_sizes.get(result['size'])
+        if previous is None:
+            continue
+        for name, value in result.items():
+            higher_is_better = next((better for suffix, better in HIGHER_IS_BETTER.items() if name.endswith(suffix)), None)
+            reference = previous.get(name)
+            if higher_is_better is None or not value or not reference:
+                continue
+            change = (value - reference) / reference
+            regression = change < -tolerance if higher_is_better else change > tolerance
+            comparisons.append({'size': result['size'], 'measurement': name, 'baseline': reference,
+                                'value': value, 'change': change, 'regression': regression})
+    return comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the steps of the annotation process on synthetic corpora of growing size.')
+    parser.add_argument('--config', default='config.yaml', help='The configuration file.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='The sizes of the corpora.')
+    parser.add_argument('--sample-type', choices=list(MODELS), default=TextClassificationSample.__name__,
+                        help='The sample class of the corpora, benchmarked with its model.')
+    parser.add_argument('--backend', choices=['memory', 'mongo'], default='memory',
+                        help='The database: in memory, or the MongoDB server of the configuration.')
+    parser.add_argument('--database-name', help='The MongoDB database of the benchmark, dropped at the end. '
+                                                'Defaults to the configured database name with a "-benchmark" suffix.')
+    parser.add_argument('--sample-size', type=int, help='The number of samples per iteration, from the configuration by default.')
+    parser.add_argument('--selector', help='The sample selector, from the configuration by default.')
+    parser.add_argument('--validations', type=int, default=200, help='The maximum number of validation round-trips per size.')
+    parser.add_argument('--gold-fraction', type=float, default=0.1, help='The fraction of each corpus loaded as the gold set.')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the corpora and of the random draws.')
+    parser.add_argument('--output', default='benchmark.json', help='The JSON report.')
+    parser.add_argument('--baseline', help='A previous report to compare with.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='The relative slowdown tolerated before a regression.')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    config = ConfigLoader(args.config)
+    if config.get('modelName') != MODELS[args.sample_type]:
+        config.set('model-params', {})  # The configured parameters belong to another model
+    config.set('sampleClass', args.sample_type)
+    config.set('modelName', MODELS[args.sample_type])
+    if args.sample_size:
+        config.set('sample-size', args.sample_size)
+    if args.selector:
+        config.set('Selector', args.selector)
+    config.set('selector-params', {**(config.get('selector-params') or {}), 'seed': args.seed})
+    # Every annotation is validated, in this process, and the next iteration is not prepared
+    config.set('auto-accept', {**(config.get('auto-accept') or {}), 'enabled': False})
+    config.set('pipeline', {**(config.get('pipeline') or {}), 'enabled': False})
+    config.set('jobs', {**(config.get('jobs') or {}), 'queue': False})
+
+    database_name = args.database_name or f"{config.get('database-name')}-benchmark"
+    daos = []
+
+    def new_dao(size: int) -> IDAO:
+        experiment = f'benchmark-{size}'
+        if args.backend == 'memory':
+            dao = MemoryDAO(experiment_id=experiment)
+        else:
+            dao = MongoDAO(config.get('connection-string'), database_name, experiment, config.get('raw-samples', False))
+        daos.append(dao)
+        return dao
+
+    SequenceLabelAnnotation.set_compact_spans(config.get('compact-spans', False))
+    benchmark = ScalingBenchmark(config, args.sample_type, new_dao, args.seed, args.gold_fraction, args.validations)
+    try:
+        report = benchmark.run(args.sizes)
+    finally:
+        AnnotationController.shared_scheduler(config).shutdown(wait=False)
+        if args.backend == 'mongo' and daos:
+            daos[0].mongo_client.drop_database(database_name)
+    report['backend'] = args.backend
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['comparison'] = compare(report, json.load(f), args.tolerance)
+        regressions = [comparison for comparison in report['comparison'] if comparison['regression']]
+        for comparison in regressions:
+            print(f"Regression at {comparison['size']} samples: {comparison['measurement']} "
+                  f"{comparison['baseline']:.4g} -> {comparison['value']:.4g} ({comparison['change']:+.0%})")
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f'Report saved to {args.output}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
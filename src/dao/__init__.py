@@ -1 +1,2 @@
-from .mongo_dao import MongoDAO
\ No newline at end of file
+from .mongo_dao import MongoDAO
+from .memory_dao import MemoryDAO
@@ -0,0 +1,101 @@
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Type
+from bson.raw_bson import RawBSONDocument
+from i_entities import ISample
+from i_entities.serializable import slot_fields
+
+# The value of a field missing from the document, as set by `ISample.deserialize`
+FIELD_DEFAULTS = {'validated': False, 'text': '', 'gold_set': False}
+
+_lazy_classes: Dict[type, type] = {}  # The lazy class of each sample class
+
+
+def restore_sample(sample_class: Type[ISample], fields: Dict[str, Any]) -> ISample:
+    """Creates a sample of the given class with the given fields, without calling `__init__`."""
+    sample = sample_class.__new__(sample_class)
+    for field, value in fields.items():
+        setattr(sample, field, value)
+    return sample
+
+
+def lazy_field(name: str, slot: Any, decode: Callable[[RawBSONDocument], Any]) -> property:
+    """
+    Returns a property reading a field from the raw document on first access and keeping it in the slot.
+    Once a field is set, it is never read from the document again.
+    """
+    def get(self):
+        try:
+            return slot.__get__(self)
+        except AttributeError:
+            value = decode(self._raw)
+            slot.__set__(self, value)
+            return value
+
+    def set(self, value):
+        slot.__set__(self, value)
+
+    return property(get, set, doc=f'The `{name}` of the sample, decoded on first access.')
+
+
+def lazy_sample_class(sample_class: Type[ISample]) -> type:
+    """
+    Returns the subclass of a sample class whose instances wrap a raw BSON document, creating it on first use.
+
+    Each field of the sample is a property decoding it from the document on first access. The annotation
+    of the sample stays a raw nested document until `labels` is read, so listing the ids or the texts of a
+    large result set skips the decoding of the annotations. Copying or pickling a lazy sample decodes it
+    into an instance of the sample class.
+
+    Args:
+        sample_class (Type[ISample]): The sample class.
+
+    Returns:
+        type: The lazy sample class.
+    """
+    if sample_class in _lazy_classes:
+        return _lazy_classes[sample_class]
+    annotation_class = sample_class.get_annotation_class()
+
+    def decode_labels(raw: RawBSONDocument):
+        labels = raw.get('labels', {})
+        return annotation_class.deserialize(dict(labels) if isinstance(labels, Mapping) else labels)
+
+    def serialize(self):
+        return sample_class.serialize(self)
+
+    def __reduce__(self):
+        return restore_sample, (sample_class, {field: getattr(self, field) for field in fields})
+
+    def materialize(self) -> ISample:
+        """Returns the sample decoded into an instance of the sample class."""
+        return restore_sample(sample_class, {field: getattr(self, field) for field in fields})
+
+    fields = slot_fields(sample_class)
+    namespace = {'__slots__': ('_raw',), '__module__': __name__, 'serialize': serialize,
+                 '__reduce__': __reduce__, 'materialize': materialize}
+    for field in fields:
+        if field == 'labels':
+            decode = decode_labels
+        else:
+            decode = lambda raw, field=field: raw.get(field, FIELD_DEFAULTS.get(field))
+        namespace[field] = lazy_field(field, getattr(sample_class, field), decode)
+    _lazy_classes[sample_class] = type(f'Lazy{sample_class.__name__}', (sample_class,), namespace)
+    return _lazy_classes[sample_class]
+
+
+def lazy_sample(sample_class: Type[ISample], document: RawBSONDocument) -> ISample:
+    """
+    Wraps a raw sample document in a lazy sample, see `lazy_sample_class`.
+
+    Args:
+        sample_class (Type[ISample]): The sample class.
+        document (RawBSONDocument): The raw document, None if the sample was not found.
+
+    Returns:
+        ISample: The lazy sample, or None if the document is None.
+    """
+    if document is None:
+        return None
+    sample = lazy_sample_class(sample_class).__new__(lazy_sample_class(sample_class))
+    sample._raw = document
+    return sample
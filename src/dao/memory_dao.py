@@ -0,0 +1,420 @@
+import copy
+import io
+import threading
+import uuid
+from random import Random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple, Type
+from i_entities import IAnnotation
+from i_entities import Annotator
+from i_entities import IDAO
+from i_entities import Iteration
+from i_entities import IterationState
+from i_entities import ISample
+from i_entities import IModel
+from i_entities import log_method
+from i_entities import Experiment
+from i_entities import Checkpoint
+from i_entities import JobState
+from i_entities import QueuedJob
+
+
+class _Store:
+    """The documents of an in-memory database, shared by the DAOs of all its experiments."""
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self.experiments: Dict[str, Dict[str, Dict[Any, dict]]] = {}  # Experiment id -> collection -> _id -> document
+        self.annotators: Dict[str, dict] = {}  # Email -> annotator
+        self.files: Dict[Any, bytes] = {}  # Models and checkpoint states
+        self.jobs: Dict[Any, dict] = {}  # The jobs of every experiment, leased by any worker
+
+
+class MemoryDAO(IDAO):
+    """
+    An in-memory implementation of the DAO interface, for simulations, benchmarks and tests.
+
+    Documents are stored as the dictionaries the MongoDB implementation would store, copied on every
+    write and read, so the entities go through the same serialization as with a database. The DAOs
+    returned by `for_experiment` share the same store. Nothing is persisted: the data is lost when the
+    process exits.
+
+    Attributes:
+        experiment_id (str): The experiment whose documents the DAO reads and writes.
+    """
+
+    def __init__(self, connection_string: str = None, database_name: str = "stas", experiment_id: str = Experiment.DEFAULT_ID) -> None:
+        self.experiment_id = experiment_id
+        self._store = _Store()
+        super().__init__(connection_string, database_name)
+
+    def connect(self):
+        pass
+
+    def for_experiment(self, experiment_id: str) -> 'MemoryDAO':
+        """Returns a DAO of the given experiment, sharing the store of this DAO."""
+        dao = copy.copy(self)
+        dao.experiment_id = experiment_id
+        return dao
+
+    def collection(self, name: str) -> Dict[Any, dict]:
+        """Returns the documents of a collection of the experiment, by id."""
+        with self._store.lock:
+            return self._store.experiments.setdefault(self.experiment_id, {}).setdefault(name, {})
+
+    def insert(self, name: str, document: dict) -> Any:
+        """Inserts a copy of a document in a collection of the experiment and returns its id."""
+        document = copy.deepcopy(document)
+        if not document.get("_id"):
+            document["_id"] = uuid.uuid4()
+        document["experiment"] = self.experiment_id
+        self.collection(name)[document["_id"]] = document
+        return document["_id"]
+
+    def update(self, name: str, id: Any, values: dict) -> bool:
+        """Sets the given fields of a document. Returns False if there is no such document."""
+        document = self.collection(name).get(id)
+        if document is None:
+            return False
+        document.update(copy.deepcopy(values))
+        return True
+
+    def find(self, name: str, id: Any) -> dict:
+        """Returns a copy of a document, or None."""
+        document = self.collection(name).get(id)
+        return copy.deepcopy(document) if document is not None else None
+
+    def saveSample(self, sample: ISample):
+        return self.insert("Sample", sample.serialize())
+
+    def saveSampleAnnotation(self, sample: ISample):
+        return self.update("Sample", sample._id, sample.serialize())
+
+    def saveSamples(self, samples: List[ISample]):
+        with self._store.lock:
+            for sample in samples:
+                sample._id = self.insert("Sample", sample.serialize())
+        return [sample._id for sample in samples]
+
+    def updateAnnotation(self, sample: ISample):
+        self.update("Annotation", sample.labels._id, sample.labels.serialize())
+
+    def getSample(self, id: Any) -> ISample:
+        return self.sample_class.deserialize(self.find("Sample", id))
+
+    def getSamples(self, ids: List[Any]) -> List[ISample]:
+        documents = (self.find("Sample", id) for id in ids)
+        return [self.sample_class.deserialize(document) for document in documents if document is not None]
+
+    def getPendingSamples(self) -> List[ISample]:
+        return [self.sample_class.deserialize(copy.deepcopy(document))
+                for document in list(self.collection("Sample").values()) if document.get("validated") is False]
+
+    def iterPendingSampleIds(self, batch_size: int = 1024) -> Iterator[Any]:
+        ids = [id for id, document in list(self.collection("Sample").items()) if document.get("validated") is False]
+        return iter(ids)
+
+    def getGoldenSamples(self, tuggle: bool = True) -> List[ISample]:
+        return [self.sample_class.deserialize(copy.deepcopy(document))
+                for document in list(self.collection("Sample").values())
+                if document.get("gold_set") == tuggle and document.get("validated") is True]
+
+    def getPendingAnnotation(self, iteration_id: Any) -> ISample:
+        samples = self.collection("Sample")
+        for annotation in list(self.collection("Annotation").values()):
+            if annotation.get("iteration") != iteration_id or annotation.get("is_valid") is not None \
+                    or annotation.get("annotator") is not None:
+                continue
+            sample = samples.get(annotation.get("sample_id"))
+            if sample is not None and sample.get("validated") is False:
+                document = copy.deepcopy(sample)
+                document["labels"] = copy.deepcopy(annotation)
+                return self.sample_class.deserialize(document)
+        return None
+
+    def countPendingAnnotations(self, iteration_id: Any) -> int:
+        return sum(1 for annotation in list(self.collection("Annotation").values())
+                   if annotation.get("iteration") == iteration_id and annotation.get("is_valid") is None
+                   and annotation.get("annotator") is None)
+
+    def saveAnnotation(self, annotation: IAnnotation):
+        return self.insert("Annotation", annotation.serialize())
+
+    def saveAnnotations(self, annotations: List[IAnnotation]):
+        with self._store.lock:
+            return [self.insert("Annotation", annotation.serialize()) for annotation in annotations]
+
+    def saveAnnotator(self, annotator: Annotator):
+        document = copy.deepcopy(annotator.serialize())
+        document["_id"] = document.get("_id") or uuid.uuid4()
+        self._store.annotators[annotator.email] = document
+        return document["_id"]
+
+    def login(self, email: str) -> Annotator:
+        document = self._store.annotators.get(email)
+        return Annotator.deserialize(copy.deepcopy(document)) if document else None
+
+    def saveModel(self, model: IModel) -> Any:
+        file_id = uuid.uuid4()
+        self._store.files[file_id] = model.save().getvalue()
+        return file_id
+
+    def loadModel(self, model_class: Type[IModel], model_id: Any, model_params: dict = None) -> IModel:
+        model = model_class(**(model_params or {}))
+        model.id = model_id
+        model.load(io.BytesIO(self._store.files[model_id]).read())
+        return model
+
+    def saveCheckpoint(self, checkpoint: Checkpoint, state: bytes) -> Any:
+        checkpoint.state_id = uuid.uuid4()
+        self._store.files[checkpoint.state_id] = state
+        checkpoint_id = self.insert("Checkpoint", checkpoint.serialize())
+        self.deleteCheckpoints(checkpoint.iteration_id, exclude=checkpoint_id)
+        return checkpoint_id
+
+    def getCheckpoint(self, iteration_id: Any) -> Checkpoint:
+        checkpoints = [document for document in self.collection("Checkpoint").values()
+                       if document["iteration_id"] == iteration_id]
+        if not checkpoints:
+            return None
+        return Checkpoint.deserialize(copy.deepcopy(max(checkpoints, key=lambda document: document["batch"])))
+
+    def loadCheckpointState(self, checkpoint: Checkpoint) -> bytes:
+        return self._store.files[checkpoint.state_id]
+
+    def deleteCheckpoints(self, iteration_id: Any, exclude: Any = None):
+        with self._store.lock:
+            checkpoints = self.collection("Checkpoint")
+            for id, document in list(checkpoints.items()):
+                if document["iteration_id"] == iteration_id and id != exclude:
+                    self._store.files.pop(document.get("state_id"), None)
+                    del checkpoints[id]
+
+    def getBucketClusters(self, keys: List[str]) -> Dict[str, List[Any]]:
+        buckets = self.collection("LSHBucket")
+        return {key: list(buckets[key]["clusters"]) for key in keys if key in buckets}
+
+    def getClusterSignatures(self, cluster_ids: List[Any]) -> Dict[Any, bytes]:
+        clusters = self.collection("Cluster")
+        return {id: bytes(clusters[id]["signature"]) for id in cluster_ids if id in clusters}
+
+    def saveClusters(self, signatures: Dict[Any, bytes], buckets: Dict[str, List[Any]]):
+        with self._store.lock:
+            for cluster_id, signature in signatures.items():
+                self.insert("Cluster", {"_id": cluster_id, "signature": signature})
+            stored = self.collection("LSHBucket")
+            for key, clusters in buckets.items():
+                bucket = stored.setdefault(key, {"_id": key, "key": key, "experiment": self.experiment_id, "clusters": []})
+                bucket["clusters"].extend(cluster for cluster in clusters if cluster not in bucket["clusters"])
+
+    def getClusterSamples(self, cluster_id: Any, validated: bool = None) -> List[ISample]:
+        return [self.sample_class.deserialize(copy.deepcopy(document))
+                for document in list(self.collection("Sample").values())
+                if document.get("cluster_id") == cluster_id and (validated is None or document.get("validated") == validated)]
+
+    def indexLabels(self, samples: List[ISample]):
+        with self._store.lock:
+            index = self.collection("LabelIndex")
+            deltas = {}
+            for sample in samples:
+                counts = sample.labels.label_counts() if sample.labels is not None else {}
+                for label in index.get(sample._id, {}).get("labels", []):
+                    deltas[label] = deltas.get(label, 0) - 1
+                for label in counts:
+                    deltas[label] = deltas.get(label, 0) + 1
+                index[sample._id] = {"_id": sample._id, "experiment": self.experiment_id,
+                                     "labels": list(counts), "counts": list(counts.values())}
+                self.update("Sample", sample._id, {"indexed": True})
+            self.updateLabelTotals(deltas)
+
+    def unindexLabels(self, sample_ids: List[Any]):
+        with self._store.lock:
+            index = self.collection("LabelIndex")
+            deltas = {}
+            for sample_id in sample_ids:
+                for label in index.pop(sample_id, {}).get("labels", []):
+                    deltas[label] = deltas.get(label, 0) - 1
+                self.update("Sample", sample_id, {"indexed": False})
+            self.updateLabelTotals(deltas)
+
+    def updateLabelTotals(self, deltas: Dict[str, int]):
+        totals = self.collection("LabelTotal")
+        for label, delta in deltas.items():
+            total = totals.setdefault(label, {"_id": label, "label": label, "experiment": self.experiment_id, "pending": 0})
+            total["pending"] += delta
+
+    def getLabelTotals(self) -> Dict[str, int]:
+        return {label: total["pending"] for label, total in self.collection("LabelTotal").items() if total["pending"] > 0}
+
+    def getLabelIndexEntries(self, label: str, limit: int, exclude: List[Any] = None) -> List[Tuple[Any, Dict[str, int]]]:
+        exclude = set(exclude or [])
+        entries = []
+        for id, entry in list(self.collection("LabelIndex").items()):
+            if len(entries) >= limit:
+                break
+            if label in entry["labels"] and id not in exclude:
+                entries.append((id, dict(zip(entry["labels"], entry["counts"]))))
+        return entries
+
+    def sampleUnindexedSampleIds(self, size: int, seed: int = None) -> List[Any]:
+        ids = [id for id, document in list(self.collection("Sample").items())
+               if document.get("validated") is False and not document.get("indexed")]
+        return Random(seed).sample(ids, min(size, len(ids)))
+
+    def saveIteration(self, iteration: Iteration) -> Any:
+        return self.insert("Iteration", iteration.serialize())
+
+    def updateIteration(self, iteration: Iteration) -> Any:
+        document = iteration.serialize()
+        document.pop("status", None)  # Status changes go through transitionIteration
+        document.pop("metrics", None)  # Written by saveIterationMetrics, possibly concurrently
+        self.update("Iteration", iteration._id, document)
+
+    def transitionIteration(self, iteration: Iteration, status: str) -> bool:
+        with self._store.lock:
+            document = self.collection("Iteration").get(iteration._id)
+            if document is None or document.get("status") != status:
+                return False
+            document = iteration.serialize()
+            document.pop("metrics", None)
+            return self.update("Iteration", iteration._id, document)
+
+    def saveIterationMetrics(self, iteration_id: Any, metrics: Dict[str, Any]):
+        self.update("Iteration", iteration_id, {"metrics": metrics})
+
+    def getIterationMetrics(self) -> List[Dict[str, Any]]:
+        iterations = sorted((document for document in list(self.collection("Iteration").values()) if document.get("metrics")),
+                            key=lambda document: document["position"])
+        return [{"iteration": document["_id"], "position": document["position"], "end_time": document.get("end_time"),
+                 "metrics": copy.deepcopy(document["metrics"])} for document in iterations]
+
+    def getProbe(self) -> Dict[str, Any]:
+        probes = list(self.collection("Probe").values())
+        return copy.deepcopy(probes[0]) if probes else None
+
+    def createProbe(self, sample_ids: List[Any]) -> Dict[str, Any]:
+        with self._store.lock:
+            if not self.collection("Probe"):
+                self.insert("Probe", {"sample_ids": list(sample_ids), "labels": [], "previous_model_id": None,
+                                      "predictions": None, "agreements": []})
+            return self.getProbe()
+
+    def updateProbe(self, probe: Dict[str, Any], previous_model_id: Any) -> bool:
+        with self._store.lock:
+            document = self.getProbe()
+            if document is None or document["previous_model_id"] != previous_model_id:
+                return False
+            values = {key: probe[key] for key in ("labels", "previous_model_id", "predictions", "agreements")}
+            return self.update("Probe", document["_id"], values)
+
+    def getOpenIterations(self, since: datetime) -> List[Iteration]:
+        iterations = [Iteration.deserialize(copy.deepcopy(document)) for document in list(self.collection("Iteration").values())
+                      if document.get("status") != IterationState.COMPLETE and document.get("start_time") >= since]
+        return sorted(iterations, key=lambda iteration: iteration.position)
+
+    def getIteration(self, id: Any) -> Iteration:
+        return Iteration.deserialize(self.find("Iteration", id))
+
+    def getIterationAnnotations(self, iteration_id: Any) -> List[IAnnotation]:
+        return [IAnnotation.deserialize(copy.deepcopy(document)) for document in list(self.collection("Annotation").values())
+                if document.get("iteration") == iteration_id]
+
+    def enqueueJob(self, job: QueuedJob) -> Any:
+        with self._store.lock:
+            job.experiment = self.experiment_id
+            if job.key is not None:
+                for document in self._store.jobs.values():
+                    if document["experiment"] == self.experiment_id and document["key"] == job.key \
+                            and document["state"] in (JobState.PENDING, JobState.RUNNING):
+                        return document["_id"]
+            document = copy.deepcopy(job.serialize())
+            document["_id"] = document.get("_id") or uuid.uuid4()
+            self._store.jobs[document["_id"]] = document
+            return document["_id"]
+
+    def leaseJob(self, worker: str, lease_seconds: float, types: List[str] = None) -> QueuedJob:
+        with self._store.lock:
+            now = datetime.now()
+            available = [document for document in self._store.jobs.values()
+                         if (not types or document["type"] in types) and (
+                             (document["state"] == JobState.PENDING and document["available_time"] <= now)
+                             or (document["state"] == JobState.RUNNING and document["lease_expires"] < now))]
+            for document in sorted(available, key=lambda document: document["available_time"]):
+                document.update({"state": JobState.RUNNING, "worker": worker, "heartbeat_time": now,
+                                 "lease_expires": now + timedelta(seconds=lease_seconds)})
+                document["attempts"] += 1
+                job = QueuedJob.deserialize(copy.deepcopy(document))
+                if job.attempts <= job.max_attempts:
+                    return job
+                self.failJob(job, job.error or "The lease expired on every attempt", 0)
+            return None
+
+    def _running_job(self, job: QueuedJob) -> dict:
+        document = self._store.jobs.get(job._id)
+        if document is None or document["worker"] != job.worker or document["state"] != JobState.RUNNING:
+            return None
+        return document
+
+    def heartbeatJob(self, job: QueuedJob, lease_seconds: float) -> bool:
+        with self._store.lock:
+            document = self._running_job(job)
+            if document is None:
+                return False
+            now = datetime.now()
+            document.update({"lease_expires": now + timedelta(seconds=lease_seconds), "heartbeat_time": now})
+            return True
+
+    def completeJob(self, job: QueuedJob):
+        with self._store.lock:
+            document = self._running_job(job)
+            if document is not None:
+                document.update({"state": JobState.DONE, "end_time": datetime.now()})
+
+    def failJob(self, job: QueuedJob, error: str, retry_delay: float):
+        with self._store.lock:
+            document = self._running_job(job)
+            if document is None:
+                return
+            now = datetime.now()
+            if job.attempts < job.max_attempts:
+                # Exponential backoff between attempts
+                delay = timedelta(seconds=retry_delay * 2 ** max(job.attempts - 1, 0))
+                document.update({"state": JobState.PENDING, "error": error, "worker": None,
+                                 "lease_expires": None, "available_time": now + delay})
+            else:
+                document.update({"state": JobState.FAILED, "error": error, "end_time": now})
+
+    def cancelJob(self, job_id: Any) -> bool:
+        with self._store.lock:
+            document = self._store.jobs.get(job_id)
+            if document is None or document["experiment"] != self.experiment_id \
+                    or document["state"] not in (JobState.PENDING, JobState.RUNNING):
+                return False
+            document.update({"state": JobState.CANCELLED, "end_time": datetime.now()})
+            return True
+
+    def getJobs(self, states: List[str] = None, limit: int = 100) -> List[QueuedJob]:
+        jobs = [document for document in list(self._store.jobs.values())
+                if document["experiment"] == self.experiment_id and (not states or document["state"] in states)]
+        jobs.sort(key=lambda document: document["create_time"], reverse=True)
+        return [QueuedJob.deserialize(copy.deepcopy(document)) for document in jobs[:limit]]
+
+    def saveExperiment(self, experiment: Experiment):
+        self.insert("Experiment", experiment.serialize())
+
+    def getExperiment(self) -> Experiment:
+        experiments = list(self.collection("Experiment").values())
+        if not experiments:
+            return None
+        return Experiment.deserialize(copy.deepcopy(max(experiments, key=lambda document: document["create_time"])))
+
+    def getExperimentIds(self) -> List[str]:
+        with self._store.lock:
+            ids = {id for id, collections in self._store.experiments.items() if collections.get("Experiment")}
+        return sorted(ids | {self.experiment_id})
+
+    @log_method
+    def setup_database(self, annotator: Annotator):
+        if self.login(annotator.email) is None:
+            self.saveAnnotator(annotator)
+            print(f"Master user '{annotator.email}' created successfully.")
@@ -1,28 +1,72 @@
-from typing import Any, List, Type
+import copy
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple, Type
 import io
 from uuid import UUID
 import uuid
 import gridfs
 import pymongo
 from pymongo import MongoClient
+from pymongo import ReplaceOne
+from pymongo import ReturnDocument
+from pymongo import UpdateOne
 import pymongo.collection
 import pymongo.errors
+from bson.raw_bson import RawBSONDocument
 from i_entities import IAnnotation
 from i_entities import Annotator
 from i_entities import IDAO
 from i_entities import Iteration
+from i_entities import IterationState
 from i_entities import ISample
 from i_entities import IModel
 from i_entities import log_method
 from i_entities import Experiment
+from i_entities import Checkpoint
+from i_entities import JobState
+from i_entities import QueuedJob
+from .lazy_sample import lazy_sample
+
+
+# The collections whose documents belong to an experiment
+SCOPED_COLLECTIONS = ("Sample", "Annotation", "Iteration", "Checkpoint", "Experiment", "Cluster",
+                      "LSHBucket", "LabelIndex", "LabelTotal", "Job", "Probe")
 
 
 class MongoDAO(IDAO):
-    """A MongoDB database implementation of the DAO interface."""
+    """
+    A MongoDB database implementation of the DAO interface.
+
+    The DAO is scoped to an experiment: the documents it saves are tagged with the experiment id, and its
+    queries only match the documents of the experiment, through indexes prefixed with the experiment id.
+    `for_experiment` returns a DAO of another experiment sharing the same connection.
 
-    def __init__(self, connection_string: str, database_name="stas") -> None:
+    With `raw_samples`, the lists of samples are fetched as raw BSON documents and wrapped in lazy samples
+    decoding each field on first access (see `lazy_sample_class`), so the callers reading only the ids or
+    the texts of many samples do not pay for decoding their annotations.
+    """
+
+    def __init__(self, connection_string: str, database_name="stas", experiment_id: str = Experiment.DEFAULT_ID,
+                 raw_samples: bool = False) -> None:
+        self.experiment_id = experiment_id
+        self.raw_samples = raw_samples
         super().__init__(connection_string, database_name)
 
+    def for_experiment(self, experiment_id: str) -> 'MongoDAO':
+        """Returns a DAO of the given experiment, sharing the connection of this DAO."""
+        dao = copy.copy(self)
+        dao.experiment_id = experiment_id
+        return dao
+
+    def scope(self, query: dict = None) -> dict:
+        """Restricts a query to the documents of the experiment."""
+        return {"experiment": self.experiment_id, **(query or {})}
+
+    def add_experiment_id(self, document: dict) -> dict:
+        """Adds an id to a new document of the experiment and tags it with the experiment id."""
+        document["experiment"] = self.experiment_id
+        return self.add_document_id(document)
+
     @log_method
     def connect(self):
         self.mongo_client = MongoClient(
@@ -42,6 +86,19 @@ class MongoDAO(IDAO):
     ) -> pymongo.collection.Collection:
         return self.database.get_collection(collection_name)
 
+    def get_sample_collection(self) -> pymongo.collection.Collection:
+        """Returns the collection of the samples, decoding the documents as raw BSON with `raw_samples`."""
+        collection = self.get_collection("Sample")
+        if self.raw_samples:
+            return collection.with_options(collection.codec_options.with_options(document_class=RawBSONDocument))
+        return collection
+
+    def decode_sample(self, document) -> ISample:
+        """Returns the sample of a document fetched from `get_sample_collection`."""
+        if self.raw_samples:
+            return lazy_sample(self.sample_class, document)
+        return self.sample_class.deserialize(document)
+
     @log_method
     def getfs(self) -> gridfs.GridFS:
         return gridfs.GridFS(self.database)
@@ -51,7 +108,7 @@ class MongoDAO(IDAO):
         try:
             collection = self.get_collection("Sample")
             return collection.insert_one(
-                self.add_document_id(sample.serialize())
+                self.add_experiment_id(sample.serialize())
             ).inserted_id
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
@@ -64,7 +121,7 @@ class MongoDAO(IDAO):
         try:
             collection = self.get_collection("Sample")
             return collection.update_one(
-                {"_id": sample._id}, {"$set": sample.serialize()}
+                self.scope({"_id": sample._id}), {"$set": sample.serialize()}
             )
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
@@ -76,9 +133,10 @@ class MongoDAO(IDAO):
     def saveSamples(self, samples: List[ISample], count=0):
         try:
             collection = self.get_collection("Sample")
-            return collection.insert_many(
-                [self.add_document_id(sample.serialize()) for sample in samples]
-            )
+            documents = [self.add_experiment_id(sample.serialize()) for sample in samples]
+            for sample, document in zip(samples, documents):
+                sample._id = document["_id"]
+            return collection.insert_many(documents)
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
                 raise
@@ -91,7 +149,7 @@ class MongoDAO(IDAO):
             collection = self.get_collection("Annotation")
             print({"_id": sample.labels._id}, {"$set": sample.labels.serialize()})
             collection.update_one(
-                {"_id": sample.labels._id}, {"$set": sample.labels.serialize()}
+                self.scope({"_id": sample.labels._id}), {"$set": sample.labels.serialize()}
             )
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
@@ -103,7 +161,7 @@ class MongoDAO(IDAO):
     def getSample(self, id: UUID, count=0) -> ISample:
         try:
             collection = self.get_collection("Sample")
-            return self.sample_class.deserialize(collection.find_one({"_id": id}))
+            return self.sample_class.deserialize(collection.find_one(self.scope({"_id": id})))
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
                 raise
@@ -115,7 +173,7 @@ class MongoDAO(IDAO):
         try:
             collection = self.get_collection("Sample")
             pipeline = [
-                {"$match": {"validated": False}},
+                {"$match": self.scope({"validated": False})},
                 {
                     "$lookup": {
                         "from": "Annotation",
@@ -124,7 +182,9 @@ class MongoDAO(IDAO):
                         "as": "labels",
                         "pipeline": [
                             {
+                                # With the experiment, the join uses the [experiment, sample_id] index
                                 "$match": {
+                                    "experiment": self.experiment_id,
                                     "iteration": iteration_id,
                                     "is_valid": None,
                                     "annotator": None,
@@ -147,12 +207,23 @@ class MongoDAO(IDAO):
             self.connect()
             return self.getPendingAnnotation(iteration_id, count + 1)
 
+    @log_method
+    def countPendingAnnotations(self, iteration_id: Any, count=0) -> int:
+        try:
+            collection = self.get_collection("Annotation")
+            return collection.count_documents(self.scope({"iteration": iteration_id, "is_valid": None, "annotator": None}))
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.countPendingAnnotations(iteration_id, count + 1)
+
     @log_method
     def saveAnnotation(self, annotation: IAnnotation, count=0):
         try:
             collection = self.get_collection("Annotation")
             return collection.insert_one(
-                self.add_document_id(annotation.serialize())
+                self.add_experiment_id(annotation.serialize())
             ).inserted_id
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
@@ -166,7 +237,7 @@ class MongoDAO(IDAO):
             collection = self.get_collection("Annotation")
             return collection.insert_many(
                 [
-                    self.add_document_id(annotation.serialize())
+                    self.add_experiment_id(annotation.serialize())
                     for annotation in annotations
                 ]
             ).inserted_ids
@@ -194,7 +265,7 @@ class MongoDAO(IDAO):
         try:
             collection = self.get_collection("Iteration")
             return collection.insert_one(
-                self.add_document_id(iteration.serialize())
+                self.add_experiment_id(iteration.serialize())
             ).inserted_id
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
@@ -206,8 +277,11 @@ class MongoDAO(IDAO):
     def updateIteration(self, iteration: Iteration, count=0) -> Any:
         try:
             collection = self.get_collection("Iteration")
+            document = iteration.serialize()
+            document.pop("status", None)  # Status changes go through transitionIteration
+            document.pop("metrics", None)  # Written by saveIterationMetrics, possibly concurrently
             collection.update_one(
-                {"_id": iteration._id}, {"$set": iteration.serialize()}
+                self.scope({"_id": iteration._id}), {"$set": document}
             )
         except pymongo.errors.ConnectionFailure:
             if count == 3:
@@ -215,12 +289,128 @@ class MongoDAO(IDAO):
             self.connect()
             return self.updateIteration(iteration, count + 1)
 
+    @log_method
+    def transitionIteration(self, iteration: Iteration, status: str, count=0) -> bool:
+        """
+        Saves the iteration with its new status in a single compare-and-set update, which only matches
+        the iteration while its stored status is still `status`.
+        """
+        try:
+            collection = self.get_collection("Iteration")
+            document = iteration.serialize()
+            document.pop("metrics", None)  # Written by saveIterationMetrics, possibly concurrently
+            result = collection.update_one(
+                self.scope({"_id": iteration._id, "status": status}), {"$set": document}
+            )
+            return result.matched_count == 1
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.transitionIteration(iteration, status, count + 1)
+
+    @log_method
+    def saveIterationMetrics(self, iteration_id: Any, metrics: Dict[str, Any], count=0):
+        try:
+            collection = self.get_collection("Iteration")
+            collection.update_one(self.scope({"_id": iteration_id}), {"$set": {"metrics": metrics}})
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.saveIterationMetrics(iteration_id, metrics, count + 1)
+
+    @log_method
+    def getIterationMetrics(self, count=0) -> List[Dict[str, Any]]:
+        try:
+            collection = self.get_collection("Iteration")
+            result = collection.find(
+                self.scope({"metrics": {"$exists": True, "$ne": {}}}),
+                {"position": 1, "end_time": 1, "metrics": 1},
+            ).sort("position", pymongo.ASCENDING)
+            return [
+                {"iteration": iteration["_id"], "position": iteration["position"],
+                 "end_time": iteration.get("end_time"), "metrics": iteration["metrics"]}
+                for iteration in result.to_list()
+            ]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getIterationMetrics(count + 1)
+
+    @log_method
+    def getProbe(self, count=0) -> Dict[str, Any]:
+        try:
+            return self.get_collection("Probe").find_one(self.scope())
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getProbe(count + 1)
+
+    @log_method
+    def createProbe(self, sample_ids: List[Any], count=0) -> Dict[str, Any]:
+        """
+        Inserts the probe set with an upsert that leaves an existing probe set unchanged, so that the
+        processes drawing a probe set at the same time all keep the first one saved.
+        """
+        try:
+            collection = self.get_collection("Probe")
+            document = {"sample_ids": list(sample_ids), "labels": [], "previous_model_id": None,
+                        "predictions": None, "agreements": []}
+            try:
+                return collection.find_one_and_update(
+                    self.scope(),
+                    {"$setOnInsert": document},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except pymongo.errors.DuplicateKeyError:  # Created concurrently by another process
+                return collection.find_one(self.scope())
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.createProbe(sample_ids, count + 1)
+
+    @log_method
+    def updateProbe(self, probe: Dict[str, Any], previous_model_id: Any, count=0) -> bool:
+        """
+        Saves the probe set in a single compare-and-set update, which only matches the probe set while
+        its saved `previous_model_id` is still `previous_model_id`.
+        """
+        try:
+            collection = self.get_collection("Probe")
+            values = {key: probe[key] for key in ("labels", "previous_model_id", "predictions", "agreements")}
+            result = collection.update_one(self.scope({"previous_model_id": previous_model_id}), {"$set": values})
+            return result.matched_count == 1
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.updateProbe(probe, previous_model_id, count + 1)
+
+    @log_method
+    def getOpenIterations(self, since: datetime, count=0) -> List[Iteration]:
+        try:
+            collection = self.get_collection("Iteration")
+            result = collection.find(
+                self.scope({"status": {"$ne": IterationState.COMPLETE}, "start_time": {"$gte": since}})
+            ).sort("position", pymongo.ASCENDING)
+            return [Iteration.deserialize(iteration) for iteration in result.to_list()]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getOpenIterations(since, count + 1)
+
     @log_method
     def getIterationAnnotations(self, iteration_id: Any, count=0) -> List[IAnnotation]:
         """Returns the annotations made in the iteration."""
         try:
             collection = self.get_collection("Annotation")
-            result = collection.find({"iteration": iteration_id})
+            result = collection.find(self.scope({"iteration": iteration_id}))
             result = result.to_list()
             return [IAnnotation.deserialize(annotation) for annotation in result]
         except pymongo.errors.ConnectionFailure:
@@ -232,6 +422,24 @@ class MongoDAO(IDAO):
     @log_method
     def setup_database(self, annotator: Annotator, count=0):
         try:
+            self.migrate_experiments()
+            indexes = {
+                "Sample": [["validated"], ["gold_set", "validated"], ["cluster_id"], ["validated", "indexed"]],
+                "Annotation": [["iteration"], ["sample_id"]],
+                "Iteration": [["status", "start_time"]],
+                "Checkpoint": [["iteration_id", "batch"]],
+                "Experiment": [["create_time"]],
+                "LabelIndex": [["labels"]],
+                "Job": [["create_time"]],
+            }
+            for name, keys in indexes.items():
+                for fields in keys:  # Prefixed with the experiment, so a query never reads other experiments
+                    self.get_collection(name).create_index([("experiment", pymongo.ASCENDING)] + [(field, pymongo.ASCENDING) for field in fields])
+            self.get_collection("LSHBucket").create_index([("experiment", pymongo.ASCENDING), ("key", pymongo.ASCENDING)], unique=True)
+            self.get_collection("LabelTotal").create_index([("experiment", pymongo.ASCENDING), ("label", pymongo.ASCENDING)], unique=True)
+            self.get_collection("Probe").create_index("experiment", unique=True)  # One probe set per experiment
+            self.get_collection("Job").create_index("active_key", unique=True, sparse=True)
+            self.get_collection("Job").create_index([("state", pymongo.ASCENDING), ("available_time", pymongo.ASCENDING)])
             users_collection = self.get_collection("Annotator")
             existing_user = users_collection.find_one({"email": annotator.email})
 
@@ -245,6 +453,17 @@ class MongoDAO(IDAO):
             self.connect()
             return self.setup_database(annotator, count + 1)
 
+    def migrate_experiments(self):
+        """Assigns the documents saved before experiments were identified to the default experiment."""
+        legacy = {"experiment": {"$exists": False}}
+        for name in SCOPED_COLLECTIONS:
+            update = {"experiment": Experiment.DEFAULT_ID}
+            if name == "LSHBucket":
+                update["key"] = "$_id"  # Buckets and totals were identified by their key and label
+            elif name == "LabelTotal":
+                update["label"] = "$_id"
+            self.get_collection(name).update_many(legacy, [{"$set": update}])
+
     @log_method
     def login(self, email: str) -> Annotator:
         try:
@@ -258,20 +477,34 @@ class MongoDAO(IDAO):
     def getIteration(self, id: Any, count=0):
         try:
             collection = self.get_collection("Iteration")
-            return Iteration.deserialize(collection.find_one({"_id": id}))
+            return Iteration.deserialize(collection.find_one(self.scope({"_id": id})))
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
                 raise
             self.connect()
-            return self.getPendingSamples(count + 1)
+            return self.getIteration(id, count + 1)
+
+    @log_method
+    def getSamples(self, ids: List[Any], count=0) -> List[ISample]:
+        try:
+            collection = self.get_sample_collection()
+            result = collection.find(self.scope({"_id": {"$in": list(ids)}}))
+            return [
+                self.decode_sample(sample) for sample in result.to_list()
+            ]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getSamples(ids, count + 1)
 
     @log_method
     def getPendingSamples(self, count=0) -> List[ISample]:
         try:
-            collection = self.get_collection("Sample")
-            result = collection.find({"validated": False})
+            collection = self.get_sample_collection()
+            result = collection.find(self.scope({"validated": False}))
             return [
-                self.sample_class.deserialize(sample) for sample in result.to_list()
+                self.decode_sample(sample) for sample in result.to_list()
             ]
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
@@ -279,6 +512,18 @@ class MongoDAO(IDAO):
             self.connect()
             return self.getPendingSamples(count + 1)
 
+    @log_method
+    def iterPendingSampleIds(self, batch_size: int = 1024, count=0) -> Iterator[Any]:
+        try:
+            collection = self.get_collection("Sample")
+            cursor = collection.find(self.scope({"validated": False}), {"_id": 1}).batch_size(batch_size)
+            return (document["_id"] for document in cursor)
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.iterPendingSampleIds(batch_size, count + 1)
+
     @log_method
     def saveModel(self, model: IModel):
         """
@@ -293,21 +538,398 @@ class MongoDAO(IDAO):
         return file_id
 
     @log_method
-    def loadModel(self, model_class: Type[IModel], model_id):
+    def loadModel(self, model_class: Type[IModel], model_id, model_params: dict = None):
         self.connect()
         model_bytes = self.getfs().get(model_id).read()  # Retrieve the model file
-        model = model_class()
-        model.id = model_id  # Instantiate the model class
+        model = model_class(**(model_params or {}))  # Instantiate the model class with its configured parameters
+        model.id = model_id
         model.load(
             model_bytes
         )  # Delegate the loading task to the model's specific method
         return model
 
+    @log_method
+    def saveCheckpoint(self, checkpoint: Checkpoint, state: bytes, count=0):
+        """
+        Saves the model state to GridFS and records the checkpoint, then removes the
+        previous checkpoints of the iteration.
+        """
+        try:
+            collection = self.get_collection("Checkpoint")
+            checkpoint.state_id = self.getfs().put(state)
+            checkpoint_id = collection.insert_one(
+                self.add_experiment_id(checkpoint.serialize())
+            ).inserted_id
+            self.deleteCheckpoints(checkpoint.iteration_id, exclude=checkpoint_id)
+            return checkpoint_id
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.saveCheckpoint(checkpoint, state, count + 1)
+
+    @log_method
+    def getCheckpoint(self, iteration_id: Any, count=0) -> Checkpoint:
+        try:
+            collection = self.get_collection("Checkpoint")
+            result = collection.find_one(
+                self.scope({"iteration_id": iteration_id}), sort=[("batch", pymongo.DESCENDING)]
+            )
+            return Checkpoint.deserialize(result)
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getCheckpoint(iteration_id, count + 1)
+
+    @log_method
+    def loadCheckpointState(self, checkpoint: Checkpoint) -> bytes:
+        return self.getfs().get(checkpoint.state_id).read()
+
+    @log_method
+    def deleteCheckpoints(self, iteration_id: Any, exclude: Any = None, count=0):
+        try:
+            collection = self.get_collection("Checkpoint")
+            query = self.scope({"iteration_id": iteration_id})
+            if exclude is not None:
+                query["_id"] = {"$ne": exclude}
+            fs = self.getfs()
+            for checkpoint in collection.find(query).to_list():
+                if checkpoint.get("state_id") is not None:
+                    fs.delete(checkpoint["state_id"])
+                collection.delete_one({"_id": checkpoint["_id"]})
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.deleteCheckpoints(iteration_id, exclude, count + 1)
+
+    @log_method
+    def getBucketClusters(self, keys: List[str], count=0) -> Dict[str, List[Any]]:
+        try:
+            collection = self.get_collection("LSHBucket")
+            result = collection.find(self.scope({"key": {"$in": list(keys)}}))
+            return {bucket["key"]: bucket["clusters"] for bucket in result.to_list()}
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getBucketClusters(keys, count + 1)
+
+    @log_method
+    def getClusterSignatures(self, cluster_ids: List[Any], count=0) -> Dict[Any, bytes]:
+        try:
+            collection = self.get_collection("Cluster")
+            result = collection.find(self.scope({"_id": {"$in": list(cluster_ids)}}))
+            return {cluster["_id"]: bytes(cluster["signature"]) for cluster in result.to_list()}
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getClusterSignatures(cluster_ids, count + 1)
+
+    @log_method
+    def saveClusters(self, signatures: Dict[Any, bytes], buckets: Dict[str, List[Any]], count=0):
+        try:
+            self.get_collection("Cluster").insert_many(
+                [self.add_experiment_id({"_id": cluster_id, "signature": signature})
+                 for cluster_id, signature in signatures.items()]
+            )
+            if buckets:
+                self.get_collection("LSHBucket").bulk_write(
+                    [
+                        UpdateOne(self.scope({"key": key}), {"$addToSet": {"clusters": {"$each": clusters}}}, upsert=True)
+                        for key, clusters in buckets.items()
+                    ],
+                    ordered=False,
+                )
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.saveClusters(signatures, buckets, count + 1)
+
+    @log_method
+    def getClusterSamples(self, cluster_id: Any, validated: bool = None, count=0) -> List[ISample]:
+        try:
+            collection = self.get_sample_collection()
+            query = self.scope({"cluster_id": cluster_id})
+            if validated is not None:
+                query["validated"] = validated
+            return [
+                self.decode_sample(sample) for sample in collection.find(query).to_list()
+            ]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getClusterSamples(cluster_id, validated, count + 1)
+
+    @log_method
+    def indexLabels(self, samples: List[ISample], count=0):
+        """
+        Replaces the label index entries of the samples and updates the label totals by the difference
+        with the previous entries, so the totals never have to be recomputed. The samples are flagged as
+        indexed, so the unindexed samples are found with the [experiment, validated, indexed] index.
+        """
+        try:
+            collection = self.get_collection("LabelIndex")
+            ids = [sample._id for sample in samples]
+            previous = {entry["_id"]: entry["labels"] for entry in collection.find(self.scope({"_id": {"$in": ids}})).to_list()}
+            deltas = {}
+            operations = []
+            for sample in samples:
+                counts = sample.labels.label_counts() if sample.labels is not None else {}
+                for label in previous.get(sample._id, []):
+                    deltas[label] = deltas.get(label, 0) - 1
+                for label in counts:
+                    deltas[label] = deltas.get(label, 0) + 1
+                operations.append(ReplaceOne(
+                    self.scope({"_id": sample._id}),
+                    self.scope({"_id": sample._id, "labels": list(counts), "counts": list(counts.values())}),
+                    upsert=True,
+                ))
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+                self.get_collection("Sample").update_many(self.scope({"_id": {"$in": ids}}), {"$set": {"indexed": True}})
+            self.updateLabelTotals(deltas)
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.indexLabels(samples, count + 1)
+
+    @log_method
+    def unindexLabels(self, sample_ids: List[Any], count=0):
+        try:
+            collection = self.get_collection("LabelIndex")
+            deltas = {}
+            for entry in collection.find(self.scope({"_id": {"$in": list(sample_ids)}})).to_list():
+                for label in entry["labels"]:
+                    deltas[label] = deltas.get(label, 0) - 1
+            collection.delete_many(self.scope({"_id": {"$in": list(sample_ids)}}))
+            self.get_collection("Sample").update_many(self.scope({"_id": {"$in": list(sample_ids)}}), {"$set": {"indexed": False}})
+            self.updateLabelTotals(deltas)
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.unindexLabels(sample_ids, count + 1)
+
+    def updateLabelTotals(self, deltas: Dict[str, int]):
+        operations = [
+            UpdateOne(self.scope({"label": label}), {"$inc": {"pending": delta}}, upsert=True)
+            for label, delta in deltas.items() if delta
+        ]
+        if operations:
+            self.get_collection("LabelTotal").bulk_write(operations, ordered=False)
+
+    @log_method
+    def getLabelTotals(self, count=0) -> Dict[str, int]:
+        try:
+            collection = self.get_collection("LabelTotal")
+            return {total["label"]: total["pending"] for total in collection.find(self.scope({"pending": {"$gt": 0}})).to_list()}
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getLabelTotals(count + 1)
+
+    @log_method
+    def getLabelIndexEntries(self, label: str, limit: int, exclude: List[Any] = None, count=0) -> List[Tuple[Any, Dict[str, int]]]:
+        try:
+            collection = self.get_collection("LabelIndex")
+            query = self.scope({"labels": label})
+            if exclude:
+                query["_id"] = {"$nin": list(exclude)}
+            result = collection.find(query).limit(limit)
+            return [(entry["_id"], dict(zip(entry["labels"], entry["counts"]))) for entry in result.to_list()]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getLabelIndexEntries(label, limit, exclude, count + 1)
+
+    @log_method
+    def sampleUnindexedSampleIds(self, size: int, seed: int = None, count=0) -> List[Any]:
+        """
+        Draws the ids with `$sample` among the pending samples whose `indexed` flag is not set, matched with
+        the [experiment, validated, indexed] index. `$sample` cannot be seeded, so the seed is not used.
+        """
+        try:
+            collection = self.get_collection("Sample")
+            pipeline = [
+                {"$match": self.scope({"validated": False, "indexed": {"$in": [False, None]}})},
+                {"$project": {"_id": 1}},
+                {"$sample": {"size": size}},
+            ]
+            return [document["_id"] for document in collection.aggregate(pipeline)]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.sampleUnindexedSampleIds(size, seed, count + 1)
+
+    @log_method
+    def enqueueJob(self, job: QueuedJob, count=0) -> Any:
+        """
+        Saves a pending job of the experiment. A job with a key is only inserted when no active job of the
+        experiment has the same key: `active_key` holds the experiment id and the key while the job is
+        pending or running, under a unique index.
+        """
+        try:
+            collection = self.get_collection("Job")
+            job.experiment = self.experiment_id
+            document = self.add_experiment_id(job.serialize())
+            if job.key is None:
+                return collection.insert_one(document).inserted_id
+            active_key = f"{self.experiment_id}:{job.key}"
+            try:
+                result = collection.find_one_and_update(
+                    {"active_key": active_key},
+                    {"$setOnInsert": document},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except pymongo.errors.DuplicateKeyError:  # Enqueued concurrently by another process
+                result = collection.find_one({"active_key": active_key})
+            return result["_id"]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.enqueueJob(job, count + 1)
+
+    @log_method
+    def leaseJob(self, worker: str, lease_seconds: float, types: List[str] = None, count=0) -> QueuedJob:
+        try:
+            collection = self.get_collection("Job")
+            while True:
+                now = datetime.now()
+                query = {
+                    "$or": [
+                        {"state": JobState.PENDING, "available_time": {"$lte": now}},
+                        {"state": JobState.RUNNING, "lease_expires": {"$lt": now}},
+                    ]
+                }
+                if types:
+                    query["type"] = {"$in": list(types)}
+                document = collection.find_one_and_update(
+                    query,
+                    {
+                        "$set": {
+                            "state": JobState.RUNNING,
+                            "worker": worker,
+                            "lease_expires": now + timedelta(seconds=lease_seconds),
+                            "heartbeat_time": now,
+                        },
+                        "$inc": {"attempts": 1},
+                    },
+                    sort=[("available_time", pymongo.ASCENDING)],
+                    return_document=ReturnDocument.AFTER,
+                )
+                job = QueuedJob.deserialize(document)
+                if job is None or job.attempts <= job.max_attempts:
+                    return job
+                # The workers of every attempt lost the lease, e.g. because the job crashes them
+                self.failJob(job, job.error or "The lease expired on every attempt", 0)
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.leaseJob(worker, lease_seconds, types, count + 1)
+
+    @log_method
+    def heartbeatJob(self, job: QueuedJob, lease_seconds: float, count=0) -> bool:
+        try:
+            collection = self.get_collection("Job")
+            now = datetime.now()
+            result = collection.update_one(
+                {"_id": job._id, "worker": job.worker, "state": JobState.RUNNING},
+                {"$set": {"lease_expires": now + timedelta(seconds=lease_seconds), "heartbeat_time": now}},
+            )
+            return result.matched_count == 1
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.heartbeatJob(job, lease_seconds, count + 1)
+
+    @log_method
+    def completeJob(self, job: QueuedJob, count=0):
+        try:
+            collection = self.get_collection("Job")
+            collection.update_one(
+                {"_id": job._id, "worker": job.worker, "state": JobState.RUNNING},
+                {"$set": {"state": JobState.DONE, "end_time": datetime.now()}, "$unset": {"active_key": ""}},
+            )
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.completeJob(job, count + 1)
+
+    @log_method
+    def failJob(self, job: QueuedJob, error: str, retry_delay: float, count=0):
+        try:
+            collection = self.get_collection("Job")
+            now = datetime.now()
+            if job.attempts < job.max_attempts:
+                # Exponential backoff between attempts
+                update = {
+                    "$set": {
+                        "state": JobState.PENDING,
+                        "error": error,
+                        "worker": None,
+                        "lease_expires": None,
+                        "available_time": now + timedelta(seconds=retry_delay * 2 ** max(job.attempts - 1, 0)),
+                    }
+                }
+            else:
+                update = {
+                    "$set": {"state": JobState.FAILED, "error": error, "end_time": now},
+                    "$unset": {"active_key": ""},
+                }
+            collection.update_one({"_id": job._id, "worker": job.worker, "state": JobState.RUNNING}, update)
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.failJob(job, error, retry_delay, count + 1)
+
+    @log_method
+    def cancelJob(self, job_id: Any, count=0) -> bool:
+        try:
+            collection = self.get_collection("Job")
+            result = collection.update_one(
+                self.scope({"_id": job_id, "state": {"$in": [JobState.PENDING, JobState.RUNNING]}}),
+                {"$set": {"state": JobState.CANCELLED, "end_time": datetime.now()}, "$unset": {"active_key": ""}},
+            )
+            return result.modified_count == 1
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.cancelJob(job_id, count + 1)
+
+    @log_method
+    def getJobs(self, states: List[str] = None, limit: int = 100, count=0) -> List[QueuedJob]:
+        try:
+            collection = self.get_collection("Job")
+            query = self.scope({"state": {"$in": list(states)}} if states else {})
+            result = collection.find(query).sort("create_time", pymongo.DESCENDING).limit(limit)
+            return [QueuedJob.deserialize(job) for job in result.to_list()]
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getJobs(states, limit, count + 1)
+
     def saveExperiment(self, experiment: Experiment, count=0):
         """Saves an Experiment."""
         try:
             colection = self.get_collection("Experiment")
-            colection.insert_one(self.add_document_id(experiment.serialize()))
+            colection.insert_one(self.add_experiment_id(experiment.serialize()))
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
                 raise
@@ -318,27 +940,34 @@ class MongoDAO(IDAO):
         """Returns the last saved Experiment."""
         try:
             colection = self.get_collection("Experiment")
-            result = colection.find({}).to_list()
-            result = [Experiment.deserialize(item) for item in result]
-            result.sort(key=lambda x: x.create_time)
-            if len(result) > 0:
-                return result.pop()
-            return None
+            result = colection.find_one(self.scope(), sort=[("create_time", pymongo.DESCENDING)])
+            return Experiment.deserialize(result)
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
                 raise
             self.connect()
-            return self.saveExperiment(count + 1)
+            return self.getExperiment(count + 1)
+
+    @log_method
+    def getExperimentIds(self, count=0) -> List[str]:
+        try:
+            ids = self.get_collection("Experiment").distinct("experiment")
+            return sorted(set(ids) | {self.experiment_id})
+        except pymongo.errors.ConnectionFailure:
+            if count >= 3:
+                raise
+            self.connect()
+            return self.getExperimentIds(count + 1)
 
     def getGoldenSamples(self, tuggle: bool = True, count=0) -> List[ISample]:
         try:
-            collection = self.get_collection("Sample")
-            result = collection.find({"gold_set": tuggle, "validated": True})
+            collection = self.get_sample_collection()
+            result = collection.find(self.scope({"gold_set": tuggle, "validated": True}))
             return [
-                self.sample_class.deserialize(sample) for sample in result.to_list()
+                self.decode_sample(sample) for sample in result.to_list()
             ]
         except pymongo.errors.ConnectionFailure:
             if count >= 3:
                 raise
             self.connect()
-            return self.getGoldenSamples(count + 1)
+            return self.getGoldenSamples(tuggle, count + 1)
@@ -8,5 +8,10 @@ from .metric_interface import IMetric
 from .sample_selection_interface import ISampleSelector
 from .model_interface import IModel
 from .iteration_state import IterationState
+from .iteration_state import IterationTransitionError
+from .job_state import JobState
+from .job_type import JobType
+from .queued_job import QueuedJob
 from .experiment import Experiment
+from .checkpoint import Checkpoint
 from .logger import log_method
\ No newline at end of file
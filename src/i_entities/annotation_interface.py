@@ -1,5 +1,5 @@
 import abc
-from typing import Any
+from typing import Any, Dict
 from .serializable import Serializable
 
 class IAnnotation(Serializable, metaclass=abc.ABCMeta):
@@ -10,6 +10,8 @@ class IAnnotation(Serializable, metaclass=abc.ABCMeta):
     for storing and managing annotations within the system.
     """
 
+    __slots__ = ('_id', 'sample_id', 'is_valid', 'iteration', 'annotator', 'name', 'label', 'confidence')
+
     def __init__(self, sample_id: Any, label: Any, annotator_id: Any = None, iteration_id: Any = None, is_valid: bool = None) -> None:
         """
         Initializes an annotation object with the provided details.
@@ -28,6 +30,7 @@ class IAnnotation(Serializable, metaclass=abc.ABCMeta):
         self.annotator = annotator_id  # The ID of the annotator who created the annotation.
         self.name = self.__class__.get_annotation_name()  # The name of the annotation type (e.g., SequenceLabelAnnotation).
         self.label = label  # The label (or value) for this annotation.
+        self.confidence: float = None  # The model's confidence in the whole annotation (None for human annotations).
 
     @classmethod
     def deserialize(cls, data: dict | Any):
@@ -43,17 +46,28 @@ class IAnnotation(Serializable, metaclass=abc.ABCMeta):
             IAnnotation: An instance of the appropriate annotation class populated with the data.
         """
         obj = cls.__new__(cls)  # Create an empty instance of the class.
-        
+        # Every slot is set, so the generated serializer reads them at once
+        name = data.get('name') if isinstance(data, dict) else None
+        obj.name = name if name is not None or cls is IAnnotation else cls.get_annotation_name()
+
         # If the data is a dictionary, populate the fields of the annotation object.
         if isinstance(data, dict):
             obj._id = data.get('_id', None)
+            obj.sample_id = data.get('sample_id')
             obj.is_valid = data.get('is_valid', None)
             obj.iteration = data.get('iteration')
             obj.annotator = data.get('annotator')
             obj.label = data.get('label')
+            obj.confidence = data.get('confidence')
         else:
             # If the data is not a dictionary, assume it is the label itself.
+            obj._id = None
+            obj.sample_id = None
+            obj.is_valid = None
+            obj.iteration = None
+            obj.annotator = None
             obj.label = data
+            obj.confidence = None
         
         return obj
 
@@ -70,6 +84,37 @@ class IAnnotation(Serializable, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def transfer(self, source_text: str, target_text: str, sample_id: Any) -> 'IAnnotation':
+        """
+        Creates a copy of this annotation for another sample whose text is a near-duplicate of the annotated one.
+
+        The label does not depend on the text positions by default, so it is copied as it is. Subclasses
+        whose labels refer to positions in the text must align them to the target text.
+
+        Args:
+            source_text (str): The text of the annotated sample.
+            target_text (str): The text of the sample receiving the annotation.
+            sample_id (Any): The ID of the sample receiving the annotation.
+
+        Returns:
+            IAnnotation: The new annotation, or None if the annotation cannot be transferred.
+        """
+        annotation = self.__class__.deserialize(self.serialize())
+        annotation._id = None
+        annotation.sample_id = sample_id
+        annotation.confidence = None
+        return annotation
+
+    def label_counts(self) -> Dict[str, int]:
+        """
+        Counts the occurrences of each label in the annotation.
+
+        Returns:
+            Dict[str, int]: The number of occurrences of each label, a single label by default.
+        """
+        value = self.get_value()
+        return {} if value is None else {str(value): 1}
+
     def get_value(self) -> Any:
         """
         Returns the value (label) of the annotation.
@@ -3,6 +3,8 @@ from .serializable import Serializable
 
 class Annotator(Serializable):
 
+    __slots__ = ('_id', 'email', 'password')
+
     def __init__(self, email: str, password: str, id: Any = None) -> None:
         self._id = id
         self.email = email
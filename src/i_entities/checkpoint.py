@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Any
+from .serializable import Serializable
+
+class Checkpoint(Serializable):
+    """
+    Represents a checkpoint of a fine-tuning in progress.
+
+    The state of the model (weights and optimizer state) is stored separately as bytes, the checkpoint
+    only records where the state is stored and how far the training went.
+
+    Attributes:
+        iteration_id (Any): The ID of the iteration whose model is being fine-tuned.
+        batch (int): The number of minibatches completed when the checkpoint was taken.
+        state_id (Any): The ID of the stored model state.
+        create_time (datetime): The time the checkpoint was taken.
+    """
+
+    def __init__(self, iteration_id: Any, batch: int, state_id: Any = None) -> None:
+        """
+        Initializes a checkpoint.
+
+        Args:
+            iteration_id (Any): The ID of the iteration whose model is being fine-tuned.
+            batch (int): The number of minibatches completed.
+            state_id (Any, optional): The ID of the stored model state. Defaults to None.
+        """
+        self._id: Any = None
+        self.iteration_id = iteration_id
+        self.batch = batch
+        self.state_id = state_id
+        self.create_time = datetime.now()
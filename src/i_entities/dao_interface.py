@@ -1,5 +1,8 @@
 import abc
-from typing import Any, List, Type
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple, Type
+from .checkpoint import Checkpoint
+from .queued_job import QueuedJob
 from .experiment import Experiment
 from .iteration import Iteration
 from .model_interface import IModel
@@ -47,10 +50,20 @@ class IDAO():
     def getSample(self, id: Any) -> ISample:
         raise NotImplementedError
     
+    @abc.abstractmethod
+    def getSamples(self, ids: List[Any]) -> List[ISample]:
+        """Returns the samples with the given ids."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def getPendingSamples(self) -> List[ISample]:
         raise NotImplementedError
     
+    @abc.abstractmethod
+    def iterPendingSampleIds(self, batch_size: int = 1024) -> Iterator[Any]:
+        """Streams the ids of the pending samples from the database, fetching `batch_size` ids at a time."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def getGoldenSamples(self,tuggle:bool=True) -> List[ISample]:
         """"Returns the golden set when tuggle is True. When tuggle is False,
@@ -61,6 +74,11 @@ class IDAO():
     def getPendingAnnotation(self, iteration_id: Any) -> List[ISample]:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def countPendingAnnotations(self, iteration_id: Any) -> int:
+        """Returns the number of model annotations of the iteration that have not been validated yet."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def saveAnnotation(self, annotation: IAnnotation):
         raise NotImplementedError
@@ -83,8 +101,76 @@ class IDAO():
         raise NotImplementedError
 
     @abc.abstractmethod
-    def loadModel(self, model_class: Type[IModel], model_id: Any) -> IModel:
-        """Saves a model and returns its identifier"""
+    def loadModel(self, model_class: Type[IModel], model_id: Any, model_params: dict = None) -> IModel:
+        """Loads a saved model into a new instance of the model class, created with the `model_params` keyword arguments."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def saveCheckpoint(self, checkpoint: Checkpoint, state: bytes) -> Any:
+        """Saves a fine-tuning checkpoint with its model state, replacing the previous checkpoints of the iteration."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getCheckpoint(self, iteration_id: Any) -> Checkpoint:
+        """Returns the latest checkpoint of the iteration, or None."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def loadCheckpointState(self, checkpoint: Checkpoint) -> bytes:
+        """Returns the model state stored with the checkpoint."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def deleteCheckpoints(self, iteration_id: Any):
+        """Deletes the checkpoints of the iteration and their model states."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getBucketClusters(self, keys: List[str]) -> Dict[str, List[Any]]:
+        """Returns the near-duplicate clusters stored in each of the given LSH buckets."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getClusterSignatures(self, cluster_ids: List[Any]) -> Dict[Any, bytes]:
+        """Returns the MinHash signature of the representative of each of the given clusters."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def saveClusters(self, signatures: Dict[Any, bytes], buckets: Dict[str, List[Any]]):
+        """Saves the signatures of new clusters and adds the clusters to their LSH buckets."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getClusterSamples(self, cluster_id: Any, validated: bool = None) -> List[ISample]:
+        """Returns the samples of a near-duplicate cluster, optionally filtered by their validated flag."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def indexLabels(self, samples: List[ISample]):
+        """Records the label counts of the predicted annotations of pending samples in the label index."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def unindexLabels(self, sample_ids: List[Any]):
+        """Removes validated samples from the label index."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getLabelTotals(self) -> Dict[str, int]:
+        """Returns the number of indexed pending samples predicted to contain each label."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getLabelIndexEntries(self, label: str, limit: int, exclude: List[Any] = None) -> List[Tuple[Any, Dict[str, int]]]:
+        """Returns the ids and label counts of at most `limit` indexed samples predicted to contain the label."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def sampleUnindexedSampleIds(self, size: int, seed: int = None) -> List[Any]:
+        """
+        Returns the ids of at most `size` pending samples drawn at random among the samples that are not in the
+        label index. The seed makes the draw reproducible when the database supports it.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod 
@@ -94,7 +180,54 @@ class IDAO():
 
     @abc.abstractmethod 
     def updateIteration(self, iteration: Iteration) -> Any:
-        """Updates an Iteration and returns the result of the update"""
+        """Updates an Iteration, except its status and metrics, and returns the result of the update"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def transitionIteration(self, iteration: Iteration, status: str) -> bool:
+        """
+        Saves an Iteration, with its new status, only if its stored status is still `status`.
+        Returns False if the iteration was moved to another state meanwhile.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getOpenIterations(self, since: datetime) -> List[Iteration]:
+        """Returns the iterations started since the given time that are not complete, by position."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def saveIterationMetrics(self, iteration_id: Any, metrics: Dict[str, Any]):
+        """Saves the metrics of the model of an Iteration, which the other updates of the Iteration leave unchanged."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getIterationMetrics(self) -> List[Dict[str, Any]]:
+        """
+        Returns the metrics of the evaluated iterations by position: the `iteration` id, `position`,
+        `end_time` and `metrics` of each iteration.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getProbe(self) -> Dict[str, Any]:
+        """
+        Returns the probe set of the experiment: its `sample_ids`, the predicted `labels` in the order of
+        their codes, the `previous_model_id`, its encoded `predictions` and the `agreements`, or None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def createProbe(self, sample_ids: List[Any]) -> Dict[str, Any]:
+        """Saves a probe set of the given samples unless the experiment has one, and returns the saved probe set."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def updateProbe(self, probe: Dict[str, Any], previous_model_id: Any) -> bool:
+        """
+        Saves the labels, the predictions, the agreements and the model of the probe set, only if its saved
+        `previous_model_id` is still `previous_model_id`. Returns whether the probe set was saved.
+        """
         raise NotImplementedError
 
     @abc.abstractmethod 
@@ -107,6 +240,41 @@ class IDAO():
         """Returns the annotations made in the iteration."""
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def enqueueJob(self, job: QueuedJob) -> Any:
+        """Saves a pending job and returns its id, or the id of the active job with the same key."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def leaseJob(self, worker: str, lease_seconds: float, types: List[str] = None) -> QueuedJob:
+        """Leases the oldest available job, pending or with an expired lease, and returns it, or None."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def heartbeatJob(self, job: QueuedJob, lease_seconds: float) -> bool:
+        """Extends the lease of a running job. Returns False if the worker lost the lease or the job was cancelled."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def completeJob(self, job: QueuedJob):
+        """Marks a leased job as done."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def failJob(self, job: QueuedJob, error: str, retry_delay: float):
+        """Records a failed attempt: the job is retried after `retry_delay` seconds, or failed after its last attempt."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def cancelJob(self, job_id: Any) -> bool:
+        """Cancels a pending or running job. Returns False if the job is already finished."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def getJobs(self, states: List[str] = None, limit: int = 100) -> List[QueuedJob]:
+        """Returns the most recent jobs, optionally filtered by state."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def saveExperiment(self, experiment: Experiment):
         """Saves an Experiment."""
@@ -116,6 +284,16 @@ class IDAO():
     def getExperiment(self)-> Experiment:
         """Returns the last saved Experiment."""
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def getExperimentIds(self) -> List[str]:
+        """Returns the ids of the experiments of the database, including the experiment of the DAO."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def for_experiment(self, experiment_id: str) -> 'IDAO':
+        """Returns a DAO reading and writing the documents of the given experiment."""
+        raise NotImplementedError
     
     @abc.abstractmethod
     def setup_database(self, annotator: Annotator):
@@ -11,8 +11,13 @@ class Experiment(Serializable):
         position (int): The position or step in the experiment process.
         status (str): The current status of the experiment (e.g., 'STARTED', 'COMPLETED', 'FAILED').
         create_time: The time the `Experiment` object was created.
+
+    Several experiments, i.e. annotation projects, can share a database: every document of an experiment is
+    tagged with the identifier of the experiment, and a DAO only reads and writes the documents of its own.
     """
 
+    DEFAULT_ID = 'default'  # The experiment of the documents saved before experiments were identified
+
     def __init__(self, iteration_id: Any, position: int, status='STARTED'):
         """
         Initializes an instance of the Experiment class.
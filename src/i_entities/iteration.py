@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, List
+from typing import Any, Dict, List
 from .serializable import Serializable
 from .iteration_state import IterationState
 
@@ -10,6 +10,8 @@ class Iteration(Serializable):
     of the iteration process. This class also allows deserialization of an iteration object from a dictionary.
     """
 
+    __slots__ = ('_id', 'position', 'start_time', 'end_time', 'model_id', 'sample_ids', 'status', 'metrics')
+
     def __init__(self, position: int, model_id: Any, sample_ids: List[Any]) -> None:
         """
         Initializes an Iteration object with the specified position, model ID, and list of sample IDs.
@@ -26,6 +28,7 @@ class Iteration(Serializable):
         self.model_id: Any = model_id  # The ID of the model used in this iteration.
         self.sample_ids: List[Any] = sample_ids  # The list of sample IDs processed during this iteration.
         self.status = IterationState.INITIALIZED  # The status of the iteration.
+        self.metrics: Dict[str, Any] = {}  # The result of each metric on the held-out gold samples (set after annotation).
 
     @classmethod
     def deserialize(cls, data: dict):
@@ -49,4 +52,5 @@ class Iteration(Serializable):
         obj.model_id = data.get('model_id')  # Set the model ID used in the iteration.
         obj.sample_ids = data.get('sample_ids', [])  # Set the list of sample IDs.
         obj.status = data.get('status')  # Set the status of the iteration.
+        obj.metrics = data.get('metrics') or {}  # Set the metrics of the model of the iteration.
         return obj
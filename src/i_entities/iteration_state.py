@@ -8,5 +8,27 @@ class IterationState(StrEnum):
     ANNOTATING = 'ANNOTATING'
     VALIDATING = 'VALIDATING'
     COMPLETE = 'COMPLETE'
-    
-    
\ No newline at end of file
+
+    @property
+    def terminal(self) -> bool:
+        """Whether no transition leaves the state."""
+        return not TRANSITIONS[self]
+
+    def can_transition(self, status: 'IterationState') -> bool:
+        """Whether an iteration can move from this state to the given one."""
+        return status in TRANSITIONS[self]
+
+
+# The states an iteration can move to from each state
+TRANSITIONS = {
+    IterationState.INITIALIZED: {IterationState.STARTED, IterationState.FINETUNING},
+    IterationState.STARTED: {IterationState.FINETUNING},
+    IterationState.FINETUNING: {IterationState.ANNOTATING},
+    IterationState.ANNOTATING: {IterationState.VALIDATING},
+    IterationState.VALIDATING: {IterationState.COMPLETE},
+    IterationState.COMPLETE: set(),
+}
+
+
+class IterationTransitionError(Exception):
+    """Raised when an iteration cannot move to a state, because the move is not allowed or the iteration changed meanwhile."""
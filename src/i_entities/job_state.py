@@ -0,0 +1,9 @@
+from enum import StrEnum
+
+class JobState(StrEnum):
+    
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
@@ -0,0 +1,9 @@
+from enum import StrEnum
+
+class JobType(StrEnum):
+    
+    SELECT = 'SELECT'
+    FINETUNE = 'FINETUNE'
+    ANNOTATE = 'ANNOTATE'
+    FINALIZE = 'FINALIZE'
+    EVALUATE = 'EVALUATE'
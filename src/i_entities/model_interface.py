@@ -1,7 +1,7 @@
 import abc
 import copy
 import io
-from typing import Any, List
+from typing import Any, Callable, List
 from .sample_interface import ISample
 
 class IModel(metaclass=abc.ABCMeta):
@@ -50,8 +50,21 @@ class IModel(metaclass=abc.ABCMeta):
         """
         raise NotImplementedError
 
+    def save_checkpoint(self) -> io.BytesIO:
+        """
+        Save the state of a fine-tuning in progress to a BytesIO buffer.
+
+        The default implementation saves the model only. Models with optimizer state 
+        should override it so that a resumed fine-tuning continues where it stopped.
+        """
+        return self.save()
+
+    def load_checkpoint(self, state: io.BytesIO | bytes):
+        """Restores the state saved by `save_checkpoint`."""
+        self.load(state)
+
     @abc.abstractmethod
-    def finetune(self, samples: List[ISample]):
+    def finetune(self, samples: List[ISample], start_batch: int = 0, on_checkpoint: Callable[[int], None] = None):
         """
         Finetunes the model on the provided list of samples.
 
@@ -60,17 +73,62 @@ class IModel(metaclass=abc.ABCMeta):
         could involve training the model further on the provided samples 
         to improve its performance for the annotation task.
 
+        Training is split into minibatches taken in a deterministic order, so an 
+        interrupted fine-tuning can be resumed from a checkpoint by skipping the 
+        minibatches that were already completed.
+
         Args:
             samples (List[ISample]): A list of annotated samples to finetune 
                                       the model on. Each sample should implement 
                                       the `ISample` interface and contain 
                                       annotations that the model can learn from.
+            start_batch (int): The number of minibatches already completed, when 
+                               resuming from a checkpoint. Defaults to 0.
+            on_checkpoint (Callable[[int], None], optional): Called periodically with 
+                               the number of completed minibatches, when a checkpoint 
+                               should be saved with `save_checkpoint`. Defaults to None.
 
         Raises:
             NotImplementedError: If the method is not implemented by a subclass.
         """
         raise NotImplementedError
     
+    def predict_proba(self, samples: List[ISample]) -> Any:
+        """
+        Computes the probability distribution of the model's prediction for each sample.
+
+        This method is used by model-based selection strategies to measure how uncertain 
+        the model is about each sample. Models that cannot estimate probabilities do not 
+        need to implement it.
+
+        Args:
+            samples (List[ISample]): The samples to predict.
+
+        Returns:
+            np.ndarray: A `(n_samples, n_outcomes)` matrix where each row sums to 1.
+
+        Raises:
+            NotImplementedError: If the model does not provide probabilities.
+        """
+        raise NotImplementedError
+
+    def embed(self, samples: List[ISample]) -> Any:
+        """
+        Computes a dense vector representation of each sample with the model.
+
+        Models that do not provide embeddings do not need to implement it.
+
+        Args:
+            samples (List[ISample]): The samples to embed.
+
+        Returns:
+            np.ndarray: A `(n_samples, dimensions)` float32 matrix.
+
+        Raises:
+            NotImplementedError: If the model does not provide embeddings.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def generateAnnotation(self, samples: List[ISample], iteration_id: Any) -> List[ISample]:
         """
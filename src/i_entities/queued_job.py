@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Any, Dict
+from .job_state import JobState
+from .serializable import Serializable
+
+class QueuedJob(Serializable):
+    """
+    Represents a durable job of the annotation process, stored in the database until a worker runs it.
+
+    A worker takes a job by leasing it for a limited time and renews the lease with heartbeats while
+    it runs. A job whose lease expires, e.g. because its worker crashed, can be leased by another worker.
+    A failed job is retried after a delay until it reaches its maximum number of attempts.
+
+    Attributes:
+        type (JobType): The step of the process run by the job.
+        payload (Dict[str, Any]): The arguments of the step.
+        key (str): Identifies the logical work of the job; a job is not enqueued twice while active.
+        experiment (str): The id of the experiment of the job, set when it is enqueued.
+        state (JobState): The state of the job.
+        attempts (int): The number of times the job was leased.
+        max_attempts (int): The number of attempts after which a failing job is abandoned.
+        worker (str): The ID of the worker holding the lease, if any.
+        lease_expires (datetime): When the lease of the worker expires, if the job is leased.
+        heartbeat_time (datetime): The last heartbeat of the worker.
+        available_time (datetime): The time from which the job can be leased.
+        error (str): The error of the last failed attempt, if any.
+        create_time (datetime): The time the job was enqueued.
+        end_time (datetime): The time the job was done, failed or cancelled.
+    """
+
+    def __init__(self, type: str, payload: Dict[str, Any] = None, key: str = None, max_attempts: int = 3) -> None:
+        """
+        Initializes a pending job.
+
+        Args:
+            type (JobType): The step of the process run by the job.
+            payload (Dict[str, Any], optional): The arguments of the step. Defaults to None.
+            key (str, optional): Identifies the logical work of the job. Defaults to None (never deduplicated).
+            max_attempts (int): The maximum number of attempts. Defaults to 3.
+        """
+        self._id: Any = None
+        self.type = type
+        self.payload = payload or {}
+        self.key = key
+        self.experiment: str = None
+        self.state = JobState.PENDING
+        self.attempts = 0
+        self.max_attempts = max_attempts
+        self.worker: str = None
+        self.lease_expires: datetime = None
+        self.heartbeat_time: datetime = None
+        self.create_time = datetime.now()
+        self.available_time = self.create_time
+        self.error: str = None
+        self.end_time: datetime = None
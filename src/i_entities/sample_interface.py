@@ -13,6 +13,9 @@ class ISample(Serializable, metaclass=abc.ABCMeta):
     annotations with the sample, and tracking whether the sample has been validated.
     """
 
+    __slots__ = ('text', 'labels', 'validated', '_id', 'gold_set', 'cluster_id')
+    _nested_fields = ('labels',)
+
     def __init__(self, text: str) -> None:
         """
         Initializes the sample with the given text.
@@ -25,6 +28,7 @@ class ISample(Serializable, metaclass=abc.ABCMeta):
         self.validated: bool = False     # Flag to indicate whether the sample has been validated
         self._id = None                  # Unique identifier for the sample (to be set later)
         self.gold_set = False
+        self.cluster_id = None           # The near-duplicate cluster of the sample (None when not indexed)
 
     @classmethod
     @abc.abstractmethod
@@ -51,7 +55,7 @@ class ISample(Serializable, metaclass=abc.ABCMeta):
 
         This method is responsible for creating a new sample object from 
         serialized data, such as data retrieved from a database. It assigns 
-        the sample's ID, text, validated flag, and associated labels.
+        the sample's ID, text, validated flag, near-duplicate cluster, and associated labels.
 
         Args:
             data (dict): A dictionary containing the serialized data for the sample. 
@@ -67,6 +71,7 @@ class ISample(Serializable, metaclass=abc.ABCMeta):
         obj.validated = data.get('validated', False)
         obj.text = data.get('text', '')
         obj.gold_set = data.get('gold_set', False)
+        obj.cluster_id = data.get('cluster_id')
         # Deserialize the labels using the appropriate annotation class
         obj.labels = cls.get_annotation_class().deserialize(data.get('labels',{}))
         return obj
@@ -1,5 +1,7 @@
 import abc
+from typing import Any, Dict, Iterator, List, Set
 from .dao_interface import IDAO
+from .model_interface import IModel
 from .sample_interface import ISample
 
 class ISampleSelector(metaclass=abc.ABCMeta):
@@ -11,15 +13,51 @@ class ISampleSelector(metaclass=abc.ABCMeta):
     samples from the data source.
     """
     
-    def __init__(self, dao: IDAO):
+    def __init__(self, dao: IDAO, model: IModel = None, params: Dict[str, Any] = None, exclude: Set[Any] = None):
         """
         Initializes the sample selector with the provided Data Access Object (DAO).
 
         Args:
             dao (IDAO): An instance of a Data Access Object that provides methods 
                         for interacting with the data source (e.g., a database).
+            model (IModel, optional): The model of the latest iteration, used by model-based 
+                        selection strategies. Defaults to None (no model trained yet).
+            params (Dict[str, Any], optional): The parameters of the selection strategy, 
+                        from the `selector-params` configuration. Defaults to None.
+            exclude (Set[Any], optional): The ids of pending samples that must not be selected, e.g. the
+                        samples of an iteration still being validated. Defaults to None.
         """
         self.dao = dao
+        self.model = model
+        self.params = params or {}
+        self.exclude = exclude or set()
+
+    def pending_samples(self) -> List[ISample]:
+        """
+        Returns the pending samples that can be selected.
+
+        Returns:
+            List[ISample]: The pending samples, without the excluded ones.
+        """
+        samples = self.dao.getPendingSamples()
+        if not self.exclude:
+            return samples
+        return [sample for sample in samples if sample._id not in self.exclude]
+
+    def pending_sample_ids(self, batch_size: int = 1024) -> Iterator[Any]:
+        """
+        Streams the ids of the pending samples that can be selected.
+
+        Args:
+            batch_size (int): The number of ids fetched at a time. Defaults to 1024.
+
+        Returns:
+            Iterator[Any]: The ids of the pending samples, without the excluded ones.
+        """
+        ids = self.dao.iterPendingSampleIds(batch_size)
+        if not self.exclude:
+            return ids
+        return (sample_id for sample_id in ids if sample_id not in self.exclude)
 
     @abc.abstractmethod
     def select(self, sample_size: int = 100) -> ISample:
@@ -39,3 +77,30 @@ class ISampleSelector(metaclass=abc.ABCMeta):
             NotImplementedError: If not implemented by the subclass.
         """
         raise NotImplementedError
+
+    def select_representatives(self, sample_size: int = 100) -> List[ISample]:
+        """
+        Selects samples with at most one representative per near-duplicate cluster.
+
+        The selection strategy is asked for `cluster-oversampling` times more samples than needed (2 by
+        default), and the first sample of each cluster is kept, in the order of the strategy. Samples that
+        were not assigned to a cluster are always kept.
+
+        Args:
+            sample_size (int): The number of samples to select. Default is 100.
+
+        Returns:
+            List[ISample]: At most `sample_size` samples, from distinct clusters.
+        """
+        candidates = self.select(sample_size * self.params.get('cluster-oversampling', 2))
+        clusters = set()
+        selected = []
+        for sample in candidates:
+            if sample.cluster_id is not None:
+                if sample.cluster_id in clusters:
+                    continue
+                clusters.add(sample.cluster_id)
+            selected.append(sample)
+            if len(selected) == sample_size:
+                break
+        return selected
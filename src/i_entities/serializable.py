@@ -1,4 +1,73 @@
 import abc
+from typing import Callable, List, Tuple
+
+
+def slot_fields(cls: type) -> List[str]:
+    """Returns the slots of a class and of its bases, from the base class down, in declaration order."""
+    fields = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and name not in fields:
+                fields.append(name)
+    return fields
+
+
+def compile_serializer(fields: List[str], nested: Tuple[str, ...], has_dict: bool) -> Callable:
+    """
+    Generates the `serialize` method of a class with a fixed set of fields.
+
+    The fields are read into a dictionary literal at once. The fields in `nested` are serialized
+    recursively, and the attributes of the instance `__dict__`, if any, are added as the generic
+    method does. When a field is not set, e.g. on a partially deserialized object, the fields are
+    read one by one and the unset ones are left out.
+    """
+    items = ', '.join(f'{field!r}: self.{field}' for field in fields)
+    lines = ['def serialize(self):',
+             '    try:',
+             f'        data = {{{items}}}',
+             '    except AttributeError:',
+             '        data = {}',
+             *[line for field in fields for line in (
+                 '        try:',
+                 f'            data[{field!r}] = self.{field}',
+                 '        except AttributeError:',
+                 '            pass')]]
+    for field in nested:
+        lines += [f'    value = data.get({field!r})',
+                  '    if isinstance(value, Serializable):',
+                  f'        data[{field!r}] = value.serialize()']
+    if has_dict:
+        lines += ['    for key, value in self.__dict__.items():',
+                  '        data[key] = value.serialize() if isinstance(value, Serializable) else value']
+    lines.append('    return data')
+    namespace = {'Serializable': Serializable}
+    exec('\n'.join(lines), namespace)
+    return namespace['serialize']
+
+
+def compile_deserializer(fields: List[str], has_dict: bool) -> Callable:
+    """
+    Generates the `deserialize` class method of a class with a fixed set of fields.
+
+    Only the fields present in the dictionary are set. The other keys of the dictionary (e.g. the
+    `experiment` of a document) are kept in the instance `__dict__` if there is one, or ignored.
+    """
+    lines = ['def deserialize(cls, data):',
+             '    if data is None:',
+             '        return None',
+             '    obj = cls.__new__(cls)',
+             *[line for field in fields for line in (
+                 f'    if {field!r} in data:',
+                 f'        obj.{field} = data[{field!r}]')]]
+    if has_dict:
+        lines += ['    for key in data.keys() - FIELDS:',
+                  '        obj.__dict__[key] = data[key]']
+    lines.append('    return obj')
+    namespace = {'FIELDS': frozenset(fields)}
+    exec('\n'.join(lines), namespace)
+    return namespace['deserialize']
+
 
 class Serializable(metaclass=abc.ABCMeta):
     """
@@ -8,8 +77,33 @@ class Serializable(metaclass=abc.ABCMeta):
     (serialization) and to reconstruct an object from a dictionary (deserialization).
     Any class that inherits from `Serializable` will automatically gain the ability 
     to serialize and deserialize its instances.
+
+    A class declaring its fields in `__slots__` gets a serializer and a deserializer generated once,
+    when the class is created, instead of the generic methods walking the instance `__dict__`. Its
+    instances are also smaller. The fields holding `Serializable` objects are listed in `_nested_fields`.
+    Subclasses declaring no `__slots__` keep a `__dict__`, whose attributes are serialized too.
     """
 
+    __slots__ = ()
+    _nested_fields: Tuple[str, ...] = ()  # The fields serialized recursively by the generated serializer
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = slot_fields(cls)
+        if not fields:
+            return
+        has_dict = cls.__dictoffset__ != 0
+        # The methods written by hand in the class or in a base class are kept
+        owner = next(klass for klass in cls.__mro__ if 'serialize' in klass.__dict__)
+        if owner is Serializable or getattr(owner.__dict__['serialize'], '__compiled__', False):
+            cls.serialize = compile_serializer(fields, cls._nested_fields, has_dict)
+            cls.serialize.__compiled__ = True
+        owner = next(klass for klass in cls.__mro__ if 'deserialize' in klass.__dict__)
+        if owner is Serializable or getattr(owner.__dict__['deserialize'].__func__, '__compiled__', False):
+            deserialize = compile_deserializer(fields, has_dict)
+            deserialize.__compiled__ = True
+            cls.deserialize = classmethod(deserialize)
+
     def serialize(self):
         """
         Serializes the object to a dictionary.
@@ -1,8 +1,9 @@
 import abc
-from typing import Any
+from typing import Any, Type
 
 from i_entities import Iteration
 from .dao_interface import IDAO
+from .model_interface import IModel
 
 class IStopCondition(metaclass=abc.ABCMeta):
     """
@@ -15,19 +16,25 @@ class IStopCondition(metaclass=abc.ABCMeta):
     Attributes:
         dao (IDAO): The data access object used to interact with the database.
         params (Any): Parameters that can be used to configure the stopping condition.
+        model_class (Type[IModel]): The class of the models of the iterations, to load them, or None.
+        model_params (dict): The keyword arguments of the model class.
     """
 
-    def __init__(self, dao: IDAO, params: Any):
+    def __init__(self, dao: IDAO, params: Any, model_class: Type[IModel] = None, model_params: dict = None):
         """
         Initializes the stopping condition with the provided DAO and parameters.
 
         Args:
             dao (IDAO): The data access object used to interact with the database.
             params (Any): Configuration parameters for the stopping condition.
+            model_class (Type[IModel], optional): The class of the models of the iterations. Defaults to None.
+            model_params (dict, optional): The keyword arguments of the model class. Defaults to None (no arguments).
         """
         self.dao = dao
         self.params = params
-        
+        self.model_class = model_class
+        self.model_params = model_params or {}
+
     @abc.abstractmethod
     def evaluate(self, iteration: Iteration) -> bool:
         """
@@ -37,7 +44,7 @@ class IStopCondition(metaclass=abc.ABCMeta):
         determining whether the iterative process should stop or continue.
 
         Args:
-            iteration (Iteration): The current iteration of the annotation process.
+            iteration (Iteration): The latest completed iteration of the annotation process.
 
         Returns:
             bool: True if the stopping condition is met (i.e., the process should stop),
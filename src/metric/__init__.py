@@ -1 +1,7 @@
-from .metric_factory import MetricFactory
\ No newline at end of file
+from .label_counts import LabelCounts
+from .counting_metric import CountingMetric
+from .span_metrics import SpanF1
+from .span_metrics import PartialSpanF1
+from .classification_metrics import Accuracy
+from .classification_metrics import MacroF1
+from .metric_factory import MetricFactory
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+import numpy as np
+from i_entities import ISample
+from annotation import SpanArray
+from .counting_metric import CountingMetric
+from .label_counts import LabelCounts
+
+
+def encode_labels(samples: List[ISample], labels: Dict[Any, int]) -> np.ndarray:
+    """
+    Encodes the annotation of each sample as a label code, -1 for a missing annotation. A sequence
+    annotation is encoded as a whole, so it only equals an identical set of spans.
+    """
+    codes = np.full(len(samples), -1, dtype=np.int64)
+    for index, sample in enumerate(samples):
+        value = sample.labels.get_value() if sample.labels is not None else None
+        if isinstance(value, (list, tuple, SpanArray)):
+            value = tuple(sorted(tuple(span) for span in value))
+        if value is not None:
+            codes[index] = labels.setdefault(value, len(labels))
+    return codes
+
+
+class Accuracy(CountingMetric):
+    """
+    The fraction of the samples whose predicted annotation equals the true annotation.
+    """
+
+    @classmethod
+    def count(cls, samples: List[ISample], true_samples: List[ISample]) -> LabelCounts:
+        labels: Dict[Any, int] = {}
+        predicted = encode_labels(samples, labels)
+        gold = encode_labels(true_samples, labels)
+        size = len(labels)
+        correct = (predicted == gold) & (gold >= 0)
+        names = [str(label) for label in labels]
+        return LabelCounts.from_arrays(
+            names,
+            np.bincount(gold[correct], minlength=size),
+            np.bincount(predicted[predicted >= 0], minlength=size),
+            np.bincount(gold[gold >= 0], minlength=size),
+        )
+
+    @classmethod
+    def score(cls, counts: LabelCounts) -> Dict[str, Any]:
+        total = sum(counts.gold.values())
+        return {'accuracy': sum(counts.true_positives.values()) / total if total else 0.0}
+
+
+class MacroF1(Accuracy):
+    """
+    The F1 score of each label of a classification and its unweighted mean over the labels, with the
+    per-label precision, recall and support.
+    """
+
+    @classmethod
+    def score(cls, counts: LabelCounts) -> Dict[str, Any]:
+        scores = counts.scores()
+        return {'macro-f1': scores['macro-f1'], 'macro-precision': scores['macro-precision'],
+                'macro-recall': scores['macro-recall'], 'labels': scores['labels']}
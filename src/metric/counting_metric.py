@@ -0,0 +1,76 @@
+from typing import Any, Dict, Iterable, List, Tuple
+from i_entities import IMetric
+from i_entities import ISample
+from .label_counts import LabelCounts
+
+
+class CountingMetric(IMetric):
+    """
+    Base class of the metrics computed from per-label counts, evaluated chunk by chunk.
+
+    The predicted samples are paired with the true samples by id (by position when the samples have no id),
+    and each chunk of `CHUNK_SIZE` pairs is counted at once by `count`. The counts of the chunks are merged,
+    so `evaluate_stream` can evaluate a golden set too large to be loaded at once.
+    """
+
+    CHUNK_SIZE = 10000  # The number of samples counted at once
+
+    @classmethod
+    def count(cls, samples: List[ISample], true_samples: List[ISample]) -> LabelCounts:
+        """
+        Counts the predictions of a chunk of samples against the true samples, in the same order.
+
+        Args:
+            samples (List[ISample]): The samples annotated by the model.
+            true_samples (List[ISample]): The samples with their true annotations.
+
+        Returns:
+            LabelCounts: The counts of the chunk.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def score(cls, counts: LabelCounts) -> Dict[str, Any]:
+        """Computes the result of the metric from the merged counts."""
+        return counts.scores()
+
+    @staticmethod
+    def pair(samples: List[ISample], true_samples: List[ISample]) -> Tuple[List[ISample], List[ISample]]:
+        """Returns the predicted samples and their true samples, in the same order."""
+        truth = {sample._id: sample for sample in true_samples if sample._id is not None}
+        if len(truth) < len(true_samples):
+            return samples, true_samples
+        samples = [sample for sample in samples if sample._id in truth]
+        return samples, [truth[sample._id] for sample in samples]
+
+    @classmethod
+    def evaluate_stream(cls, chunks: Iterable[Tuple[List[ISample], List[ISample]]]) -> Dict[str, Any]:
+        """
+        Evaluates chunks of predicted samples and their true samples, merging their counts.
+
+        Args:
+            chunks (Iterable[Tuple[List[ISample], List[ISample]]]): The predicted and true samples of each chunk.
+
+        Returns:
+            Dict[str, Any]: The result of the metric.
+        """
+        counts = LabelCounts()
+        for samples, true_samples in chunks:
+            counts.add(cls.count(*cls.pair(samples, true_samples)))
+        return cls.score(counts)
+
+    @classmethod
+    def evaluate(cls, samples: List[ISample], true_samples: List[ISample]) -> Dict[str, Any]:
+        """
+        Evaluates the annotations of the model against the true annotations.
+
+        Args:
+            samples (List[ISample]): The samples annotated by the model.
+            true_samples (List[ISample]): The samples with their true annotations.
+
+        Returns:
+            Dict[str, Any]: The result of the metric.
+        """
+        samples, true_samples = cls.pair(samples, true_samples)
+        return cls.evaluate_stream((samples[start:start + cls.CHUNK_SIZE], true_samples[start:start + cls.CHUNK_SIZE])
+                                   for start in range(0, len(samples), cls.CHUNK_SIZE))
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable
+import numpy as np
+
+
+class LabelCounts:
+    """
+    The per-label counts from which precision, recall and F1 scores are computed.
+
+    Counts of separate chunks of samples are merged with `add`, so a large golden set can be
+    evaluated chunk by chunk without keeping all its annotations in memory.
+
+    Attributes:
+        true_positives (Dict[str, int]): The number of matched predictions of each label.
+        predicted (Dict[str, int]): The number of predictions of each label.
+        gold (Dict[str, int]): The number of gold annotations of each label.
+        matched_gold (Dict[str, int]): The number of matched gold annotations of each label, which differs from
+                                       `true_positives` when a prediction can match several gold spans.
+    """
+
+    def __init__(self) -> None:
+        self.true_positives: Dict[str, int] = {}
+        self.predicted: Dict[str, int] = {}
+        self.gold: Dict[str, int] = {}
+        self.matched_gold: Dict[str, int] = {}
+
+    @classmethod
+    def from_arrays(cls, labels: Iterable[str], true_positives: np.ndarray, predicted: np.ndarray,
+                    gold: np.ndarray, matched_gold: np.ndarray = None) -> 'LabelCounts':
+        """
+        Creates the counts from arrays indexed by label code.
+
+        Args:
+            labels (Iterable[str]): The label of each code.
+            true_positives (np.ndarray): The number of matched predictions of each label code.
+            predicted (np.ndarray): The number of predictions of each label code.
+            gold (np.ndarray): The number of gold annotations of each label code.
+            matched_gold (np.ndarray, optional): The number of matched gold annotations of each label code.
+                                                 Defaults to `true_positives`.
+
+        Returns:
+            LabelCounts: The counts.
+        """
+        counts = cls()
+        matched_gold = true_positives if matched_gold is None else matched_gold
+        for code, label in enumerate(labels):
+            counts.true_positives[label] = int(true_positives[code])
+            counts.predicted[label] = int(predicted[code])
+            counts.gold[label] = int(gold[code])
+            counts.matched_gold[label] = int(matched_gold[code])
+        return counts
+
+    def add(self, other: 'LabelCounts') -> 'LabelCounts':
+        """Adds the counts of another chunk of samples to these counts and returns them."""
+        for mine, theirs in ((self.true_positives, other.true_positives), (self.predicted, other.predicted),
+                             (self.gold, other.gold), (self.matched_gold, other.matched_gold)):
+            for label, count in theirs.items():
+                mine[label] = mine.get(label, 0) + count
+        return self
+
+    @staticmethod
+    def _scores(true_positives: int, predicted: int, gold: int, matched_gold: int) -> Dict[str, float]:
+        precision = true_positives / predicted if predicted else 0.0
+        recall = matched_gold / gold if gold else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {'precision': precision, 'recall': recall, 'f1': f1}
+
+    def scores(self) -> Dict[str, object]:
+        """
+        Computes the micro-averaged and macro-averaged scores, and the scores of each label.
+
+        Returns:
+            Dict[str, object]: The `precision`, `recall` and `f1` micro-averages, the `macro-precision`,
+                               `macro-recall` and `macro-f1` averages over the labels, and the scores and
+                               `support` (number of gold annotations) of each label under `labels`.
+        """
+        labels = sorted(set(self.predicted) | set(self.gold))
+        per_label = {}
+        for label in labels:
+            per_label[label] = self._scores(self.true_positives.get(label, 0), self.predicted.get(label, 0),
+                                            self.gold.get(label, 0), self.matched_gold.get(label, 0))
+            per_label[label]['support'] = self.gold.get(label, 0)
+        result = self._scores(sum(self.true_positives.values()), sum(self.predicted.values()),
+                              sum(self.gold.values()), sum(self.matched_gold.values()))
+        for name in ('precision', 'recall', 'f1'):
+            result[f'macro-{name}'] = float(np.mean([scores[name] for scores in per_label.values()])) if labels else 0.0
+        result['labels'] = per_label
+        return result
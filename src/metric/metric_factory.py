@@ -1,5 +1,9 @@
 from typing import List, Type
 from i_entities import IMetric
+from .span_metrics import SpanF1
+from .span_metrics import PartialSpanF1
+from .classification_metrics import Accuracy
+from .classification_metrics import MacroF1
 from utils.config_loader import ConfigLoader
 
 class MetricFactory:
@@ -24,28 +28,28 @@ class MetricFactory:
         self.config = config
         # A dictionary that maps metric class names to their corresponding metric classes
         self.metrics = {
+            SpanF1.__name__: SpanF1,
+            PartialSpanF1.__name__: PartialSpanF1,
+            Accuracy.__name__: Accuracy,
+            MacroF1.__name__: MacroF1
         }
     
     def get_metric(self) -> List[Type[IMetric]]:
         """
-        Retrieves the metric class based on the configuration setting.
+        Retrieves the metric classes listed in the `metrics` configuration.
 
-        This method checks the configuration (`metricClass`) to determine which metric class to return.
-        If the `metricClass` is not configured or invalid, it raises a ValueError.
+        `None` entries are ignored, so `metrics: [None]` disables the evaluation.
 
         Returns:
-            List[Type[IMetric]]: A list of class type of the metrics.
+            List[Type[IMetric]]: A list of class type of the metrics, empty when none is configured.
 
         Raises:
-            ValueError: If `metrics` is not configured or contains an invalid option in the `metrics` list.
+            ValueError: If the `metrics` list contains an invalid option.
         """
-        if not self.config.get('metrics'):
-            raise ValueError('metrics is not configured')
-
-        def _get_metric(metric)-> IMetric:
-            if self.config.get(metric) not in self.metrics:
+        def _get_metric(metric) -> Type[IMetric]:
+            if metric not in self.metrics:
                 raise ValueError(f'"{metric}" is not known')
-            return self.config.get(metric)
-        
-        # Return the class corresponding to the configured metric class name
-        return [_get_metric(metric) for metric in self.config.get('metrics')]
+            return self.metrics[metric]
+
+        # Return the class corresponding to each configured metric class name
+        return [_get_metric(metric) for metric in (self.config.get('metrics') or []) if metric not in (None, 'None')]
@@ -0,0 +1,110 @@
+from typing import Dict, List, Tuple
+import numpy as np
+from i_entities import ISample
+from annotation import SpanArray
+from .counting_metric import CountingMetric
+from .label_counts import LabelCounts
+
+
+def encode_spans(samples: List[ISample], labels: Dict[str, int]) -> np.ndarray:
+    """
+    Encodes the spans of the annotations of the samples as an (n, 4) integer array of
+    (sample index, start, end, label code) rows, without duplicates. A classification
+    is encoded as a span of the whole sample. The columns of a `SpanArray` are encoded at once.
+
+    Args:
+        samples (List[ISample]): The annotated samples.
+        labels (Dict[str, int]): The code of each label, extended with the new labels.
+
+    Returns:
+        np.ndarray: The encoded spans.
+    """
+    rows, blocks = [], []
+    for index, sample in enumerate(samples):
+        value = sample.labels.get_value() if sample.labels is not None else None
+        if isinstance(value, SpanArray):
+            codes = np.array([labels.setdefault(label, len(labels)) for label in value.vocabulary], dtype=np.int64)
+            blocks.append(np.column_stack((np.full(len(value), index), value.starts, value.ends, codes[value.label_ids])))
+        elif isinstance(value, (list, tuple)):
+            rows.extend((index, start, end, labels.setdefault(label, len(labels))) for start, end, label in value)
+        elif value is not None:
+            rows.append((index, 0, 0, labels.setdefault(str(value), len(labels))))
+    blocks.append(np.array(rows, dtype=np.int64).reshape(-1, 4))
+    return np.unique(np.concatenate(blocks).astype(np.int64, copy=False), axis=0)
+
+
+def exact_matches(predicted: np.ndarray, gold: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns whether each predicted span has an identical gold span, and whether each gold span has an identical prediction."""
+    rows = np.concatenate([predicted, gold])
+    _, inverse, counts = np.unique(rows, axis=0, return_inverse=True, return_counts=True)
+    matched = counts[inverse.reshape(-1)] > 1  # Both arrays are free of duplicates
+    return matched[:len(predicted)], matched[len(predicted):]
+
+
+def overlapping(spans: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    Returns whether each span overlaps a span of the same sample and label among `others`.
+
+    The other spans are sorted by (sample, label, start). For each span, a binary search finds the last other
+    span of its group starting before its end, and the running maximum of the ends of the group tells
+    whether one of the other spans starting before its end also ends after its start.
+    """
+    if not len(spans) or not len(others):
+        return np.zeros(len(spans), dtype=bool)
+    size = int(max(spans[:, 2].max(), others[:, 2].max())) + 1
+    labels = int(max(spans[:, 3].max(), others[:, 3].max())) + 1
+    # Groups are in increasing order, so the running maximum of the keys never crosses a group boundary
+    other_groups = others[:, 0] * labels + others[:, 3]
+    order = np.lexsort((others[:, 1], other_groups))
+    other_groups = other_groups[order]
+    starts = other_groups * size + others[order, 1]
+    max_ends = np.maximum.accumulate(other_groups * size + others[order, 2])
+    groups = spans[:, 0] * labels + spans[:, 3]
+    last = np.searchsorted(starts, groups * size + spans[:, 2], side='left') - 1
+    found = last >= 0
+    last = np.maximum(last, 0)
+    return found & (other_groups[last] == groups) & (max_ends[last] > groups * size + spans[:, 1])
+
+
+class SpanF1(CountingMetric):
+    """
+    Span-level precision, recall and F1 score, per label and micro and macro averaged.
+
+    A predicted span is a true positive when the gold annotation of the sample has a span with the same
+    start, end and label. The spans of a chunk are encoded as integer arrays and matched at once.
+    """
+
+    @classmethod
+    def match(cls, predicted: np.ndarray, gold: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns whether each predicted span and each gold span is matched."""
+        return exact_matches(predicted, gold)
+
+    @classmethod
+    def count(cls, samples: List[ISample], true_samples: List[ISample]) -> LabelCounts:
+        codes: Dict[str, int] = {}
+        predicted = encode_spans(samples, codes)
+        gold = encode_spans(true_samples, codes)
+        predicted_matched, gold_matched = cls.match(predicted, gold)
+        size = len(codes)
+        return LabelCounts.from_arrays(
+            codes,
+            np.bincount(predicted[predicted_matched, 3], minlength=size),
+            np.bincount(predicted[:, 3], minlength=size),
+            np.bincount(gold[:, 3], minlength=size),
+            np.bincount(gold[gold_matched, 3], minlength=size),
+        )
+
+
+class PartialSpanF1(SpanF1):
+    """
+    Span-level precision, recall and F1 score where overlapping spans with the same label match.
+
+    The precision is the fraction of the predicted spans overlapping a gold span of the same label, and the
+    recall the fraction of the gold spans overlapping a predicted span of the same label. Identical spans
+    match even when they are empty, e.g. the whole-sample spans of classifications.
+    """
+
+    @classmethod
+    def match(cls, predicted: np.ndarray, gold: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        predicted_matched, gold_matched = exact_matches(predicted, gold)
+        return predicted_matched | overlapping(predicted, gold), gold_matched | overlapping(gold, predicted)
@@ -1,2 +1,3 @@
 from .model_factory import ModelFactory
-from .ner_model import NERModel
\ No newline at end of file
+from .ner_model import NERModel
+from .text_classification_model import TextClassificationModel
\ No newline at end of file
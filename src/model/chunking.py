@@ -0,0 +1,106 @@
+import re
+from typing import List, Optional, Tuple
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')  # Whitespace following a sentence terminator.
+SENTENCE = 'sentence'
+WINDOW = 'window'
+
+
+def _windows(text: str, start: int, end: int, max_length: int) -> List[Tuple[int, int]]:
+    """
+    Splits `text[start:end]` into windows of at most `max_length` characters.
+
+    Windows are cut at the last whitespace before the limit, so words are not split unless a
+    single word is longer than the window.
+
+    Returns:
+        List[Tuple[int, int]]: The `(start, end)` character offsets of the windows.
+    """
+    windows = []
+    while end - start > max_length:
+        cut = text.rfind(' ', start + 1, start + max_length + 1)
+        if cut <= start:
+            cut = start + max_length  # No whitespace in the window, cut the word
+        windows.append((start, cut))
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if start < end:
+        windows.append((start, end))
+    return windows
+
+
+def split_text(text: str, max_length: int, strategy: str = SENTENCE) -> List[Tuple[int, int]]:
+    """
+    Splits a text into chunks of at most `max_length` characters.
+
+    With the `sentence` strategy, consecutive sentences are packed into the same chunk while they fit,
+    and sentences longer than `max_length` are split into windows. With the `window` strategy, the
+    text is split into whitespace-aligned windows.
+
+    Args:
+        text (str): The text to split.
+        max_length (int): The maximum number of characters per chunk.
+        strategy (str): Either `sentence` or `window`. Defaults to `sentence`.
+
+    Returns:
+        List[Tuple[int, int]]: The `(start, end)` character offsets of the chunks in the text.
+
+    Raises:
+        ValueError: If the strategy is not known.
+    """
+    if len(text) <= max_length:
+        return [(0, len(text))]
+    if strategy == WINDOW:
+        return _windows(text, 0, len(text), max_length)
+    if strategy != SENTENCE:
+        raise ValueError(f'"{strategy}" is not a valid chunk strategy')
+
+    pieces = []
+    position = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        pieces.extend(_windows(text, position, match.start(), max_length))
+        position = match.end()
+    pieces.extend(_windows(text, position, len(text), max_length))
+
+    # Pack the sentences into chunks
+    chunks = []
+    for start, end in pieces:
+        if chunks and end - chunks[-1][0] <= max_length:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+
+def merge_spans(text: str, chunks: List[Tuple[int, int]],
+                spans: List[List[Tuple[int, int, str, Optional[float]]]]) -> List[Tuple[int, int, str, Optional[float]]]:
+    """
+    Remaps the spans predicted on each chunk to offsets in the full text and merges them.
+
+    A span ending at the end of a chunk and a span with the same label starting at the beginning of the
+    next chunk are considered a single entity cut by the chunk boundary, and are merged. The score of a
+    merged span is the lowest score of its parts.
+
+    Args:
+        text (str): The full text.
+        chunks (List[Tuple[int, int]]): The `(start, end)` offsets of the chunks, as returned by `split_text`.
+        spans (List[List[Tuple[int, int, str, Optional[float]]]]): For each chunk, the predicted
+            `(start, end, label, score)` spans with offsets relative to the chunk.
+
+    Returns:
+        List[Tuple[int, int, str, Optional[float]]]: The spans of the full text.
+    """
+    merged = []
+    previous_end = None  # The end offset of the previous chunk
+    for (chunk_start, chunk_end), chunk_spans in zip(chunks, spans):
+        for index, (start, end, label, score) in enumerate(chunk_spans):
+            start, end = start + chunk_start, end + chunk_start
+            if (index == 0 and start == chunk_start and merged and merged[-1][1] == previous_end
+                    and merged[-1][2] == label and not text[previous_end:start].strip()):
+                last = merged.pop()
+                scores = [value for value in (last[3], score) if value is not None]
+                start, score = last[0], min(scores) if scores else None
+            merged.append((start, end, label, score))
+        previous_end = chunk_end
+    return merged
@@ -0,0 +1,183 @@
+import re
+import zlib
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class SparseRows:
+    """
+    A minimal compressed sparse row (CSR) matrix of float32 values.
+
+    Attributes:
+        indptr (np.ndarray): Row `i` is stored in `indices[indptr[i]:indptr[i + 1]]` and `data[indptr[i]:indptr[i + 1]]`.
+        indices (np.ndarray): The column of each stored value.
+        data (np.ndarray): The stored values.
+        n_columns (int): The number of columns of the matrix.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_columns: int) -> None:
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.n_columns = n_columns
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def row_ids(self) -> np.ndarray:
+        """Returns the row of each stored value."""
+        return np.repeat(np.arange(self.n_rows), np.diff(self.indptr))
+
+    def take(self, rows: np.ndarray) -> 'SparseRows':
+        """
+        Returns the matrix made of the given rows.
+
+        Args:
+            rows (np.ndarray): The indices of the rows to keep, in order.
+
+        Returns:
+            SparseRows: The selected rows.
+        """
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        lengths = ends - starts
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        # Positions of the stored values of the selected rows
+        positions = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SparseRows(indptr, self.indices[positions], self.data[positions], self.n_columns)
+
+    def to_dense(self) -> np.ndarray:
+        """Returns the matrix as a dense `(n_rows, n_columns)` float32 array."""
+        dense = np.zeros((self.n_rows, self.n_columns), dtype=np.float32)
+        np.add.at(dense, (self.row_ids(), self.indices), self.data)
+        return dense
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """
+        Multiplies the matrix by a dense matrix.
+
+        Args:
+            dense (np.ndarray): A `(n_columns, k)` matrix.
+
+        Returns:
+            np.ndarray: The `(n_rows, k)` product.
+        """
+        result = np.zeros((self.n_rows, dense.shape[1]), dtype=dense.dtype)
+        non_empty = np.diff(self.indptr) > 0
+        if not non_empty.any():
+            return result
+        products = self.data[:, None] * dense[self.indices]
+        result[non_empty] = np.add.reduceat(products, self.indptr[:-1][non_empty], axis=0)
+        return result
+
+
+class HashingVectorizer:
+    """
+    Converts texts into sparse feature vectors with the hashing trick.
+
+    Tokens and n-grams are hashed into a fixed number of columns with a stable hash, so no vocabulary has
+    to be learned or stored and the features of a text do not depend on the other texts. The sign of each
+    feature is also derived from the hash, which reduces the bias of the collisions. Rows are L2-normalized.
+
+    Attributes:
+        n_features (int): The number of columns of the feature vectors.
+        ngram_range (Tuple[int, int]): The minimum and maximum size of the token n-grams.
+        lowercase (bool): Whether the texts are lowercased before tokenization.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2), lowercase: bool = True) -> None:
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.lowercase = lowercase
+        self._cache: Dict[str, int] = {}  # Signed hash of the frequent terms
+
+    def _hash(self, term: str) -> int:
+        value = self._cache.get(term)
+        if value is None:
+            digest = zlib.crc32(term.encode('utf-8'))
+            value = digest % self.n_features + 1
+            value = -value if digest & 0x80000000 else value
+            if len(self._cache) < 1_000_000:
+                self._cache[term] = value
+        return value
+
+    def terms(self, text: str) -> List[str]:
+        """Returns the tokens and n-grams of a text."""
+        tokens = TOKEN_PATTERN.findall(text.lower() if self.lowercase else text)
+        low, high = self.ngram_range
+        if low == 1 and high == 1:
+            return tokens
+        terms = tokens if low == 1 else []
+        for size in range(max(low, 2), high + 1):
+            terms.extend(' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+        return terms
+
+    def transform(self, texts: Iterable[str]) -> SparseRows:
+        """
+        Converts texts into a sparse matrix of L2-normalized hashed term counts.
+
+        Args:
+            texts (Iterable[str]): The texts to vectorize.
+
+        Returns:
+            SparseRows: One row per text, with `n_features` columns.
+        """
+        indptr = [0]
+        indices = []
+        data = []
+        for text in texts:
+            counts: Dict[int, float] = {}
+            for term in self.terms(text):
+                value = self._hash(term)
+                column, sign = abs(value) - 1, (1.0 if value > 0 else -1.0)
+                counts[column] = counts.get(column, 0.0) + sign
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(data, dtype=np.float32)
+        # L2 normalization of each row
+        lengths = np.diff(indptr)
+        non_empty = lengths > 0
+        norms = np.ones(len(lengths), dtype=np.float32)
+        if non_empty.any():
+            norms[non_empty] = np.sqrt(np.add.reduceat(data ** 2, indptr[:-1][non_empty]))
+        data /= np.repeat(np.maximum(norms, 1e-12), lengths)
+        return SparseRows(indptr, indices, data, self.n_features)
+
+
+class HashingEmbedder:
+    """
+    Computes dense float32 text embeddings by hashing the terms of the texts into a small number of dimensions.
+
+    The embeddings do not require any training, so they are stable across iterations and only depend on
+    the embedder settings, which are summarized by `version`.
+
+    Attributes:
+        vectorizer (HashingVectorizer): The vectorizer hashing the terms into `dimensions` columns.
+    """
+
+    def __init__(self, dimensions: int = 128, ngram_range: Tuple[int, int] = (1, 1)) -> None:
+        self.vectorizer = HashingVectorizer(dimensions, ngram_range)
+
+    @property
+    def version(self) -> str:
+        low, high = self.vectorizer.ngram_range
+        return f'hashing-{self.vectorizer.n_features}-{low}-{high}'
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embeds texts.
+
+        Args:
+            texts (Iterable[str]): The texts to embed.
+
+        Returns:
+            np.ndarray: A `(n_texts, dimensions)` float32 matrix of L2-normalized embeddings.
+        """
+        return self.vectorizer.transform(texts).to_dense()
@@ -2,6 +2,7 @@ from typing import Type
 from i_entities import IModel
 from utils.config_loader import ConfigLoader
 from .ner_model import NERModel
+from .text_classification_model import TextClassificationModel
 
 
 class ModelFactory:
@@ -26,7 +27,8 @@ class ModelFactory:
         self.config = config
         # A dictionary that maps model class names to their corresponding model classes
         self.models = {
-            NERModel.__name__: NERModel
+            NERModel.__name__: NERModel,
+            TextClassificationModel.__name__: TextClassificationModel
         }
     
     def get_model(self) -> Type[IModel]:
@@ -1,11 +1,16 @@
 import io
+import pickle
+from collections import defaultdict
 from copy import deepcopy
+from random import Random
+import numpy as np
 import spacy
 from spacy.training import Example
-from typing import Any, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from i_entities import ISample
 from i_entities import IModel
 from annotation import SequenceLabelAnnotation
+from .chunking import SENTENCE, merge_spans, split_text
 
 class NERModel(IModel):
     """
@@ -14,29 +19,76 @@ class NERModel(IModel):
     This model loads a pre-trained spaCy NER model, fine-tunes it on a set of annotated samples, 
     and generates NER annotations (entities) for new text samples. The annotations are represented
     by `SequenceLabelAnnotation` objects, which provide information about spans of text and their labels.
+
+    Entities are predicted with a beam search over the entity recognizer: the predicted set of entities is
+    the set with the highest probability mass among the beam parses, which is the confidence of the sample,
+    and the score of a span is the probability mass of the beam parses that contain it.
+
+    Long texts are split into sentence (or window) chunks before inference. The chunks of all the samples
+    are processed together in batches, and the predicted entities are remapped to offsets in the original
+    text, merging the entities cut by a chunk boundary.
+
+    Attributes:
+        max_chunk_length (int): The maximum number of characters processed by the pipeline at once.
+        chunk_strategy (str): How long texts are split, either `sentence` or `window`.
+        batch_size (int): The number of chunks processed per batch.
+        n_process (int): The number of processes used by the spaCy pipeline.
+        beam_width (int): The number of parses kept by the beam used to score the predictions.
+        beam_density (float): The minimum density of the beam, used to prune unlikely parses.
+        train_batch_size (int): The number of examples per training minibatch.
+        checkpoint_every (int): The number of minibatches between two checkpoints.
+        seed (int): The seed used to shuffle the training examples.
+        spacy_model (str): The name or path of the spaCy pipeline.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, max_chunk_length: int = 5000, chunk_strategy: str = SENTENCE, batch_size: int = 32,
+                 n_process: int = 1, beam_width: int = 16, beam_density: float = 0.0001,
+                 train_batch_size: int = 8, checkpoint_every: int = 50, seed: int = 0,
+                 spacy_model: str = "en_core_web_sm") -> None:
         """
         Initializes the NERModel with a pre-trained spaCy NER model.
 
-        The model is loaded from the `en_core_web_sm` spaCy model, which is a small pre-trained 
+        The model is loaded from the `en_core_web_sm` spaCy model by default, which is a small pre-trained 
         model for English that includes a named entity recognizer.
+
+        Args:
+            max_chunk_length (int): The maximum number of characters per chunk. Defaults to 5000.
+            chunk_strategy (str): Either `sentence` or `window`. Defaults to `sentence`.
+            batch_size (int): The number of chunks processed per batch. Defaults to 32.
+            n_process (int): The number of processes used by the pipeline. Defaults to 1.
+            beam_width (int): The width of the beam used for the confidence scores. Defaults to 16.
+            beam_density (float): The minimum density of the beam. Defaults to 0.0001.
+            train_batch_size (int): The number of examples per training minibatch. Defaults to 8.
+            checkpoint_every (int): The number of minibatches between two checkpoints. Defaults to 50.
+            seed (int): The seed used to shuffle the training examples. Defaults to 0.
+            spacy_model (str): The name or path of the spaCy pipeline. Defaults to `en_core_web_sm`.
         """
         super().__init__()
-        self.model = spacy.load("en_core_web_sm")
+        self.model = spacy.load(spacy_model)
+        self.max_chunk_length = min(max_chunk_length, self.model.max_length)
+        self.chunk_strategy = chunk_strategy
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.beam_width = beam_width
+        self.beam_density = beam_density
+        self.train_batch_size = train_batch_size
+        self.checkpoint_every = checkpoint_every
+        self.seed = seed
+        self.optimizer = None  # The optimizer of the fine-tuning in progress
     
-    def load(self, model_bytes: io.BytesIO):
+    def load(self, model_bytes: io.BytesIO | bytes):
         """
         Loads the model from a BytesIO buffer.
 
         Args:
-            model_bytes (io.BytesIO): A BytesIO buffer containing the model's serialized data.
+            model_bytes (io.BytesIO | bytes): A BytesIO buffer or bytes containing the model's serialized data.
 
         This method allows for loading a model that was previously serialized and stored.
         """
-        # Load the model from the buffer
-        self.model = spacy.load(model_bytes)
+        if isinstance(model_bytes, io.BytesIO):
+            model_bytes = model_bytes.getvalue()
+        # Restore the weights on top of the base pipeline, which provides the pipeline configuration
+        self.model.from_bytes(model_bytes)
     
     def save(self) -> io.BytesIO:
         """
@@ -52,15 +104,43 @@ class NERModel(IModel):
         buffer.seek(0)  # Go back to the start of the buffer
         return buffer
     
-    def finetune(self, samples: List[ISample]):
+    def save_checkpoint(self) -> io.BytesIO:
+        """
+        Save the model weights and the optimizer state to a BytesIO buffer.
+
+        Returns:
+            io.BytesIO: A buffer containing the serialized fine-tuning state.
+        """
+        buffer = io.BytesIO()
+        pickle.dump({'model': self.model.to_bytes(), 'optimizer': self.optimizer}, buffer)
+        buffer.seek(0)
+        return buffer
+
+    def load_checkpoint(self, state: io.BytesIO | bytes):
+        """
+        Restores the model weights and the optimizer state saved by `save_checkpoint`.
+
+        Args:
+            state (io.BytesIO | bytes): The serialized fine-tuning state.
+        """
+        if isinstance(state, io.BytesIO):
+            state = state.getvalue()
+        state = pickle.loads(state)
+        self.model.from_bytes(state['model'])
+        self.optimizer = state['optimizer']
+
+    def finetune(self, samples: List[ISample], start_batch: int = 0, on_checkpoint: Callable[[int], None] = None):
         """
         Fine-tunes the spaCy model on the provided annotated samples.
 
         This method takes a list of annotated samples and updates the spaCy model 
-        by further training it on the provided data.
+        by further training it on the provided data, in minibatches of `train_batch_size`
+        examples shuffled with a fixed seed.
 
         Args:
             samples (List[ISample]): A list of annotated samples for fine-tuning.
+            start_batch (int): The number of minibatches already completed. Defaults to 0.
+            on_checkpoint (Callable[[int], None], optional): Called every `checkpoint_every` minibatches. Defaults to None.
         
         Each sample should contain text and entity annotations that the model can learn from.
         """
@@ -74,33 +154,136 @@ class NERModel(IModel):
             ents = [doc.char_span(start, end, label=label,alignment_mode='contract') for start, end, label in sample.labels.label]
             gold.ents = ents  # Assign the entities to the doc
             examples.append(Example(doc,gold))
-            # Update the model with the new document
-        self.model.update(examples)  # Update with the annotated data
+
+        # The order of the minibatches must not change when the fine-tuning is resumed
+        Random(self.seed).shuffle(examples)
+        batches = [examples[i:i + self.train_batch_size] for i in range(0, len(examples), self.train_batch_size)]
+        if self.optimizer is None:
+            self.optimizer = self.model.resume_training()
+        for index in range(start_batch, len(batches)):
+            self.model.update(batches[index], sgd=self.optimizer)  # Update with the annotated data
+            if on_checkpoint and (index + 1) % self.checkpoint_every == 0 and index + 1 < len(batches):
+                on_checkpoint(index + 1)
+        self.optimizer = None  # The fine-tuning is complete
     
+    def can_score(self) -> bool:
+        """Returns whether the pipeline has an entity recognizer supporting beam search."""
+        return self.model.has_pipe('ner') and hasattr(self.model.get_pipe('ner'), 'beam_parse')
+
+    def score(self, docs: List[Any]) -> List[Tuple[List[Tuple[int, int, str]], Dict[Tuple[int, int, str], float], float]]:
+        """
+        Predicts and scores the entities of docs processed by the pipeline without its entity recognizer.
+
+        The entity recognizer must not have run on the docs: the transitions of the beam follow the entities
+        already set on a doc, so the beam would only rebuild the existing parse, with a confidence of about 1.
+
+        Args:
+            docs (List[Doc]): The spaCy docs produced by the pipeline with the `ner` component disabled.
+
+        Returns:
+            List[Tuple[List[Tuple[int, int, str]], Dict[Tuple[int, int, str], float], float]]: For each doc, the
+            predicted `(start_token, end_token, label)` entities in order, a dictionary mapping each entity of the
+            beam to its probability, and the probability of the predicted set of entities.
+        """
+        if not docs:
+            return []
+        ner = self.model.get_pipe('ner')
+        beams = ner.beam_parse(docs, beam_width=self.beam_width, beam_density=self.beam_density)
+        results = []
+        for beam in beams:
+            span_scores = defaultdict(float)
+            masses = defaultdict(float)  # The probability mass of each distinct set of entities
+            for probability, parse in ner.moves.get_beam_parses(beam):
+                parse = frozenset(parse)
+                for span in parse:
+                    span_scores[span] += probability
+                masses[parse] += probability
+            entities, confidence = max(masses.items(), key=lambda item: item[1]) if masses else (frozenset(), 1.0)
+            results.append((sorted(entities), span_scores, min(confidence, 1.0)))
+        return results
+
+    def embed(self, samples: List[ISample]) -> np.ndarray:
+        """
+        Embeds the samples with the token vectors of the pipeline, averaged over the first chunk of each text.
+
+        Args:
+            samples (List[ISample]): The samples to embed.
+
+        Returns:
+            np.ndarray: A `(n_samples, dimensions)` float32 matrix.
+        """
+        texts = [sample.text[:self.max_chunk_length] for sample in samples]
+        disabled = [name for name in ('ner', 'parser', 'lemmatizer') if self.model.has_pipe(name)]
+        docs = self.model.pipe(texts, batch_size=self.batch_size, n_process=self.n_process, disable=disabled)
+        return np.array([doc.vector for doc in docs], dtype=np.float32)
+
+    def predict_proba(self, samples: List[ISample]) -> np.ndarray:
+        """
+        Computes, for each sample, the probability that the predicted set of entities is correct
+        and the probability that it is not.
+
+        Args:
+            samples (List[ISample]): The samples to predict.
+
+        Returns:
+            np.ndarray: A `(n_samples, 2)` matrix of probabilities.
+
+        Raises:
+            NotImplementedError: If the pipeline cannot score its predictions.
+        """
+        confidences = [sample.labels.confidence for sample in self.generateAnnotation(samples, None)]
+        if any(confidence is None for confidence in confidences):
+            raise NotImplementedError('The pipeline has no beam-capable entity recognizer')
+        confidences = np.array(confidences, dtype=np.float32)
+        return np.stack([confidences, 1.0 - confidences], axis=1)
+
     def generateAnnotation(self, samples: List[ISample], iteration_id: Any) -> List[ISample]:
         """
         Generates NER annotations for the provided samples using the spaCy model.
 
-        This method processes the text of each sample, applies the NER model, and creates 
-        `SequenceLabelAnnotation` objects for each sample, which contain the recognized entities.
+        This method splits the text of each sample into chunks, applies the NER model to the chunks 
+        of all the samples in batches, and creates `SequenceLabelAnnotation` objects for each sample, 
+        which contain the recognized entities along with their per-span and per-sample confidence scores.
 
         Returns:
             List[ISample]: A list of annotated samples with named entities.
         """
         annotated_samples = []
-        
-        for sample in samples:
-            # Use spaCy's NER model to process the text
-            doc = self.model(sample.text)  # Process the text with spaCy
-            
-            # Collect the entities found by the model
-            annotations = [(ent.start_char, ent.end_char, ent.label_) for ent in doc.ents]
+
+        # Split the texts into chunks, keeping track of the chunks of each sample
+        sample_chunks = [split_text(sample.text, self.max_chunk_length, self.chunk_strategy) for sample in samples]
+        texts = [sample.text[start:end] for sample, chunks in zip(samples, sample_chunks) for start, end in chunks]
+
+        # Process the chunks in batches with spaCy. With a beam-capable recognizer, the entities are predicted
+        # and scored by the beam search, on docs the greedy recognizer has not annotated
+        if self.can_score():
+            docs = list(self.model.pipe(texts, batch_size=self.batch_size, n_process=self.n_process, disable=['ner']))
+            scores = self.score(docs)
+        else:
+            docs = list(self.model.pipe(texts, batch_size=self.batch_size, n_process=self.n_process))
+            scores = [([(ent.start, ent.end, ent.label_) for ent in doc.ents], {}, None) for doc in docs]
+
+        position = 0
+        for sample, chunks in zip(samples, sample_chunks):
+            chunk_spans = []
+            confidence = 1.0
+            for doc, (entities, span_scores, chunk_confidence) in zip(docs[position:position + len(chunks)], scores[position:position + len(chunks)]):
+                chunk_spans.append([(doc[start:end].start_char, doc[start:end].end_char, label, span_scores.get((start, end, label)))
+                                    for start, end, label in entities])
+                # The chunks are scored independently, so the sample confidence is their product
+                confidence = None if confidence is None or chunk_confidence is None else confidence * chunk_confidence
+            position += len(chunks)
+
+            # Remap the entities to offsets in the sample text
+            spans = merge_spans(sample.text, chunks, chunk_spans)
             
             # Create a SequenceLabelAnnotation object for each sample
             annotation = SequenceLabelAnnotation(
                 sample_id=sample._id,
-                labels=annotations,
-                iteration_id=iteration_id
+                labels=[(start, end, label) for start, end, label, _ in spans],
+                iteration_id=iteration_id,
+                scores=[score for _, _, _, score in spans] if confidence is not None else None,
+                confidence=confidence
             )
             
             # Create a copy of the sample and assign the annotation
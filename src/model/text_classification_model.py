@@ -0,0 +1,202 @@
+import io
+from copy import deepcopy
+from typing import Any, Callable, List
+import numpy as np
+from i_entities import ISample
+from i_entities import IModel
+from annotation import ClassificationAnnotation
+from .hashing_vectorizer import HashingVectorizer, SparseRows
+
+
+class TextClassificationModel(IModel):
+    """
+    A subclass of IModel that classifies texts with a linear model over hashed features.
+
+    Texts are converted into sparse feature vectors with a `HashingVectorizer`, and a softmax (multinomial
+    logistic regression) classifier is trained on them with minibatch stochastic gradient descent in NumPy.
+    Prediction is vectorized over whole batches, and the model is only a weight matrix, so it is cheap to
+    retrain from scratch on every iteration, to save and to load.
+
+    The generated annotations are `ClassificationAnnotation` objects whose confidence is the probability
+    of the predicted class. Until the model is fine-tuned on some samples it knows no class, and its
+    annotations have no label and no confidence.
+
+    Attributes:
+        vectorizer (HashingVectorizer): Converts the texts into feature vectors.
+        classes (List[str]): The known classes, in the order of the weight columns.
+        weights (np.ndarray): The `(n_features, n_classes)` weight matrix.
+        bias (np.ndarray): The `(n_classes,)` bias vector.
+        epochs (int): The number of passes over the training set.
+        batch_size (int): The number of samples per minibatch.
+        learning_rate (float): The initial step size of the gradient descent.
+        l2 (float): The L2 regularization strength.
+        checkpoint_every (int): The number of minibatches between two checkpoints.
+        seed (int): The seed used to shuffle the training samples.
+    """
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: tuple = (1, 2), epochs: int = 5, batch_size: int = 256,
+                 learning_rate: float = 0.5, l2: float = 1e-6, checkpoint_every: int = 500, seed: int = 0) -> None:
+        """
+        Initializes an untrained text classification model.
+
+        Args:
+            n_features (int): The number of hashed features. Defaults to 2 ** 18.
+            ngram_range (tuple): The minimum and maximum size of the token n-grams. Defaults to (1, 2).
+            epochs (int): The number of passes over the training set. Defaults to 5.
+            batch_size (int): The number of samples per minibatch. Defaults to 256.
+            learning_rate (float): The initial step size. Defaults to 0.5.
+            l2 (float): The L2 regularization strength. Defaults to 1e-6.
+            checkpoint_every (int): The number of minibatches between two checkpoints. Defaults to 500.
+            seed (int): The seed used to shuffle the training samples. Defaults to 0.
+        """
+        super().__init__()
+        self.vectorizer = HashingVectorizer(n_features, ngram_range)
+        self.classes: List[str] = []
+        self.weights = np.zeros((n_features, 0), dtype=np.float32)
+        self.bias = np.zeros(0, dtype=np.float32)
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.checkpoint_every = checkpoint_every
+        self.seed = seed
+
+    def load(self, model_bytes: io.BytesIO | bytes):
+        """
+        Loads the model from a BytesIO buffer.
+
+        Args:
+            model_bytes (io.BytesIO | bytes): A buffer or bytes containing the model saved by `save`.
+        """
+        if not isinstance(model_bytes, io.BytesIO):
+            model_bytes = io.BytesIO(model_bytes)
+        with np.load(model_bytes, allow_pickle=False) as data:
+            self.weights = data['weights']
+            self.bias = data['bias']
+            self.classes = data['classes'].tolist()
+            low, high = data['ngram_range'].tolist()
+        self.vectorizer = HashingVectorizer(self.weights.shape[0], (low, high))
+
+    def save(self) -> io.BytesIO:
+        """
+        Save the model to a BytesIO buffer.
+
+        Returns:
+            io.BytesIO: A buffer containing the weights, the bias, the classes and the vectorizer settings.
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, weights=self.weights, bias=self.bias, classes=np.array(self.classes, dtype=str),
+                 ngram_range=np.array(self.vectorizer.ngram_range))
+        buffer.seek(0)
+        return buffer
+
+    def _add_classes(self, labels: List[str]):
+        """Adds a weight column for each label that is not known yet."""
+        new_classes = sorted(set(labels) - set(self.classes))
+        if not new_classes:
+            return
+        self.classes.extend(new_classes)
+        self.weights = np.hstack([self.weights, np.zeros((self.weights.shape[0], len(new_classes)), dtype=np.float32)])
+        self.bias = np.concatenate([self.bias, np.zeros(len(new_classes), dtype=np.float32)])
+
+    def _probabilities(self, features: SparseRows) -> np.ndarray:
+        """Returns the `(n_rows, n_classes)` class probabilities of a feature matrix."""
+        scores = features.dot(self.weights) + self.bias
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def finetune(self, samples: List[ISample], start_batch: int = 0, on_checkpoint: Callable[[int], None] = None):
+        """
+        Trains the classifier on the provided annotated samples.
+
+        Each epoch shuffles the samples with a fixed seed and applies one gradient step per minibatch.
+        Only the weight rows of the features present in a minibatch are updated, so a step costs time
+        proportional to the number of non-zero features of the minibatch.
+
+        Args:
+            samples (List[ISample]): A list of annotated samples whose label is a class name.
+            start_batch (int): The number of minibatches already completed. Defaults to 0.
+            on_checkpoint (Callable[[int], None], optional): Called every `checkpoint_every` minibatches. Defaults to None.
+        """
+        if not samples:
+            return
+        labels = [str(sample.labels.get_value()) for sample in samples]
+        self._add_classes(labels)
+        features = self.vectorizer.transform(sample.text for sample in samples)
+        class_index = {name: index for index, name in enumerate(self.classes)}
+        targets = np.array([class_index[label] for label in labels])
+
+        random = np.random.default_rng(self.seed)
+        batches_per_epoch = -(-len(samples) // self.batch_size)
+        total_batches = batches_per_epoch * self.epochs
+        batch = 0
+        for epoch in range(self.epochs):
+            order = random.permutation(len(samples))  # Drawn every epoch, so a resumed training sees the same batches
+            learning_rate = self.learning_rate / (1 + epoch)
+            for start in range(0, len(samples), self.batch_size):
+                batch += 1
+                if batch <= start_batch:
+                    continue
+                rows = order[start:start + self.batch_size]
+                self._step(features.take(rows), targets[rows], learning_rate)
+                if on_checkpoint and batch % self.checkpoint_every == 0 and batch < total_batches:
+                    on_checkpoint(batch)
+
+    def _step(self, features: SparseRows, targets: np.ndarray, learning_rate: float):
+        """Applies one gradient descent step of the cross-entropy loss on a minibatch."""
+        gradient = self._probabilities(features)
+        gradient[np.arange(len(targets)), targets] -= 1.0
+        gradient /= len(targets)
+
+        # Gradient of the weights, accumulated on the columns present in the minibatch only
+        columns, inverse = np.unique(features.indices, return_inverse=True)
+        contributions = features.data[:, None] * gradient[features.row_ids()]
+        weight_gradient = np.empty((len(columns), len(self.classes)), dtype=np.float32)
+        for index in range(len(self.classes)):
+            weight_gradient[:, index] = np.bincount(inverse, weights=contributions[:, index], minlength=len(columns))
+        weight_gradient += self.l2 * self.weights[columns]
+
+        self.weights[columns] -= learning_rate * weight_gradient
+        self.bias -= learning_rate * gradient.sum(axis=0)
+
+    def predict_proba(self, samples: List[ISample]) -> np.ndarray:
+        """
+        Computes the class probabilities of the samples.
+
+        Args:
+            samples (List[ISample]): The samples to classify.
+
+        Returns:
+            np.ndarray: A `(n_samples, n_classes)` matrix of probabilities, columns ordered as `classes`.
+                        It has no columns when the model knows no class.
+        """
+        if not self.classes:
+            return np.zeros((len(samples), 0), dtype=np.float32)
+        return self._probabilities(self.vectorizer.transform(sample.text for sample in samples))
+
+    def generateAnnotation(self, samples: List[ISample], iteration_id: Any) -> List[ISample]:
+        """
+        Classifies the provided samples.
+
+        Returns:
+            List[ISample]: A list of samples annotated with the most probable class and its probability, or
+                           with no label and no confidence when the model knows no class, e.g. when it was
+                           fine-tuned on an empty training set.
+        """
+        if self.classes:
+            probabilities = self.predict_proba(samples)
+            predictions = probabilities.argmax(axis=1)
+            labels = [self.classes[prediction] for prediction in predictions]
+            confidences = probabilities[np.arange(len(samples)), predictions].tolist()
+        else:
+            labels = confidences = [None] * len(samples)
+        annotated_samples = []
+        for sample, label, confidence in zip(samples, labels, confidences):
+            annotation = ClassificationAnnotation(sample_id=sample._id, label=label, iteration_id=iteration_id, is_valid=None)
+            annotation.confidence = confidence
+            annotated_sample = deepcopy(sample)
+            annotated_sample.labels = annotation
+            annotated_samples.append(annotated_sample)
+        return annotated_samples
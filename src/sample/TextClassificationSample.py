@@ -13,6 +13,8 @@ class TextClassificationSample(ISample):
         labels (ClassificationAnnotation): The annotation object that contains the 
                                           classification label for the text.
     """
+
+    __slots__ = ()
     
     def __init__(self, text: str) -> None:
         """
@@ -13,6 +13,8 @@ class SequenceToSequenceSample(ISample):
     Attributes:
         labels (SequenceLabelAnnotation): The annotation object that contains the sequence label(s) for the text.
     """
+
+    __slots__ = ()
     
     def __init__(self, text: str) -> None:
         """
@@ -1,2 +1,6 @@
 from .random_selector import RandomSampleSelector
+from .uncertainty_selector import UncertaintySampleSelector
+from .diversity_selector import DiversitySampleSelector
+from .reservoir_selector import ReservoirSampleSelector
+from .stratified_selector import StratifiedSampleSelector
 from .selector_factory import SelectorFactory
\ No newline at end of file
@@ -0,0 +1,220 @@
+from random import Random
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from i_entities import ISample
+from i_entities import ISampleSelector
+from model.hashing_vectorizer import HashingEmbedder
+from utils.embedding_store import EmbeddingStore
+
+
+def k_center_greedy(candidates: np.ndarray, centers: np.ndarray, k: int, seed: int = None,
+                    chunk_size: int = 1024) -> List[int]:
+    """
+    Selects `k` candidates with the greedy k-center algorithm.
+
+    Each step selects the candidate that is the farthest from its nearest center, and adds it to the
+    centers. Distances are squared Euclidean distances, updated with one matrix-vector product per step.
+
+    Args:
+        candidates (np.ndarray): A `(n, d)` float32 matrix of candidate embeddings.
+        centers (np.ndarray): A `(m, d)` float32 matrix of the embeddings already covered (may be empty).
+        k (int): The number of candidates to select.
+        seed (int, optional): The seed used to choose the first candidate when there are no centers.
+        chunk_size (int): The number of centers compared at once with blocks of candidates. Defaults to 1024.
+
+    Returns:
+        List[int]: The indices of the selected candidates, in selection order.
+    """
+    k = min(k, len(candidates))
+    if k == 0:
+        return []
+    squared_norms = np.einsum('ij,ij->i', candidates, candidates)
+    min_distances = np.full(len(candidates), np.inf, dtype=np.float32)
+    for start in range(0, len(centers), chunk_size):
+        chunk = centers[start:start + chunk_size]
+        chunk_norms = np.einsum('ij,ij->i', chunk, chunk)
+        # Compare the chunk with blocks of candidates, bounding the memory of the distance matrix
+        for row in range(0, len(candidates), chunk_size * 16):
+            block = slice(row, row + chunk_size * 16)
+            distances = squared_norms[block, None] + chunk_norms[None, :] - 2 * (candidates[block] @ chunk.T)
+            np.minimum(min_distances[block], distances.min(axis=1), out=min_distances[block])
+
+    selected = []
+    if not len(centers):
+        first = Random(seed).randrange(len(candidates))
+        selected.append(first)
+        min_distances = squared_norms + squared_norms[first] - 2 * (candidates @ candidates[first])
+        min_distances[first] = -np.inf
+    while len(selected) < k:
+        index = int(np.argmax(min_distances))
+        selected.append(index)
+        distances = squared_norms + squared_norms[index] - 2 * (candidates @ candidates[index])
+        np.minimum(min_distances, distances, out=min_distances)
+        min_distances[index] = -np.inf  # Never select a candidate twice, even with duplicates
+    return selected
+
+
+class EmbeddingCache:
+    """
+    An in-memory float32 embedding matrix indexed by sample id, grown as new samples are embedded.
+
+    Attributes:
+        dimensions (int): The number of dimensions of the embeddings.
+    """
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+        self._index: Dict[Any, int] = {}
+        self._matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self._rows = 0
+
+    def __contains__(self, sample_id: Any) -> bool:
+        return sample_id in self._index
+
+    def add(self, sample_ids: List[Any], embeddings: np.ndarray):
+        """Appends the embeddings of new samples, growing the matrix geometrically."""
+        if self._rows + len(sample_ids) > len(self._matrix):
+            capacity = max(self._rows + len(sample_ids), 2 * len(self._matrix))
+            matrix = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            matrix[:self._rows] = self._matrix[:self._rows]
+            self._matrix = matrix
+        self._matrix[self._rows:self._rows + len(sample_ids)] = embeddings
+        for sample_id in sample_ids:
+            self._index[sample_id] = self._rows
+            self._rows += 1
+
+    def get(self, sample_ids: List[Any]) -> np.ndarray:
+        """Returns the `(len(sample_ids), dimensions)` embeddings of samples that are all in the cache."""
+        return self._matrix[[self._index[sample_id] for sample_id in sample_ids]]
+
+
+class DiversitySampleSelector(ISampleSelector):
+    """
+    A sample selector that selects pending samples that are far from each other and from the validated samples.
+
+    Each sample is represented by a float32 embedding, computed with a hashing embedder or with the model of
+    the latest iteration, and the samples are chosen with the greedy k-center algorithm, using the validated
+    samples as initial centers. This avoids selecting near-identical texts in the same iteration.
+
+    Embeddings are cached across iterations. Hashing embeddings never change, so each sample is embedded once;
+    model embeddings are recomputed when the model changes. When `embedding-store` is configured, the hashing
+    embeddings are kept in a memory-mapped `EmbeddingStore`, filled when the samples are uploaded and shared
+    by all the processes, instead of an in-memory cache.
+
+    Parameters (`selector-params`):
+        embedding (str): `hashing` or `model`. Defaults to `hashing`.
+        dimensions (int): The number of dimensions of the hashing embeddings. Defaults to 128.
+        pool-size (int): The maximum number of pending samples considered per selection. Defaults to all of them.
+        max-centers (int): The maximum number of validated samples used as initial centers. Defaults to 1000.
+        batch-size (int): The number of samples embedded at once. Defaults to 1024.
+        seed (int): The seed of the subsampling. Defaults to None.
+        embedding-store (dict): The `path` and `dimensions` of the embedding store, from the `embedding-store`
+                                configuration. Defaults to None.
+    """
+
+    _caches: Dict[str, EmbeddingCache] = {}  # Embedding version -> cache
+    _stores: Dict[Tuple[str, str], EmbeddingStore] = {}  # (path, version) -> opened store
+
+    @classmethod
+    def hashing_store(cls, settings: dict) -> Tuple[EmbeddingStore, HashingEmbedder]:
+        """
+        Opens the embedding store of the hashing embeddings.
+
+        Args:
+            settings (dict): The `embedding-store` configuration, with a `path` and a number of `dimensions`.
+
+        Returns:
+            Tuple[EmbeddingStore, HashingEmbedder]: The store, refreshed with the rows appended by other
+                                                    processes, and the embedder of its embeddings.
+        """
+        embedder = HashingEmbedder(settings.get('dimensions', 128))
+        key = (settings['path'], embedder.version)
+        store = cls._stores.get(key)
+        if store is None:
+            store = cls._stores[key] = EmbeddingStore(settings['path'], embedder.vectorizer.n_features, embedder.version)
+        else:
+            store.refresh()
+        return store, embedder
+
+    @classmethod
+    def index_samples(cls, settings: dict, samples: List[ISample], batch_size: int = 1024):
+        """
+        Appends the hashing embeddings of new samples to the embedding store.
+
+        Args:
+            settings (dict): The `embedding-store` configuration.
+            samples (List[ISample]): The samples, with their ids.
+            batch_size (int): The number of samples embedded at once. Defaults to 1024.
+        """
+        store, embedder = cls.hashing_store(settings)
+        missing = [sample for sample in samples if sample._id not in store]
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            store.add([sample._id for sample in batch], embedder.embed(sample.text for sample in batch))
+
+    def _embedder(self) -> Tuple[str, Any]:
+        """Returns the version of the embeddings and the function computing them."""
+        if self.params.get('embedding', 'hashing') == 'model' and self.model is not None:
+            return f'model-{self.model.id}', self.model.embed
+        embedder = HashingEmbedder(self.params.get('dimensions', 128))
+        return embedder.version, lambda samples: embedder.embed(sample.text for sample in samples)
+
+    def embeddings(self, samples: List[ISample]) -> np.ndarray:
+        """
+        Returns the embeddings of the samples, computing only the ones that are not cached.
+
+        Args:
+            samples (List[ISample]): The samples to embed.
+
+        Returns:
+            np.ndarray: A `(len(samples), dimensions)` float32 matrix.
+        """
+        version, embed = self._embedder()
+        batch_size = self.params.get('batch-size', 1024)
+        settings = self.params.get('embedding-store')
+        if settings and version.startswith('hashing-'):
+            self.index_samples(settings, samples, batch_size)
+            store, _ = self.hashing_store(settings)
+            return store.get([sample._id for sample in samples])
+        cache = self._caches.get(version)
+        missing = [sample for sample in samples if cache is None or sample._id not in cache]
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = np.asarray(embed(batch), dtype=np.float32)
+            if cache is None:
+                # Embeddings of older models are not reused
+                for key in [key for key in self._caches if key.startswith('model-')]:
+                    del self._caches[key]
+                cache = self._caches[version] = EmbeddingCache(vectors.shape[1])
+            cache.add([sample._id for sample in batch], vectors)
+        if cache is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return cache.get([sample._id for sample in samples])
+
+    def select(self, sample_size: int = 100):
+        """
+        Selects `sample_size` diverse pending samples.
+
+        Args:
+            sample_size (int): The number of samples to select. Defaults to 100.
+
+        Returns:
+            list: The selected samples, in selection order.
+        """
+        samples = self.pending_samples()
+        if len(samples) <= sample_size:
+            return samples
+        random = Random(self.params.get('seed'))
+        pool_size = self.params.get('pool-size')
+        if pool_size and len(samples) > max(pool_size, sample_size):
+            samples = random.sample(samples, max(pool_size, sample_size))
+
+        validated = self.dao.getGoldenSamples(True) + self.dao.getGoldenSamples(False)
+        max_centers = self.params.get('max-centers', 1000)
+        if len(validated) > max_centers:
+            validated = random.sample(validated, max_centers)
+
+        candidates = self.embeddings(samples)
+        centers = self.embeddings(validated) if validated else np.zeros((0, candidates.shape[1]), dtype=np.float32)
+        selected = k_center_greedy(candidates, centers, sample_size, self.params.get('seed'))
+        return [samples[index] for index in selected]
@@ -6,8 +6,8 @@ class RandomSampleSelector(ISampleSelector):
     A sample selector that selects samples randomly.
 
     This class implements the `ISampleSelector` interface and selects a given number of 
-    samples at random from the pool of pending samples. It uses Python's built-in `random.choices()`
-    method to perform the random selection.
+    distinct samples at random from the pool of pending samples. It uses Python's built-in `random.sample()`
+    method to perform the random selection, seeded with the `seed` selector parameter when it is set.
 
     Attributes:
         dao (IDAO): The data access object used to retrieve the pending samples from the data store.
@@ -21,7 +21,7 @@ class RandomSampleSelector(ISampleSelector):
         Selects a specified number of samples randomly.
 
         This method retrieves the list of pending samples from the data access object and selects
-        a given number of samples at random using the `random.choices()` method. It returns the
+        a given number of distinct samples at random using the `random.sample()` method. It returns the
         selected samples.
 
         Args:
@@ -30,7 +30,7 @@ class RandomSampleSelector(ISampleSelector):
         Returns:
             list: A list of randomly selected samples from the pool of pending samples.
         """
-        samples = self.dao.getPendingSamples()
+        samples = self.pending_samples()
         if len(samples)<= sample_size:
             return samples
-        return Random().choices(samples, k=sample_size)
+        return Random(self.params.get('seed')).sample(samples, sample_size)
@@ -0,0 +1,74 @@
+import math
+from itertools import islice
+from random import Random
+from typing import Any, Iterable, List
+from i_entities import ISampleSelector
+
+
+def reservoir_sample(items: Iterable[Any], k: int, random: Random = None) -> List[Any]:
+    """
+    Draws `k` distinct items uniformly from a stream of unknown length in a single pass.
+
+    Implements Algorithm L (Li, 1994): instead of drawing a random number for every item, it computes
+    how many items to skip before the next replacement, so the number of random draws grows with
+    `k * log(n / k)` rather than `n`. Only the `k` items of the reservoir are kept in memory.
+
+    Args:
+        items (Iterable[Any]): The stream of items.
+        k (int): The number of items to draw.
+        random (Random, optional): The random number generator. Defaults to an unseeded generator.
+
+    Returns:
+        List[Any]: The drawn items, or all the items when the stream has at most `k` items.
+    """
+    random = random or Random()
+    items = iter(items)
+    reservoir = list(islice(items, k))
+    if k <= 0 or len(reservoir) < k:
+        return reservoir
+
+    def uniform() -> float:
+        """Draws a number in the open interval (0, 1)."""
+        value = random.random()
+        while value == 0.0:
+            value = random.random()
+        return value
+
+    weight = math.exp(math.log(uniform()) / k)
+    while True:
+        skip = math.floor(math.log(uniform()) / math.log(1.0 - weight))
+        item = next(islice(items, skip, skip + 1), reservoir)  # The reservoir itself marks the end of the stream
+        if item is reservoir:
+            return reservoir
+        reservoir[random.randrange(k)] = item
+        weight *= math.exp(math.log(uniform()) / k)
+
+
+class ReservoirSampleSelector(ISampleSelector):
+    """
+    A sample selector that selects distinct random samples from a pending pool of any size.
+
+    The ids of the pending samples are streamed from a projected database cursor and drawn with reservoir
+    sampling, so the pool is never loaded in memory: at most `sample_size` ids are kept, and only the
+    selected samples are fetched in full.
+
+    Parameters (`selector-params`):
+        seed (int): The seed of the random draws, for reproducible selections. Defaults to None.
+        batch-size (int): The number of ids fetched per cursor batch. Defaults to 1024.
+    """
+
+    def select(self, sample_size: int = 100):
+        """
+        Selects `sample_size` distinct pending samples uniformly at random.
+
+        Args:
+            sample_size (int): The number of samples to select. Defaults to 100.
+
+        Returns:
+            list: The selected samples, or all the pending samples when there are at most `sample_size`.
+        """
+        ids = reservoir_sample(self.pending_sample_ids(self.params.get('batch-size', 1024)),
+                               sample_size, Random(self.params.get('seed')))
+        position = {sample_id: index for index, sample_id in enumerate(ids)}
+        # The order of the database is not guaranteed, the order of the draws is
+        return sorted(self.dao.getSamples(ids), key=lambda sample: position[sample._id])
@@ -1,6 +1,10 @@
 from typing import Type
 from i_entities import ISampleSelector
 from .random_selector import RandomSampleSelector
+from .uncertainty_selector import UncertaintySampleSelector
+from .diversity_selector import DiversitySampleSelector
+from .reservoir_selector import ReservoirSampleSelector
+from .stratified_selector import StratifiedSampleSelector
 from utils.config_loader import ConfigLoader
 
 
@@ -32,7 +36,11 @@ class SelectorFactory:
         """
         self.config = config
         self.selector = {
-            RandomSampleSelector.__name__: RandomSampleSelector
+            RandomSampleSelector.__name__: RandomSampleSelector,
+            UncertaintySampleSelector.__name__: UncertaintySampleSelector,
+            DiversitySampleSelector.__name__: DiversitySampleSelector,
+            ReservoirSampleSelector.__name__: ReservoirSampleSelector,
+            StratifiedSampleSelector.__name__: StratifiedSampleSelector
         }
     
     def get_selector(self) -> Type[ISampleSelector]:
@@ -0,0 +1,83 @@
+from random import Random
+from typing import Any, Dict, List
+from i_entities import ISample
+from i_entities import ISampleSelector
+from .reservoir_selector import reservoir_sample
+
+
+class StratifiedSampleSelector(ISampleSelector):
+    """
+    A sample selector that balances the labels predicted in each batch, so rare labels are learned sooner.
+
+    The selector relies on a label index, kept by the DAO, of the labels predicted for the pending samples
+    and of the number of pending samples predicted to contain each label. The index is updated whenever
+    model annotations are persisted or samples are validated, and by the selector itself, which predicts
+    the labels of up to `index-size` pending samples that are not indexed yet at each selection.
+
+    A batch is filled label by label, from the label with the fewest pending samples to the most common
+    one, until each label reaches its quota; a sample counts towards every label it contains. The rest of
+    the batch is filled with random pending samples. Before any model has been fine-tuned, the index is
+    empty and samples are selected randomly.
+
+    Parameters (`selector-params`):
+        label-quotas (Dict[str, int]): The number of samples to select for each label. Defaults to an equal
+                                       share of the batch for every indexed label.
+        index-size (int): The maximum number of pending samples indexed per selection. Defaults to 1000.
+        batch-size (int): The number of samples annotated per model call. Defaults to 1024.
+        seed (int): The seed of the random draws. Defaults to None.
+    """
+
+    def update_index(self):
+        """Predicts the labels of up to `index-size` pending samples that are not in the label index."""
+        if self.model is None:
+            return
+        batch_size = self.params.get('batch-size', 1024)
+        ids = self.dao.sampleUnindexedSampleIds(self.params.get('index-size', 1000), self.params.get('seed'))
+        for start in range(0, len(ids), batch_size):
+            samples = self.dao.getSamples(ids[start:start + batch_size])
+            self.dao.indexLabels(self.model.generateAnnotation(samples, None))
+
+    def quotas(self, totals: Dict[str, int], sample_size: int) -> Dict[str, int]:
+        """Returns the number of samples to select for each label."""
+        quotas = self.params.get('label-quotas')
+        if quotas:
+            return {label: quota for label, quota in quotas.items() if totals.get(label)}
+        if not totals:
+            return {}
+        return {label: max(sample_size // len(totals), 1) for label in totals}
+
+    def select(self, sample_size: int = 100):
+        """
+        Selects `sample_size` pending samples, meeting the quota of each label when possible.
+
+        Args:
+            sample_size (int): The number of samples to select. Defaults to 100.
+
+        Returns:
+            list: The selected samples, the samples selected for the rarest labels first.
+        """
+        self.update_index()
+        totals = self.dao.getLabelTotals()
+        quotas = self.quotas(totals, sample_size)
+        filled: Dict[str, int] = {}
+        selected: List[Any] = []
+        for label in sorted(quotas, key=lambda label: totals[label]):
+            missing = quotas[label] - filled.get(label, 0)
+            if missing <= 0 or len(selected) >= sample_size:
+                continue
+            excluded = selected + list(self.exclude)
+            for sample_id, counts in self.dao.getLabelIndexEntries(label, min(missing, sample_size - len(selected)), excluded):
+                selected.append(sample_id)
+                for other in counts:
+                    filled[other] = filled.get(other, 0) + 1
+
+        # Entries of samples validated elsewhere are skipped, the batch is completed randomly
+        samples: List[ISample] = [sample for sample in self.dao.getSamples(selected) if not sample.validated]
+        position = {sample_id: index for index, sample_id in enumerate(selected)}
+        samples.sort(key=lambda sample: position[sample._id])
+        if len(samples) < sample_size:
+            chosen = {sample._id for sample in samples}
+            ids = reservoir_sample((sample_id for sample_id in self.pending_sample_ids(self.params.get('batch-size', 1024))
+                                    if sample_id not in chosen), sample_size - len(samples), Random(self.params.get('seed')))
+            samples.extend(self.dao.getSamples(ids))
+        return samples
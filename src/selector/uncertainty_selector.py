@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from random import Random
+from typing import Any, Dict, List
+import numpy as np
+from i_entities import ISample
+from i_entities import ISampleSelector
+from .random_selector import RandomSampleSelector
+
+LEAST_CONFIDENCE = 'least-confidence'
+MARGIN = 'margin'
+ENTROPY = 'entropy'
+
+
+def uncertainty(probabilities: np.ndarray, strategy: str = LEAST_CONFIDENCE) -> np.ndarray:
+    """
+    Computes the uncertainty of each row of a probability matrix.
+
+    Args:
+        probabilities (np.ndarray): A `(n_samples, n_outcomes)` matrix of probabilities.
+        strategy (str): `least-confidence` (1 - highest probability), `margin` (1 - difference between
+                        the two highest probabilities) or `entropy`. Defaults to `least-confidence`.
+
+    Returns:
+        np.ndarray: The uncertainty of each sample, higher is more uncertain. A matrix without outcomes,
+                    e.g. the predictions of an untrained model, is fully uncertain.
+
+    Raises:
+        ValueError: If the strategy is not known.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    if strategy in (LEAST_CONFIDENCE, MARGIN, ENTROPY) and probabilities.shape[1] == 0:
+        return np.ones(len(probabilities))
+    if strategy == LEAST_CONFIDENCE:
+        return 1.0 - probabilities.max(axis=1)
+    if strategy == MARGIN:
+        if probabilities.shape[1] < 2:
+            return np.zeros(len(probabilities))
+        top_two = np.partition(probabilities, -2, axis=1)[:, -2:]
+        return 1.0 - (top_two[:, 1] - top_two[:, 0])
+    if strategy == ENTROPY:
+        return -(probabilities * np.log(np.clip(probabilities, 1e-12, None))).sum(axis=1)
+    raise ValueError(f'"{strategy}" is not a valid uncertainty strategy')
+
+
+class UncertaintySampleSelector(ISampleSelector):
+    """
+    A sample selector that selects the pending samples the model is the most uncertain about.
+
+    The pending samples are scored with the model of the latest iteration in batches, using its
+    `predict_proba` method, and the uncertainty is computed with vectorized NumPy operations. The
+    `sample_size` most uncertain samples are then found with a partial sort.
+
+    Scores are cached per model id, so repeated selections with the same model only score the samples
+    that were not scored yet. For large pools, only a random subsample of `pool-size` samples is scored.
+    Before any model has been fine-tuned, samples are selected randomly.
+
+    Parameters (`selector-params`):
+        strategy (str): `least-confidence`, `margin` or `entropy`. Defaults to `least-confidence`.
+        batch-size (int): The number of samples scored per model call. Defaults to 1024.
+        pool-size (int): The maximum number of pending samples scored per selection. Defaults to all of them.
+        cached-models (int): The number of models whose scores are kept in the cache. Defaults to 2.
+        seed (int): The seed of the pool subsampling. Defaults to None.
+    """
+
+    _score_cache: 'OrderedDict[Any, Dict[Any, float]]' = OrderedDict()  # model id -> sample id -> uncertainty
+
+    def _cached_scores(self) -> Dict[Any, float]:
+        """Returns the score cache of the current model, evicting the oldest models."""
+        if self.model.id is None:
+            return {}
+        cache = self._score_cache.setdefault(self.model.id, {})
+        self._score_cache.move_to_end(self.model.id)
+        while len(self._score_cache) > self.params.get('cached-models', 2):
+            self._score_cache.popitem(last=False)
+        return cache
+
+    def score(self, samples: List[ISample]) -> np.ndarray:
+        """
+        Computes the uncertainty of the model on the samples, reusing the cached scores.
+
+        Args:
+            samples (List[ISample]): The samples to score.
+
+        Returns:
+            np.ndarray: The uncertainty of each sample.
+        """
+        strategy = self.params.get('strategy', LEAST_CONFIDENCE)
+        batch_size = self.params.get('batch-size', 1024)
+        cache = self._cached_scores()
+
+        missing = [sample for sample in samples if sample._id not in cache]
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            scores = uncertainty(self.model.predict_proba(batch), strategy)
+            cache.update(zip((sample._id for sample in batch), scores.tolist()))
+        return np.fromiter((cache[sample._id] for sample in samples), dtype=np.float64, count=len(samples))
+
+    def select(self, sample_size: int = 100):
+        """
+        Selects the `sample_size` pending samples with the highest uncertainty.
+
+        Args:
+            sample_size (int): The number of samples to select. Defaults to 100.
+
+        Returns:
+            list: The selected samples, the most uncertain first.
+        """
+        if self.model is None:
+            return RandomSampleSelector(self.dao, params=self.params, exclude=self.exclude).select(sample_size)
+
+        samples = self.pending_samples()
+        if len(samples) <= sample_size:
+            return samples
+        pool_size = self.params.get('pool-size')
+        if pool_size and len(samples) > max(pool_size, sample_size):
+            samples = Random(self.params.get('seed')).sample(samples, max(pool_size, sample_size))
+
+        scores = self.score(samples)
+        top = np.argpartition(-scores, sample_size - 1)[:sample_size]
+        top = top[np.argsort(-scores[top])]
+        return [samples[index] for index in top]
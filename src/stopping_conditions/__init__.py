@@ -1 +1,3 @@
-from .acceptance_rate import AcceptanceRateCondition
\ No newline at end of file
+from .acceptance_rate import AcceptanceRateCondition
+from .prediction_stability import PredictionStabilityCondition
+from .stop_condition_factory import StopConditionFactory
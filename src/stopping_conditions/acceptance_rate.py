@@ -1,6 +1,7 @@
-from typing import Any, List
+from typing import List
 from i_entities import IStopCondition
 from i_entities import IAnnotation
+from i_entities import Iteration
 
 class AcceptanceRateCondition(IStopCondition):
     """
@@ -16,7 +17,7 @@ class AcceptanceRateCondition(IStopCondition):
         params (dict): A dictionary containing the stopping condition parameters, including the threshold.
     """
     
-    def evaluate(self, iteration_id: Any) -> bool:
+    def evaluate(self, iteration: Iteration) -> bool:
         """
         Evaluates whether the stopping condition based on the acceptance rate is met for the given iteration.
 
@@ -26,7 +27,7 @@ class AcceptanceRateCondition(IStopCondition):
         threshold, the condition is met, and the method returns `True`; otherwise, it returns `False`.
 
         Args:
-            iteration_id (Any): The ID of the iteration for which to evaluate the stopping condition.
+            iteration (Iteration): The iteration for which to evaluate the stopping condition.
 
         Returns:
             bool: `True` if the acceptance rate meets or exceeds the threshold, `False` otherwise.
@@ -38,8 +39,10 @@ class AcceptanceRateCondition(IStopCondition):
             raise ValueError('threshold parameter not set for AcceptanceRateCondition')
 
         # Retrieve all evaluation annotations for the given iteration
-        evals: List[IAnnotation] = self.dao.getIterationAnnotations(iteration_id)
-        
+        evals: List[IAnnotation] = self.dao.getIterationAnnotations(iteration._id)
+        if not evals:
+            return False
+
         # Calculate the number of accepted annotations (valid ones)
         accepted = [item for item in evals if item.is_valid]
         
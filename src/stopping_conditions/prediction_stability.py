@@ -0,0 +1,185 @@
+import threading
+from random import Random
+from typing import Any, Dict, List
+import numpy as np
+from i_entities import IStopCondition
+from i_entities import ISample
+from i_entities import Iteration
+from annotation import SpanArray
+
+SPAN_DTYPE = np.dtype([('sample', np.int32), ('start', np.int32), ('end', np.int32), ('label', np.int32)])
+
+
+class ProbeSet:
+    """
+    The probe samples of an experiment, with the predictions of the newest model evaluated on them.
+
+    The state of the probe set is saved through the DAO, so that it survives restarts and is shared by the
+    processes of the experiment: only the samples are kept in memory between two evaluations.
+
+    Attributes:
+        sample_ids (List[Any]): The ids of the probe samples, fixed once drawn.
+        samples (List[ISample]): The probe samples, in the order of their ids.
+        labels (Dict[str, int]): The code of each predicted label.
+        previous_model_id (Any): The model of the latest evaluated iteration.
+        predictions (np.ndarray): The encoded spans predicted by the previous model, or None.
+        agreements (List[float]): The agreement between the models of each pair of consecutive iterations.
+        lock (threading.Lock): Guards the label codes, the predictions and the agreements, not the annotation.
+    """
+
+    def __init__(self, sample_ids: List[Any], samples: List[ISample]) -> None:
+        by_id = {sample._id: sample for sample in samples}
+        self.sample_ids = list(sample_ids)
+        self.samples = [by_id[id] for id in self.sample_ids if id in by_id]
+        self.labels: Dict[str, int] = {}
+        self.previous_model_id: Any = None
+        self.predictions: np.ndarray = None
+        self.agreements: List[float] = []
+        self.lock = threading.Lock()
+
+    def load(self, document: Dict[str, Any]):
+        """Replaces the state of the probe set with the state saved by the DAO."""
+        self.labels = {label: code for code, label in enumerate(document.get('labels') or [])}
+        self.previous_model_id = document.get('previous_model_id')
+        predictions = document.get('predictions')
+        self.predictions = np.frombuffer(predictions, dtype=SPAN_DTYPE) if predictions is not None else None
+        self.agreements = list(document.get('agreements') or [])
+
+    def dump(self) -> Dict[str, Any]:
+        """Returns the state of the probe set saved by the DAO, the labels ordered by code."""
+        return {'labels': sorted(self.labels, key=self.labels.get), 'previous_model_id': self.previous_model_id,
+                'predictions': self.predictions.tobytes() if self.predictions is not None else None,
+                'agreements': self.agreements}
+
+    def encode(self, samples: List[ISample]) -> np.ndarray:
+        """
+        Encodes the predictions of a model as a sorted array of (sample, start, end, label) records.
+        A classification is encoded as a span of the whole sample. The columns of a `SpanArray` are encoded at once.
+        """
+        records, blocks = [], []
+        for index, sample in enumerate(samples):
+            value = sample.labels.get_value() if sample.labels is not None else None
+            if isinstance(value, SpanArray):
+                codes = np.array([self.labels.setdefault(label, len(self.labels)) for label in value.vocabulary], dtype=np.int32)
+                block = np.empty(len(value), dtype=SPAN_DTYPE)
+                block['sample'], block['start'], block['end'] = index, value.starts, value.ends
+                block['label'] = codes[value.label_ids]
+                blocks.append(block)
+            elif isinstance(value, (list, tuple)):
+                records.extend((index, start, end, self.labels.setdefault(label, len(self.labels)))
+                               for start, end, label in value)
+            elif value is not None:
+                records.append((index, 0, 0, self.labels.setdefault(str(value), len(self.labels))))
+        blocks.append(np.array(records, dtype=SPAN_DTYPE))
+        return np.unique(np.concatenate(blocks))
+
+
+def span_agreement(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    Returns the span-level F1 agreement of two encoded predictions: twice the number of spans predicted
+    by both, over the total number of predicted spans. Two empty predictions fully agree.
+    """
+    total = len(first) + len(second)
+    if total == 0:
+        return 1.0
+    return 2 * len(np.intersect1d(first, second, assume_unique=True)) / total
+
+
+class PredictionStabilityCondition(IStopCondition):
+    """
+    A stopping condition met when the predictions of the models stop changing from an iteration to the next.
+
+    A probe set of `probe-size` pending samples is drawn once per experiment, with the `seed` parameter.
+    After each iteration, only the model of the new iteration annotates the probe set, and its predictions
+    are cached. Their agreement with the predictions of the previous model is the span-level F1 score of
+    one against the other. The condition is met when the last `patience` agreements all reach `threshold`,
+    or, when `min-delta` is set, when they vary by less than `min-delta`, i.e. the agreement has plateaued.
+
+    The probe set, the predictions of the newest model and the agreements are saved through the DAO, so that
+    a restarted process or another worker goes on from the saved state and only annotates the probe set with
+    the models it has not seen. The samples of the probe sets are cached by the conditions of the process, each
+    with a lock held to read and update its state but not while the model annotates the probe set.
+
+    Attributes:
+        dao (IDAO): The data access object used to draw the probe set and load the models.
+        params (dict): The `probe-size`, `threshold`, `patience`, `min-delta` and `seed` parameters.
+        model_class (Type[IModel]): The class of the models of the iterations.
+        model_params (dict): The keyword arguments of the model class.
+    """
+
+    _probes: Dict[Any, ProbeSet] = {}  # The probe set of each experiment
+
+    def probe(self) -> ProbeSet:
+        """
+        Returns the probe set of the experiment with its saved state, drawing it from the pending samples on
+        first use. When two conditions draw it at the same time, the first probe set saved is kept.
+        """
+        document = self.dao.getProbe()
+        if document is None:
+            ids = list(self.dao.iterPendingSampleIds())
+            size = min(self.params.get('probe-size', 500), len(ids))
+            ids = Random(self.params.get('seed')).sample(ids, size)
+            document = self.dao.createProbe(ids)
+        experiment = getattr(self.dao, 'experiment_id', None)
+        probe = self._probes.get(experiment)
+        if probe is None or probe.sample_ids != document['sample_ids']:
+            probe = ProbeSet(document['sample_ids'], self.dao.getSamples(document['sample_ids']))
+            self._probes[experiment] = probe
+        with probe.lock:
+            probe.load(document)
+        return probe
+
+    def evaluate(self, iteration: Iteration) -> bool:
+        """
+        Annotates the probe set with the model of the iteration and evaluates whether the predictions are stable.
+
+        Args:
+            iteration (Iteration): The latest completed iteration.
+
+        Returns:
+            bool: `True` if the agreement between consecutive models has reached the threshold or plateaued.
+
+        Raises:
+            ValueError: If the class of the models is not set.
+        """
+        if self.model_class is None:
+            raise ValueError('model class not set for PredictionStabilityCondition')
+        if iteration is None or iteration.model_id is None:
+            return False
+        probe = self.probe()
+        if not probe.samples:
+            return False
+        with probe.lock:
+            cached = iteration.model_id == probe.previous_model_id
+        if not cached:
+            model = self.dao.loadModel(self.model_class, iteration.model_id, self.model_params)
+            annotated = model.generateAnnotation(probe.samples, None)
+            self.compare(probe, iteration.model_id, annotated)
+        with probe.lock:
+            patience = self.params.get('patience', 3)
+            window = probe.agreements[-patience:]
+        if len(window) < patience:
+            return False
+        if min(window) >= self.params.get('threshold', 0.99):
+            return True
+        min_delta = self.params.get('min-delta')
+        return min_delta is not None and max(window) - min(window) < min_delta
+
+    def compare(self, probe: ProbeSet, model_id: Any, annotated: List[ISample]):
+        """
+        Records the agreement of the predictions of a model with the predictions of the previous model, and
+        saves the predictions in their place. When another condition saved the probe set meanwhile, the saved
+        state is reloaded and the predictions are compared with the model it evaluated instead.
+        """
+        with probe.lock:
+            while model_id != probe.previous_model_id:
+                previous_model_id, predictions = probe.previous_model_id, probe.predictions
+                encoded = probe.encode(annotated)
+                if predictions is not None:
+                    probe.agreements.append(span_agreement(predictions, encoded))
+                probe.previous_model_id, probe.predictions = model_id, encoded
+                if self.dao.updateProbe(probe.dump(), previous_model_id):
+                    if predictions is not None:
+                        print(f'Prediction agreement with the previous iteration: {probe.agreements[-1]:.4f}')
+                    return
+                probe.load(self.dao.getProbe())
@@ -0,0 +1,58 @@
+from typing import List, Type
+from i_entities import IDAO
+from i_entities import IModel
+from i_entities import IStopCondition
+from .acceptance_rate import AcceptanceRateCondition
+from .prediction_stability import PredictionStabilityCondition
+from utils.config_loader import ConfigLoader
+
+
+class StopConditionFactory:
+    """
+    A factory class to create the stopping conditions of the annotation process from the configuration.
+
+    The `stopping-conditions` configuration maps the name of each stopping condition to its parameters.
+    A condition whose `enabled` parameter is false is skipped.
+    The process stops as soon as one of the conditions is met.
+
+    Attributes:
+        config (ConfigLoader): The configuration loader that provides the stopping conditions.
+        conditions (dict): A dictionary mapping stopping condition names to stopping condition classes.
+    """
+
+    def __init__(self, config: ConfigLoader):
+        """
+        Initializes the StopConditionFactory with the provided configuration.
+
+        Args:
+            config (ConfigLoader): The configuration loader that contains the stopping conditions.
+        """
+        self.config = config
+        self.conditions = {
+            AcceptanceRateCondition.__name__: AcceptanceRateCondition,
+            PredictionStabilityCondition.__name__: PredictionStabilityCondition
+        }
+
+    def get_conditions(self, dao: IDAO, model_class: Type[IModel] = None, model_params: dict = None) -> List[IStopCondition]:
+        """
+        Returns the configured stopping conditions.
+
+        Args:
+            dao (IDAO): The data access object used by the conditions.
+            model_class (Type[IModel], optional): The class of the models of the iterations. Defaults to None.
+            model_params (dict, optional): The keyword arguments of the model class. Defaults to None.
+
+        Returns:
+            List[IStopCondition]: The enabled stopping conditions, empty when none is configured.
+
+        Raises:
+            ValueError: If a configured stopping condition is not recognized.
+        """
+        conditions = []
+        for name, params in (self.config.get('stopping-conditions') or {}).items():
+            if name not in self.conditions:
+                raise ValueError(f'Stopping condition "{name}" is not recognized by factory.')
+            if not (params or {}).get('enabled', True):
+                continue
+            conditions.append(self.conditions[name](dao, params or {}, model_class, model_params))
+        return conditions
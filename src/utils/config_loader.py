@@ -36,4 +36,15 @@ class ConfigLoader:
 
     def reload_config(self):
         """Reloads the configuration from the YAML file."""
-        self.load_config()
\ No newline at end of file
+        self.load_config()
+
+    def set(self, key, value):
+        """
+        Overrides a configuration value in memory, without changing the YAML file.
+
+        :param key: The key of the configuration value.
+        :param value: The new value.
+        """
+        if self.config is None:
+            raise Exception("Configuration has not been loaded.")
+        self.config[key] = value
@@ -0,0 +1,190 @@
+import contextlib
+import json
+import os
+from typing import Any, Dict, List
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Appends are not locked on platforms without fcntl
+    fcntl = None
+
+
+class EmbeddingStore:
+    """
+    An append-only, memory-mapped store of float32 embeddings indexed by sample id.
+
+    The embeddings are stored as raw float32 rows in `embeddings.f32`, and the sample id of each row is
+    stored on the same line number of `ids.txt`. The rows are read through a read-only memory map, so
+    several processes can read the same store without copying it into their memory, and new rows can be
+    appended while the store is being read.
+
+    The store is tied to the version of the embedding model in `meta.json`: opening the store with another
+    version or number of dimensions clears it, since the stored embeddings are not comparable anymore.
+
+    Attributes:
+        path (str): The directory of the store.
+        dimensions (int): The number of dimensions of the embeddings.
+        version (str): The version of the embedding model.
+    """
+
+    EMBEDDINGS = 'embeddings.f32'
+    IDS = 'ids.txt'
+    META = 'meta.json'
+    LOCK = '.lock'
+
+    def __init__(self, path: str, dimensions: int, version: str) -> None:
+        """
+        Opens the store, creating it or clearing it if its version does not match.
+
+        Args:
+            path (str): The directory of the store.
+            dimensions (int): The number of dimensions of the embeddings.
+            version (str): The version of the embedding model.
+        """
+        self.path = path
+        self.dimensions = dimensions
+        self.version = version
+        self._index: Dict[str, int] = {}
+        self._ids_offset = 0  # The number of bytes of the ids file already indexed
+        self._rows = 0
+        self._matrix = None
+        os.makedirs(path, exist_ok=True)
+        with self._lock():
+            self._check_version()
+        self.refresh()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        """Holds an exclusive lock on the store, serializing the writers of all processes."""
+        with open(self._file(self.LOCK), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _check_version(self):
+        """Clears the store if it was written by another embedding model."""
+        meta = {'version': self.version, 'dimensions': self.dimensions}
+        if os.path.exists(self._file(self.META)):
+            with open(self._file(self.META), 'r', encoding='utf-8') as file:
+                if json.load(file) == meta:
+                    return
+        for name in (self.EMBEDDINGS, self.IDS):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        with open(self._file(self.META), 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+
+    def refresh(self):
+        """Indexes the rows appended since the last refresh, including the ones appended by other processes."""
+        if not os.path.exists(self._file(self.IDS)):
+            return
+        with open(self._file(self.IDS), 'rb') as file:
+            file.seek(self._ids_offset)
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break  # A row being appended
+                self._index[line[:-1].decode('utf-8')] = self._rows
+                self._rows += 1
+                self._ids_offset += len(line)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __contains__(self, sample_id: Any) -> bool:
+        return str(sample_id) in self._index
+
+    def matrix(self) -> np.ndarray:
+        """
+        Returns the stored embeddings through a read-only memory map.
+
+        Returns:
+            np.ndarray: A `(len(self), dimensions)` float32 matrix, whose rows are ordered by insertion.
+        """
+        if self._matrix is None or len(self._matrix) != self._rows:
+            if self._rows == 0:
+                self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+            else:
+                self._matrix = np.memmap(self._file(self.EMBEDDINGS), dtype=np.float32, mode='r',
+                                         shape=(self._rows, self.dimensions))
+        return self._matrix
+
+    def rows(self, sample_ids: List[Any]) -> np.ndarray:
+        """
+        Returns the row of each sample in `matrix()`, or -1 for the samples that are not stored.
+
+        Args:
+            sample_ids (List[Any]): The sample ids.
+
+        Returns:
+            np.ndarray: The row indices.
+        """
+        return np.fromiter((self._index.get(str(sample_id), -1) for sample_id in sample_ids), dtype=np.int64, count=len(sample_ids))
+
+    def get(self, sample_ids: List[Any]) -> np.ndarray:
+        """
+        Returns the embeddings of samples that are all stored.
+
+        Args:
+            sample_ids (List[Any]): The sample ids.
+
+        Returns:
+            np.ndarray: A `(len(sample_ids), dimensions)` float32 matrix.
+
+        Raises:
+            KeyError: If a sample is not stored.
+        """
+        rows = self.rows(sample_ids)
+        if (rows < 0).any():
+            raise KeyError(f'{int((rows < 0).sum())} samples are not in the embedding store')
+        return self.matrix()[rows]
+
+    def add(self, sample_ids: List[Any], embeddings: np.ndarray):
+        """
+        Appends the embeddings of the samples that are not stored yet.
+
+        The rows are written before their ids, so a row is only visible to the readers once it is complete.
+        The partial rows and ids left by an interrupted append are dropped before appending.
+
+        Args:
+            sample_ids (List[Any]): The sample ids.
+            embeddings (np.ndarray): A `(len(sample_ids), dimensions)` matrix.
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.shape[1:] != (self.dimensions,):
+            raise ValueError(f'Expected embeddings of {self.dimensions} dimensions, got {embeddings.shape[1:]}')
+        with self._lock():
+            self.refresh()
+            batch = {}  # The row of the first occurrence of each new key, in order
+            for row, sample_id in enumerate(sample_ids):
+                key = str(sample_id)
+                if key not in self._index and key not in batch:
+                    batch[key] = row
+            keys, rows = list(batch), list(batch.values())
+            if not keys:
+                return
+            descriptor = os.open(self._file(self.EMBEDDINGS), os.O_RDWR | os.O_CREAT)
+            try:
+                # Drop the partial rows left by an interrupted append
+                os.ftruncate(descriptor, self._rows * self.dimensions * 4)
+                os.lseek(descriptor, 0, os.SEEK_END)
+                os.write(descriptor, embeddings[rows].tobytes())
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+            descriptor = os.open(self._file(self.IDS), os.O_RDWR | os.O_CREAT)
+            try:
+                # Drop the partial line left by an interrupted append, which would prefix the first new id
+                os.ftruncate(descriptor, self._ids_offset)
+                os.lseek(descriptor, 0, os.SEEK_END)
+                os.write(descriptor, ''.join(f'{key}\n' for key in keys).encode('utf-8'))
+            finally:
+                os.close(descriptor)
+            self.refresh()
@@ -0,0 +1,30 @@
+import zlib
+from typing import Any, List
+from i_entities import ISample
+
+
+def holdout_rank(sample_id: Any) -> int:
+    """Returns a stable pseudo-random rank of a sample in [0, 2**32), the same in every process."""
+    return zlib.crc32(str(sample_id).encode('utf-8'))
+
+
+def is_held_out(sample_id: Any, fraction: float) -> bool:
+    """Returns whether a sample belongs to the held-out fraction of the gold set."""
+    return holdout_rank(sample_id) < fraction * 2 ** 32
+
+
+def split_holdout(samples: List[ISample], fraction: float) -> tuple:
+    """
+    Splits gold samples into the training samples and the held-out samples, ordered by rank.
+
+    Args:
+        samples (List[ISample]): The gold samples.
+        fraction (float): The held-out fraction, 0 to hold out nothing.
+
+    Returns:
+        tuple: The training samples and the held-out samples.
+    """
+    training, held_out = [], []
+    for sample in samples:
+        (held_out if is_held_out(sample._id, fraction) else training).append(sample)
+    return training, sorted(held_out, key=lambda sample: holdout_rank(sample._id))
@@ -18,9 +18,10 @@ class DatasetLoader:
         sample_class (Type[ISample]): The class used to deserialize the data into sample objects.
         dataset (list): The list of sample objects after deserialization.
         annotated (bool): Flag indicating whether the dataset contains annotated data (default: False).
+        near_duplicates (NearDuplicateIndex): The index assigning the near-duplicate cluster of each sample (default: None).
     """
     
-    def __init__(self, file_path: str, sample_class: Type[ISample], annotated=False):
+    def __init__(self, file_path: str, sample_class: Type[ISample], annotated=False, near_duplicates=None):
         """
         Initializes the DatasetLoader with the file path and sample class.
 
@@ -28,12 +29,15 @@ class DatasetLoader:
             file_path (str): Path to the dataset file (either JSON or CSV).
             sample_class (Type[ISample]): The class used to convert raw data into sample objects.
             annotated (bool): A flag indicating whether the dataset contains annotations (default: False).
+            near_duplicates (NearDuplicateIndex, optional): The index assigning the near-duplicate cluster of 
+                                                            each sample, or None to skip the detection (default: None).
         """
         self.file_path = file_path
         self.raw_data = []
         self.sample_class = sample_class
         self.dataset = []
         self.annotated = annotated
+        self.near_duplicates = near_duplicates
 
     def load_dataset(self):
         """
@@ -41,7 +45,8 @@ class DatasetLoader:
 
         This method inspects the file extension of the given dataset file path. If the file is a JSON or CSV file,
         it calls the appropriate private method to load the data and then converts the raw data into instances of
-        the provided `sample_class`.
+        the provided `sample_class`. When a near-duplicate index is provided, the samples are assigned to their
+        near-duplicate clusters.
 
         Raises:
             ValueError: If the file format is neither JSON nor CSV.
@@ -56,6 +61,8 @@ class DatasetLoader:
         
         # Convert raw data into objects of the sample class
         self.dataset = [self._create_sample_from_data(data) for data in self.raw_data]
+        if self.near_duplicates is not None:
+            self.near_duplicates.assign(self.dataset)
 
     def _load_json(self):
         """
@@ -0,0 +1,198 @@
+import hashlib
+import re
+import uuid
+import zlib
+from typing import Any, Dict, List
+import numpy as np
+from i_entities import IDAO
+from i_entities import ISample
+
+WHITESPACE = re.compile(r'\s+')
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures of texts, whose agreement estimates the Jaccard similarity of their shingles.
+
+    Texts are normalized (lowercased, whitespace collapsed) and split into overlapping character shingles,
+    which are hashed once with CRC32. The `num_perm` permutations are simulated with multiply-shift hashes
+    applied to all the shingles of a text at once with NumPy.
+
+    Attributes:
+        num_perm (int): The number of hash functions, i.e. the length of the signatures.
+        shingle_size (int): The number of characters per shingle.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        random = np.random.default_rng(seed)
+        self._multipliers = random.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)  # Odd multipliers
+        self._increments = random.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Returns the distinct hashed shingles of a text."""
+        text = WHITESPACE.sub(' ', text.lower()).strip()
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(len(text) - size + 1, 1))}
+        return np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Computes the MinHash signature of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            np.ndarray: A `(num_perm,)` uint32 signature.
+        """
+        shingles = self.shingles(text)
+        with np.errstate(over='ignore'):  # The hashes are computed modulo 2 ** 64
+            hashes = (self._multipliers[:, None] * shingles[None, :] + self._increments[:, None]) >> np.uint64(32)
+        return hashes.min(axis=1).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    A persistent locality-sensitive hashing (LSH) index grouping near-duplicate samples into clusters.
+
+    Each sample text is summarized by a MinHash signature, split into `bands` bands. Two texts sharing a
+    band are candidate duplicates, and a candidate is accepted when the signatures estimate a Jaccard
+    similarity of at least `threshold`. Only the first sample of each cluster, its representative, is added
+    to the buckets, so the buckets stay small however many duplicates are uploaded.
+
+    The index is built incrementally during ingestion: `assign` sets the `cluster_id` of new samples before
+    they are saved, and persists the signatures of the new representatives and their buckets with the DAO.
+    Once an annotation of a cluster member is accepted, `propagate` transfers it to the pending members.
+
+    Attributes:
+        dao (IDAO): The data access object storing the clusters.
+        hasher (MinHasher): Computes the signatures.
+        bands (int): The number of LSH bands, which must divide the signature length.
+        threshold (float): The minimum estimated Jaccard similarity of near-duplicates.
+    """
+
+    ANNOTATOR = 'near-duplicate'  # Annotator of the propagated annotations
+
+    def __init__(self, dao: IDAO, num_perm: int = 128, bands: int = 16, shingle_size: int = 5,
+                 threshold: float = 0.8, seed: int = 1) -> None:
+        """
+        Initializes the index.
+
+        Args:
+            dao (IDAO): The data access object storing the clusters.
+            num_perm (int): The length of the signatures. Defaults to 128.
+            bands (int): The number of LSH bands. Defaults to 16.
+            shingle_size (int): The number of characters per shingle. Defaults to 5.
+            threshold (float): The minimum estimated Jaccard similarity of near-duplicates. Defaults to 0.8.
+            seed (int): The seed of the hash functions, which must not change once samples are indexed. Defaults to 1.
+
+        Raises:
+            ValueError: If `bands` does not divide `num_perm`.
+        """
+        if num_perm % bands:
+            raise ValueError('The number of bands must divide the signature length')
+        self.dao = dao
+        self.hasher = MinHasher(num_perm, shingle_size, seed)
+        self.bands = bands
+        self.threshold = threshold
+
+    @classmethod
+    def from_config(cls, config, dao: IDAO) -> 'NearDuplicateIndex':
+        """
+        Creates the index from the `near-duplicates` configuration section.
+
+        Args:
+            config (ConfigLoader): The configuration loader.
+            dao (IDAO): The data access object storing the clusters.
+
+        Returns:
+            NearDuplicateIndex: The index, or None if near-duplicate detection is disabled.
+        """
+        settings = config.get('near-duplicates') or {}
+        if not settings.get('enabled', False):
+            return None
+        return cls(dao, settings.get('num-perm', 128), settings.get('bands', 16), settings.get('shingle-size', 5),
+                   settings.get('threshold', 0.8))
+
+    def band_keys(self, signature: np.ndarray) -> List[str]:
+        """Returns the bucket key of each band of a signature."""
+        rows = len(signature) // self.bands
+        return [f'{band}:{hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).hexdigest()}'
+                for band in range(self.bands)]
+
+    def assign(self, samples: List[ISample]):
+        """
+        Sets the `cluster_id` of new samples, creating a cluster for each sample without a near-duplicate.
+
+        The buckets of the whole batch are fetched with one query, so a batch costs a constant number of
+        database round-trips.
+
+        Args:
+            samples (List[ISample]): The samples to index, before they are saved.
+        """
+        signatures = [self.hasher.signature(sample.text) for sample in samples]
+        keys = [self.band_keys(signature) for signature in signatures]
+        buckets: Dict[str, List[Any]] = self.dao.getBucketClusters(sorted({key for sample_keys in keys for key in sample_keys}))
+        candidates = {cluster_id for clusters in buckets.values() for cluster_id in clusters}
+        representatives: Dict[Any, np.ndarray] = {
+            cluster_id: np.frombuffer(signature, dtype=np.uint32)
+            for cluster_id, signature in self.dao.getClusterSignatures(list(candidates)).items()
+        }
+
+        new_clusters: Dict[Any, bytes] = {}
+        new_buckets: Dict[str, List[Any]] = {}
+        for sample, signature, sample_keys in zip(samples, signatures, keys):
+            cluster_id = None
+            sample_candidates = list({cluster for key in sample_keys for cluster in buckets.get(key, [])})
+            if sample_candidates:
+                # Estimated Jaccard similarity with every candidate at once
+                estimates = (np.stack([representatives[candidate] for candidate in sample_candidates]) == signature).mean(axis=1)
+                best = int(np.argmax(estimates))
+                if estimates[best] >= self.threshold:
+                    cluster_id = sample_candidates[best]
+            if cluster_id is None:
+                cluster_id = uuid.uuid4()
+                representatives[cluster_id] = signature
+                new_clusters[cluster_id] = signature.tobytes()
+                for key in sample_keys:
+                    # Later samples of the batch are compared with the new representative too
+                    buckets.setdefault(key, []).append(cluster_id)
+                    new_buckets.setdefault(key, []).append(cluster_id)
+            sample.cluster_id = cluster_id
+        if new_clusters:
+            self.dao.saveClusters(new_clusters, new_buckets)
+
+    def propagate(self, sample: ISample, iteration_id: Any = None) -> List[ISample]:
+        """
+        Transfers the accepted annotation of a sample to the pending members of its cluster.
+
+        The annotation is transferred with `IAnnotation.transfer`, which aligns it to the text of each member;
+        members it cannot be aligned to are left for the annotators.
+
+        Args:
+            sample (ISample): A validated sample of a cluster.
+            iteration_id (Any, optional): The iteration recorded on the transferred annotations. Defaults to None.
+
+        Returns:
+            List[ISample]: The members that were annotated and validated.
+        """
+        if sample.cluster_id is None or sample.labels is None:
+            return []
+        propagated = []
+        for member in self.dao.getClusterSamples(sample.cluster_id, validated=False):
+            if member._id == sample._id:
+                continue
+            annotation = sample.labels.transfer(sample.text, member.text, member._id)
+            if annotation is None:
+                continue
+            annotation.annotator = self.ANNOTATOR
+            annotation.iteration = iteration_id
+            annotation.is_valid = True
+            annotation._id = self.dao.saveAnnotation(annotation)
+            member.labels = annotation
+            member.validated = True
+            self.dao.saveSampleAnnotation(member)
+            propagated.append(member)
+        return propagated
@@ -0,0 +1,28 @@
+from typing import List, Tuple
+
+
+def label_segments(text: str, annotations: List[Tuple[int, int, str]]) -> list:
+    """
+    Splits a text into the segments displayed by `annotated_text`: the plain text between the spans,
+    as strings, and the labeled spans, as (span text, label) tuples.
+
+    Args:
+        text (str): The annotated text.
+        annotations (List[Tuple[int, int, str]]): The (start, end, label) spans, in order.
+
+    Returns:
+        list: The segments, in order.
+    """
+    segments = []
+    current_index = 0
+    for start, end, label in annotations:
+        # Add the plain text before the annotation
+        if start > current_index:
+            segments.append(text[current_index:start])
+        segments.append((text[start:end], label))
+        current_index = end
+
+    # Add remaining plain text after the last annotation
+    if current_index < len(text):
+        segments.append(text[current_index:])
+    return segments
@@ -0,0 +1,62 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from selector.diversity_selector import k_center_greedy
+
+
+def brute_force(candidates, centers, k, seed):
+    """The greedy k-center algorithm, recomputing every distance with nested loops."""
+    covered = [np.asarray(center, dtype=np.float64) for center in centers]
+    selected = []
+    if not covered:
+        selected.append(Random(seed).randrange(len(candidates)))
+        covered.append(np.asarray(candidates[selected[0]], dtype=np.float64))
+    while len(selected) < min(k, len(candidates)):
+        best, best_distance = None, -1.0
+        for index, candidate in enumerate(candidates):
+            if index in selected:
+                continue
+            distance = min(float(((np.asarray(candidate, dtype=np.float64) - center) ** 2).sum()) for center in covered)
+            if distance > best_distance:
+                best, best_distance = index, distance
+        selected.append(best)
+        covered.append(np.asarray(candidates[best], dtype=np.float64))
+    return selected
+
+
+def matrix(rows, seed):
+    return np.random.default_rng(seed).normal(size=(rows, 3)).astype(np.float32)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('centers', [0, 4])
+def test_matches_the_brute_force_greedy(seed, centers):
+    candidates, covered = matrix(30, seed), matrix(centers, seed + 100)
+
+    selected = k_center_greedy(candidates, covered, 8, seed=seed, chunk_size=3)
+
+    assert selected == brute_force(candidates, covered, 8, seed)
+
+
+def test_chunks_do_not_change_the_selection():
+    candidates, centers = matrix(100, 0), matrix(50, 1)
+
+    expected = k_center_greedy(candidates, centers, 10)
+    assert k_center_greedy(candidates, centers, 10, chunk_size=1) == expected
+    assert k_center_greedy(candidates, centers, 10, chunk_size=7) == expected
+
+
+def test_selects_each_candidate_once():
+    candidates = np.repeat(matrix(3, 0), 4, axis=0)  # Every candidate has three duplicates
+
+    selected = k_center_greedy(candidates, matrix(0, 0), 12, seed=0)
+
+    assert sorted(selected) == list(range(12))
+    assert len({tuple(candidates[index]) for index in selected[:3]}) == 3  # The distinct points come first
+
+
+@pytest.mark.parametrize('k, expected', [(0, 0), (5, 5), (50, 20)])
+def test_selects_at_most_k_candidates(k, expected):
+    assert len(k_center_greedy(matrix(20, 0), matrix(2, 1), k)) == expected
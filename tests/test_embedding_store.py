@@ -0,0 +1,42 @@
+import numpy as np
+
+from utils.embedding_store import EmbeddingStore
+
+
+def embeddings(rows, dimensions=4):
+    return np.arange(rows * dimensions, dtype=np.float32).reshape(rows, dimensions)
+
+
+def test_add_after_a_torn_write(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 4, 'v1')
+    store.add(['a', 'b'], embeddings(2))
+
+    # A writer killed while appending: part of a row and part of an id
+    with open(tmp_path / EmbeddingStore.EMBEDDINGS, 'ab') as file:
+        file.write(b'\x00' * 6)
+    with open(tmp_path / EmbeddingStore.IDS, 'ab') as file:
+        file.write(b'tor')
+
+    reopened = EmbeddingStore(str(tmp_path), 4, 'v1')
+    assert len(reopened) == 2 and 'tor' not in reopened
+    reopened.add(['c', 'd'], embeddings(2) + 100)
+
+    assert (tmp_path / EmbeddingStore.IDS).read_bytes() == b'a\nb\nc\nd\n'
+    assert 'torc' not in reopened
+    np.testing.assert_array_equal(reopened.get(['a', 'b', 'c', 'd']), np.vstack([embeddings(2), embeddings(2) + 100]))
+    assert len(EmbeddingStore(str(tmp_path), 4, 'v1')) == 4
+
+
+def test_add_skips_stored_and_repeated_ids(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 4, 'v1')
+    store.add(['a', 'b', 'a'], embeddings(3))
+    store.add(['b', 'c'], embeddings(2) + 100)
+
+    assert len(store) == 3
+    np.testing.assert_array_equal(store.get(['a', 'c']), np.vstack([embeddings(1), embeddings(2)[1:] + 100]))
+
+
+def test_other_version_clears_the_store(tmp_path):
+    EmbeddingStore(str(tmp_path), 4, 'v1').add(['a'], embeddings(1))
+
+    assert len(EmbeddingStore(str(tmp_path), 4, 'v2')) == 0
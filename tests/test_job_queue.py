@@ -0,0 +1,113 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import yaml
+
+from annotation import ClassificationAnnotation
+from dao import MemoryDAO
+from i_entities import IterationState, JobState, JobType, QueuedJob
+from model.text_classification_model import TextClassificationModel
+from sample import TextClassificationSample
+from utils.config_loader import ConfigLoader
+from api.controller import AnnotationController
+from api.worker import Worker
+
+TEXTS = {'positive': ['great product', 'really good', 'love it', 'excellent service', 'very nice', 'good value'],
+         'negative': ['bad product', 'really poor', 'hate it', 'terrible service', 'very bad', 'poor value']}
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump({
+        'Selector': 'RandomSampleSelector', 'modelName': 'TextClassificationModel',
+        'sampleClass': 'TextClassificationSample', 'sample-size': 4, 'max-iterations': 1,
+        'evaluation': {'holdout-fraction': 0.0}, 'finetune': {'isolated': False},
+        'jobs': {'queue': True, 'lease-seconds': 30, 'retry-delay': 0, 'max-attempts': 2, 'poll-interval': 0.01},
+    }))
+    return ConfigLoader(str(path))
+
+
+@pytest.fixture
+def dao():
+    dao = MemoryDAO(experiment_id='queue-test')
+    dao.set_sample_class(TextClassificationSample)
+    samples = []
+    for label, texts in TEXTS.items():
+        for index, text in enumerate(texts):
+            sample = TextClassificationSample(text)
+            if index < 2:  # The initial gold set
+                sample.labels = ClassificationAnnotation(None, label, is_valid=True)
+                sample.validated = sample.gold_set = True
+            samples.append(sample)
+    dao.saveSamples(samples)
+    return dao
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def jobs(dao, state):
+    return sorted(dao.getJobs([state]), key=lambda job: job.create_time)
+
+
+def test_worker_runs_the_steps_of_an_iteration(dao, config):
+    model = TextClassificationModel(epochs=1)
+    AnnotationController(model, dao, config).run_process()  # Enqueues the selection in the background
+    wait_for(lambda: dao.getJobs([JobState.PENDING]))
+    assert [job.type for job in jobs(dao, JobState.PENDING)] == [JobType.SELECT]
+
+    Worker(dao, model, config).run(once=True)
+
+    assert [job.type for job in jobs(dao, JobState.DONE)] == [JobType.SELECT, JobType.FINETUNE, JobType.ANNOTATE]
+    iteration = AnnotationController(model, dao, config).current_iteration
+    assert iteration.status == IterationState.VALIDATING
+    assert len(dao.getIterationAnnotations(iteration._id)) == len(iteration.sample_ids) == 4
+
+
+def test_job_of_a_lost_worker_is_taken_over(dao, config):
+    dao.enqueueJob(QueuedJob(JobType.SELECT, {'position': 1}, 'SELECT:None', max_attempts=2))
+    lost = dao.leaseJob('lost-worker', 0.01)
+    time.sleep(0.05)
+
+    taken = dao.leaseJob('other-worker', 30)
+    assert taken._id == lost._id and taken.attempts == 2
+    # The lost worker can neither renew nor complete the job anymore
+    assert not dao.heartbeatJob(lost, 30)
+    dao.completeJob(lost)
+    assert dao.getJobs([JobState.RUNNING])[0].worker == 'other-worker'
+
+
+def test_expired_job_is_failed_past_its_attempts(dao, config):
+    dao.enqueueJob(QueuedJob(JobType.SELECT, max_attempts=1))
+    dao.leaseJob('lost-worker', 0.01)
+    time.sleep(0.05)
+
+    assert dao.leaseJob('other-worker', 30) is None
+    failed = dao.getJobs([JobState.FAILED])
+    assert len(failed) == 1 and 'expired' in failed[0].error
+
+
+def test_failing_job_is_retried_then_failed(dao, config):
+    dao.enqueueJob(QueuedJob(JobType.EVALUATE, {}, max_attempts=2))  # No iteration in the payload
+
+    Worker(dao, TextClassificationModel(), config).run(once=True)
+
+    failed = dao.getJobs([JobState.FAILED])
+    assert len(failed) == 1
+    assert failed[0].attempts == 2 and 'KeyError' in failed[0].error
+
+
+def test_failed_job_is_retried_after_a_backoff(dao, config):
+    dao.enqueueJob(QueuedJob(JobType.EVALUATE, {}, max_attempts=3))
+    job = dao.leaseJob('worker', 30)
+    dao.failJob(job, 'error', 10)
+
+    assert dao.leaseJob('worker', 30) is None
+    pending = dao.getJobs([JobState.PENDING])[0]
+    assert pending.available_time >= datetime.now() + timedelta(seconds=9)
@@ -0,0 +1,55 @@
+import pytest
+
+from annotation import ClassificationAnnotation
+from dao import MemoryDAO
+from model.text_classification_model import TextClassificationModel
+from sample import TextClassificationSample
+from selector.stratified_selector import StratifiedSampleSelector
+
+TEXTS = ['great product', 'really good', 'bad product', 'really poor', 'love it', 'hate it', 'very nice', 'very bad']
+
+
+@pytest.fixture
+def dao():
+    dao = MemoryDAO(experiment_id='label-index-test')
+    dao.set_sample_class(TextClassificationSample)
+    dao.saveSamples([TextClassificationSample(text) for text in TEXTS])
+    return dao
+
+
+def annotated(dao, ids, label='positive'):
+    samples = dao.getSamples(ids)
+    for sample in samples:
+        sample.labels = ClassificationAnnotation(sample._id, label)
+    return samples
+
+
+def test_indexed_flag_follows_the_label_index(dao):
+    ids = list(dao.iterPendingSampleIds())
+
+    dao.indexLabels(annotated(dao, ids[:5]))
+    assert sorted(dao.sampleUnindexedSampleIds(100), key=ids.index) == ids[5:]
+    assert dao.getLabelTotals() == {'positive': 5}
+
+    dao.unindexLabels(ids[:2])
+    assert sorted(dao.sampleUnindexedSampleIds(100), key=ids.index) == ids[:2] + ids[5:]
+    assert dao.getLabelTotals() == {'positive': 3}
+
+
+def test_unindexed_samples_are_drawn_at_random(dao):
+    ids = list(dao.iterPendingSampleIds())
+
+    draw = dao.sampleUnindexedSampleIds(3, seed=1)
+    assert len(set(draw)) == 3 and set(draw) <= set(ids)
+    assert dao.sampleUnindexedSampleIds(3, seed=1) == draw
+
+
+def test_selector_indexes_at_most_index_size_samples(dao):
+    model = TextClassificationModel(n_features=2 ** 10)
+    model.finetune(annotated(dao, list(dao.iterPendingSampleIds())[:2]))
+    selector = StratifiedSampleSelector(dao, model=model, params={'index-size': 3, 'seed': 0})
+
+    selector.update_index()
+    assert len(dao.sampleUnindexedSampleIds(100)) == len(TEXTS) - 3
+    selector.update_index()
+    assert len(dao.sampleUnindexedSampleIds(100)) == len(TEXTS) - 6
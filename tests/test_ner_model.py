@@ -0,0 +1,59 @@
+import pytest
+
+spacy = pytest.importorskip('spacy')
+from spacy.training import Example
+from spacy.util import fix_random_seed
+
+from model.ner_model import NERModel
+from sample import SequenceToSequenceSample
+
+TRAINING_DATA = [
+    ("Alice works at Acme in Paris.", [(0, 5, 'PERSON'), (15, 19, 'ORG'), (23, 28, 'GPE')]),
+    ("Bob visited Berlin with Globex.", [(0, 3, 'PERSON'), (12, 18, 'GPE'), (24, 30, 'ORG')]),
+    ("Carol joined Initech in London.", [(0, 5, 'PERSON'), (13, 20, 'ORG'), (24, 30, 'GPE')]),
+]
+TEXTS = ["Dave works at Umbrella in Rome.", "Alice visited London.", "Nothing to see here.", "Eve joined Acme."]
+
+
+@pytest.fixture(scope='module')
+def pipeline_path(tmp_path_factory):
+    """Trains a small entity recognizer, so that its predictions are uncertain."""
+    fix_random_seed(0)
+    nlp = spacy.blank('en')
+    nlp.add_pipe('ner')
+    examples = [Example.from_dict(nlp.make_doc(text), {'entities': entities}) for text, entities in TRAINING_DATA]
+    optimizer = nlp.initialize(lambda: examples)
+    for _ in range(8):
+        nlp.update(examples, sgd=optimizer)
+    path = tmp_path_factory.mktemp('ner') / 'pipeline'
+    nlp.to_disk(path)
+    return str(path)
+
+
+def make_samples(texts):
+    samples = []
+    for index, text in enumerate(texts):
+        sample = SequenceToSequenceSample(text)
+        sample._id = index
+        samples.append(sample)
+    return samples
+
+
+def test_confidences_come_from_the_beam(pipeline_path):
+    model = NERModel(spacy_model=pipeline_path)
+    annotated = model.generateAnnotation(make_samples(TEXTS), 'iteration')
+
+    confidences = [sample.labels.confidence for sample in annotated]
+    assert all(0.0 < confidence <= 1.0 for confidence in confidences)
+    # Scoring docs already annotated by the recognizer rebuilds its parse, with a confidence of about 1
+    assert not all(confidence >= 0.99 for confidence in confidences)
+    for sample in annotated:
+        assert len(sample.labels.scores) == len(sample.labels.label)
+        assert all(0.0 < score <= 1.0 for score in sample.labels.scores)
+
+
+def test_predict_proba_is_not_constant(pipeline_path):
+    probabilities = NERModel(spacy_model=pipeline_path).predict_proba(make_samples(TEXTS))
+
+    assert probabilities.shape == (len(TEXTS), 2)
+    assert probabilities[:, 0].max() - probabilities[:, 0].min() > 1e-6
@@ -0,0 +1,104 @@
+import pytest
+
+from annotation import ClassificationAnnotation
+from dao import MemoryDAO
+from i_entities import Iteration
+from model.text_classification_model import TextClassificationModel
+from sample import TextClassificationSample
+from stopping_conditions import PredictionStabilityCondition
+
+TEXTS = {'positive': ['great product', 'really good', 'love it', 'excellent service', 'very nice', 'good value'],
+         'negative': ['bad product', 'really poor', 'hate it', 'terrible service', 'very bad', 'poor value']}
+PARAMS = {'probe-size': 8, 'threshold': 0.99, 'patience': 2, 'seed': 0}
+
+
+class CountingModel(TextClassificationModel):
+    """Counts the annotations of the probe set, by model id."""
+
+    annotated = []
+
+    def generateAnnotation(self, samples, iteration_id):
+        self.annotated.append(self.id)
+        return super().generateAnnotation(samples, iteration_id)
+
+
+@pytest.fixture
+def dao():
+    CountingModel.annotated = []
+    PredictionStabilityCondition._probes.clear()
+    dao = MemoryDAO(experiment_id='stability-test')
+    dao.set_sample_class(TextClassificationSample)
+    dao.saveSamples([TextClassificationSample(text) for texts in TEXTS.values() for text in texts])
+    return dao
+
+
+def train(dao, epochs):
+    samples = []
+    for label, texts in TEXTS.items():
+        for text in texts[:2]:
+            sample = TextClassificationSample(text)
+            sample.labels = ClassificationAnnotation(None, label, is_valid=True)
+            samples.append(sample)
+    model = TextClassificationModel(n_features=2 ** 10, epochs=epochs)
+    model.finetune(samples)
+    return Iteration(0, dao.saveModel(model), [])
+
+
+def condition(dao):
+    return PredictionStabilityCondition(dao, PARAMS, CountingModel, {'n_features': 2 ** 10})
+
+
+def test_probe_set_is_saved(dao):
+    first, second = train(dao, 10), train(dao, 10)
+
+    assert not condition(dao).evaluate(first)
+    assert not condition(dao).evaluate(second)
+
+    probe = dao.getProbe()
+    assert len(probe['sample_ids']) == PARAMS['probe-size']
+    assert probe['previous_model_id'] == second.model_id
+    assert probe['agreements'] == [1.0]
+    assert sorted(probe['labels']) == ['negative', 'positive']
+    assert probe['predictions'] is not None
+
+
+def test_restart_only_annotates_with_the_new_model(dao):
+    iterations = [train(dao, epochs) for epochs in (10, 10, 10)]
+    assert not condition(dao).evaluate(iterations[0])
+    assert not condition(dao).evaluate(iterations[1])
+    sample_ids = dao.getProbe()['sample_ids']
+
+    PredictionStabilityCondition._probes.clear()  # A restarted process, or another worker
+    assert condition(dao).evaluate(iterations[2])
+    assert condition(dao).evaluate(iterations[2])  # Already evaluated, not annotated again
+
+    assert CountingModel.annotated == [iteration.model_id for iteration in iterations]
+    assert dao.getProbe()['sample_ids'] == sample_ids
+    assert dao.getProbe()['agreements'] == [1.0, 1.0]
+
+
+def test_update_is_a_compare_and_set(dao):
+    dao.createProbe(['a', 'b'])
+    assert dao.createProbe(['c'])['sample_ids'] == ['a', 'b']  # The first probe set saved is kept
+
+    state = {'labels': ['x'], 'previous_model_id': 'first', 'predictions': None, 'agreements': []}
+    assert dao.updateProbe(state, None)
+    assert not dao.updateProbe({**state, 'previous_model_id': 'second'}, None)
+    assert dao.getProbe()['previous_model_id'] == 'first'
+
+
+def test_stale_condition_compares_with_the_saved_model(dao):
+    iterations = [train(dao, 10), train(dao, 10), train(dao, 10)]
+    stale = condition(dao)
+    assert not stale.evaluate(iterations[0])
+    saved = dao.getProbe()
+    assert not condition(dao).evaluate(iterations[1])  # Evaluated by another worker
+    probe = stale.probe()
+    probe.load(saved)  # The state the stale condition loaded before
+
+    model = dao.loadModel(CountingModel, iterations[2].model_id, {'n_features': 2 ** 10})
+    stale.compare(probe, iterations[2].model_id, model.generateAnnotation(probe.samples, None))
+
+    saved = dao.getProbe()
+    assert saved['previous_model_id'] == iterations[2].model_id
+    assert saved['agreements'] == [1.0, 1.0]
@@ -0,0 +1,71 @@
+from random import Random
+
+import pytest
+
+from dao import MemoryDAO
+from sample import TextClassificationSample
+from selector.reservoir_selector import ReservoirSampleSelector, reservoir_sample
+
+
+class Stream:
+    """A single-pass stream of integers, counting the items read."""
+
+    def __init__(self, n):
+        self.n = n
+        self.read = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.read >= self.n:
+            raise StopIteration
+        self.read += 1
+        return self.read - 1
+
+
+@pytest.mark.parametrize('n, k', [(1000, 10), (50, 50), (10, 3), (100, 1)])
+def test_draws_k_distinct_items_in_one_pass(n, k):
+    for seed in range(20):
+        stream = Stream(n)
+        drawn = reservoir_sample(stream, k, Random(seed))
+
+        assert len(drawn) == k
+        assert len(set(drawn)) == k
+        assert all(0 <= item < n for item in drawn)
+        assert stream.read == n
+
+
+@pytest.mark.parametrize('n, k', [(3, 5), (0, 5), (10, 0)])
+def test_short_streams_and_empty_draws(n, k):
+    assert reservoir_sample(range(n), k, Random(0)) == list(range(min(n, k)))
+
+
+def test_same_seed_same_draw():
+    assert reservoir_sample(range(1000), 10, Random(7)) == reservoir_sample(range(1000), 10, Random(7))
+
+
+def test_inclusion_frequencies_are_uniform():
+    n, k, draws = 40, 8, 5000
+    counts = [0] * n
+    for seed in range(draws):
+        for item in reservoir_sample(range(n), k, Random(seed)):
+            counts[item] += 1
+
+    # Each item is drawn with probability k / n, the tolerance is about 6 standard deviations
+    expected = k / n
+    tolerance = 6 * (expected * (1 - expected) / draws) ** 0.5
+    assert all(abs(count / draws - expected) < tolerance for count in counts)
+    # The items read before the first replacement are not favoured over the end of the stream
+    assert abs(sum(counts[:k]) / (k * draws) - sum(counts[-k:]) / (k * draws)) < tolerance
+
+
+def test_selector_returns_the_samples_in_draw_order():
+    dao = MemoryDAO(experiment_id='reservoir-test')
+    dao.set_sample_class(TextClassificationSample)
+    dao.saveSamples([TextClassificationSample(f'text {index}') for index in range(30)])
+    selector = ReservoirSampleSelector(dao, params={'seed': 3})
+
+    selected = selector.select(5)
+
+    assert [sample._id for sample in selected] == reservoir_sample(dao.iterPendingSampleIds(), 5, Random(3))
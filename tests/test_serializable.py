@@ -0,0 +1,62 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from annotation import ClassificationAnnotation, SequenceLabelAnnotation, SpanArray
+from i_entities import Annotator, Iteration, IterationState
+from sample import SequenceToSequenceSample, TextClassificationSample
+
+
+def sequence_annotation_document():
+    annotation = SequenceLabelAnnotation(uuid.uuid4(), [[0, 5, 'PERSON'], [10, 14, 'ORG']], iteration_id=uuid.uuid4(),
+                                         scores=[0.9, 0.4], confidence=0.36)
+    annotation._id = uuid.uuid4()
+    return annotation.serialize()
+
+
+def classification_annotation_document():
+    annotation = ClassificationAnnotation(uuid.uuid4(), 'positive', annotator_id=uuid.uuid4(), is_valid=True)
+    annotation._id = uuid.uuid4()
+    return annotation.serialize()
+
+
+def sample_document(labels):
+    return {'text': 'Alice works at Acme.', 'labels': labels, 'validated': True, '_id': uuid.uuid4(),
+            'gold_set': False, 'cluster_id': 3}
+
+
+def iteration_document():
+    iteration = Iteration(2, uuid.uuid4(), [uuid.uuid4(), uuid.uuid4()])
+    iteration._id = uuid.uuid4()
+    iteration.start_time = datetime(2026, 1, 1)
+    iteration.status = IterationState.VALIDATING
+    iteration.metrics = {'MacroF1': 0.5}
+    return iteration.serialize()
+
+
+CASES = {
+    'sequence-annotation': (SequenceLabelAnnotation, sequence_annotation_document),
+    'classification-annotation': (ClassificationAnnotation, classification_annotation_document),
+    'sequence-sample': (SequenceToSequenceSample, lambda: sample_document(sequence_annotation_document())),
+    'classification-sample': (TextClassificationSample, lambda: sample_document(classification_annotation_document())),
+    'iteration': (Iteration, iteration_document),
+    'annotator': (Annotator, lambda: {'_id': uuid.uuid4(), 'email': 'a@b.c', 'password': 'hash'}),
+    'span-array': (SpanArray, lambda: SpanArray.from_spans([(0, 5, 'PERSON'), (6, 9, 'ORG')]).serialize()),
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_serialize_returns_the_deserialized_document(name):
+    cls, document = CASES[name]
+    document = document()
+
+    assert cls.deserialize(document).serialize() == document
+
+
+@pytest.mark.parametrize('cls', [SequenceLabelAnnotation, ClassificationAnnotation])
+def test_deserialized_annotation_sets_every_slot(cls):
+    for data in ({'label': None}, [[0, 1, 'A']], 'positive'):
+        annotation = cls.deserialize(data)
+        # The generated serializer reads all the slots at once, and the name is kept
+        assert annotation.serialize()['name'] == cls.get_annotation_name()
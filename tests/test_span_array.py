@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from annotation import SequenceLabelAnnotation, SpanArray
+
+SPANS = [(0, 5, 'PERSON'), (15, 19, 'ORG'), (23, 28, 'GPE'), (30, 35, 'PERSON')]
+
+
+@pytest.fixture(params=[False, True], ids=['list-mode', 'compact-mode'])
+def compact_spans(request):
+    previous = SequenceLabelAnnotation.compact_spans
+    SequenceLabelAnnotation.set_compact_spans(request.param)
+    yield request.param
+    SequenceLabelAnnotation.set_compact_spans(previous)
+
+
+def test_columns_and_vocabulary():
+    spans = SpanArray.from_spans(SPANS)
+
+    assert spans.vocabulary == ('PERSON', 'ORG', 'GPE')
+    assert spans.starts.tolist() == [0, 15, 23, 30]
+    assert spans.ends.tolist() == [5, 19, 28, 35]
+    assert spans.label_ids.tolist() == [0, 1, 2, 0]
+    assert SpanArray.from_spans(spans) is spans
+
+
+def test_binary_round_trip():
+    spans = SpanArray.from_spans(SPANS)
+    data = spans.serialize()
+
+    assert isinstance(data['spans'], bytes) and len(data['spans']) == 3 * len(SPANS) * 4
+    restored = SpanArray.deserialize(data)
+    assert restored == spans
+    assert restored.to_list() == SPANS
+    assert not restored.columns.flags.writeable  # A view of the bytes, not a copy
+
+
+def test_equals_the_list_of_tuples():
+    spans = SpanArray.from_spans(SPANS)
+
+    assert spans == SPANS
+    assert spans == [list(span) for span in SPANS]  # The form stored in MongoDB
+    assert spans != SPANS[:-1]
+    assert spans != [(0, 5, 'PERSON'), (15, 19, 'ORG'), (23, 28, 'GPE'), (30, 35, 'ORG')]
+    assert spans != 'spans'
+    assert list(spans) == SPANS
+
+
+def test_indexing_and_slicing():
+    spans = SpanArray.from_spans(SPANS)
+
+    assert spans[1] == (15, 19, 'ORG')
+    assert spans[-1] == (30, 35, 'PERSON')
+    for index in (slice(1, 3), slice(None, None, -1), slice(0, 4, 2), slice(5, 9)):
+        sliced = spans[index]
+        assert isinstance(sliced, SpanArray)
+        assert sliced == SPANS[index]
+        assert SpanArray.deserialize(sliced.serialize()) == SPANS[index]  # A non-contiguous view is serialized in order
+    with pytest.raises(IndexError):
+        spans[4]
+
+
+def test_empty_array():
+    spans = SpanArray.from_spans([])
+
+    assert len(spans) == 0 and spans.columns.shape == (3, 0)
+    assert spans == [] and spans.to_list() == []
+    data = spans.serialize()
+    assert data == {'spans': b'', 'labels': []}
+    restored = SpanArray.deserialize(data)
+    assert restored.columns.shape == (3, 0) and restored == []
+
+
+@pytest.mark.parametrize('stored_form', ['list', 'binary'])
+def test_annotation_reads_both_stored_forms(compact_spans, stored_form):
+    if stored_form == 'list':
+        label = [list(span) for span in SPANS]
+    else:
+        label = SpanArray.from_spans(SPANS).serialize()
+    data = {'sample_id': 1, 'label': label, 'annotator': None, 'iteration': None, 'is_valid': True,
+            'name': SequenceLabelAnnotation.get_annotation_name(), 'scores': [0.5] * len(SPANS)}
+
+    annotation = SequenceLabelAnnotation.deserialize(data)
+
+    assert [tuple(span) for span in annotation.get_value()] == SPANS
+    assert annotation.label_counts() == {'PERSON': 2, 'ORG': 1, 'GPE': 1}
+    assert isinstance(annotation.label, SpanArray) == (compact_spans or stored_form == 'binary')
+    restored = SequenceLabelAnnotation.deserialize(annotation.serialize())
+    assert [tuple(span) for span in restored.get_value()] == SPANS
+
+
+def test_new_annotations_follow_the_mode(compact_spans):
+    annotation = SequenceLabelAnnotation(1, SPANS)
+
+    assert isinstance(annotation.label, SpanArray) == compact_spans
+    assert annotation.get_value() == SPANS
+    assert isinstance(annotation.serialize()['label'], dict) == compact_spans
+    assert np.array_equal(SpanArray.from_spans(annotation.get_value()).columns, SpanArray.from_spans(SPANS).columns)
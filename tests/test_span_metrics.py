@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from annotation import ClassificationAnnotation, SequenceLabelAnnotation, SpanArray
+from metric import LabelCounts, PartialSpanF1, SpanF1
+from sample import SequenceToSequenceSample, TextClassificationSample
+
+
+def sequence_sample(id, spans, compact=False):
+    sample = SequenceToSequenceSample('')
+    sample._id = id
+    sample.labels = SequenceLabelAnnotation(id, SpanArray.from_spans(spans) if compact else spans)
+    return sample
+
+
+def classification_sample(id, label):
+    sample = TextClassificationSample('')
+    sample._id = id
+    sample.labels = ClassificationAnnotation(id, label)
+    return sample
+
+
+def items(sample):
+    value = sample.labels.get_value()
+    if isinstance(value, (list, tuple, SpanArray)):
+        return {tuple(span) for span in value}
+    return {(0, 0, str(value))}
+
+
+def reference(samples, true_samples, partial):
+    """Counts the matches of every pair of spans with nested loops."""
+    def matches(span, other):
+        if span[2] != other[2]:
+            return False
+        return span == other or (partial and other[0] < span[1] and span[0] < other[1])
+
+    true_positives, predicted, gold, matched_gold = {}, {}, {}, {}
+    for sample, true_sample in zip(samples, true_samples):
+        spans, gold_spans = items(sample), items(true_sample)
+        for span in spans:
+            predicted[span[2]] = predicted.get(span[2], 0) + 1
+            if any(matches(span, other) for other in gold_spans):
+                true_positives[span[2]] = true_positives.get(span[2], 0) + 1
+        for span in gold_spans:
+            gold[span[2]] = gold.get(span[2], 0) + 1
+            if any(matches(span, other) for other in spans):
+                matched_gold[span[2]] = matched_gold.get(span[2], 0) + 1
+    counts = LabelCounts()
+    counts.true_positives, counts.predicted, counts.gold, counts.matched_gold = true_positives, predicted, gold, matched_gold
+    return counts.scores()
+
+
+def flatten(result, prefix=''):
+    """Flattens the nested scores of a result, so they can be compared approximately."""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+def assert_same_scores(result, expected):
+    assert flatten(result) == pytest.approx(flatten(expected))
+
+
+def random_spans(rng, labels, count):
+    spans = []
+    for _ in range(count):
+        start = rng.randrange(0, 50)
+        spans.append((start, start + rng.randrange(0, 8), rng.choice(labels)))
+    return spans
+
+
+def random_samples(seed, size=40):
+    rng = random.Random(seed)
+    samples, true_samples = [], []
+    for id in range(size):
+        # 'RARE' is only ever a gold label
+        samples.append(sequence_sample(id, random_spans(rng, ['PER', 'ORG'], rng.randrange(0, 6)), compact=id % 2 == 0))
+        true_samples.append(sequence_sample(id, random_spans(rng, ['PER', 'ORG', 'RARE'], rng.randrange(0, 6))))
+    return samples, true_samples
+
+
+@pytest.mark.parametrize('metric', [SpanF1, PartialSpanF1])
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_the_nested_loop_reference(metric, seed):
+    samples, true_samples = random_samples(seed)
+
+    assert_same_scores(metric.evaluate(samples, true_samples), reference(samples, true_samples, metric is PartialSpanF1))
+
+
+@pytest.mark.parametrize('metric', [SpanF1, PartialSpanF1])
+def test_chunks_give_the_same_result(metric, monkeypatch):
+    samples, true_samples = random_samples(7, size=25)
+    expected = metric.evaluate(samples, true_samples)
+
+    monkeypatch.setattr(metric, 'CHUNK_SIZE', 4)  # The samples of a chunk are counted at once
+    assert_same_scores(metric.evaluate(samples, true_samples), expected)
+    assert_same_scores(expected, reference(samples, true_samples, metric is PartialSpanF1))
+
+
+@pytest.mark.parametrize('metric', [SpanF1, PartialSpanF1])
+def test_empty_predictions_and_gold(metric):
+    empty = [sequence_sample(0, []), sequence_sample(1, [])]
+    spans = [sequence_sample(0, [(0, 4, 'PER')]), sequence_sample(1, [(2, 6, 'ORG')])]
+
+    no_predictions = metric.evaluate(empty, spans)
+    assert no_predictions['precision'] == no_predictions['recall'] == no_predictions['f1'] == 0.0
+    assert no_predictions['labels']['PER']['support'] == 1
+    no_gold = metric.evaluate(spans, empty)
+    assert no_gold['precision'] == no_gold['f1'] == 0.0
+    assert_same_scores(no_gold, reference(spans, empty, metric is PartialSpanF1))
+    nothing = metric.evaluate(empty, empty)
+    assert nothing['f1'] == nothing['macro-f1'] == 0.0 and nothing['labels'] == {}
+
+
+@pytest.mark.parametrize('metric', [SpanF1, PartialSpanF1])
+def test_classifications_are_whole_sample_spans(metric):
+    samples = [classification_sample(id, label) for id, label in enumerate(['pos', 'neg', 'pos', 'neg'])]
+    true_samples = [classification_sample(id, label) for id, label in enumerate(['pos', 'pos', 'pos', 'neg'])]
+
+    result = metric.evaluate(samples, true_samples)
+    assert result['precision'] == result['recall'] == 0.75
+    assert_same_scores(result, reference(samples, true_samples, metric is PartialSpanF1))
+
+
+def test_partial_match_needs_an_overlap():
+    samples = [sequence_sample(0, [(0, 5, 'PER'), (10, 12, 'PER'), (20, 25, 'ORG')])]
+    true_samples = [sequence_sample(0, [(3, 8, 'PER'), (12, 15, 'PER'), (22, 23, 'PER')])]
+
+    result = PartialSpanF1.evaluate(samples, true_samples)
+    # Only (0, 5) and (3, 8) overlap: touching spans and spans of another label do not match
+    assert result['labels']['PER'] == pytest.approx({'precision': 0.5, 'recall': 1 / 3, 'f1': 0.4, 'support': 3})
@@ -0,0 +1,63 @@
+import pytest
+
+from annotation import ClassificationAnnotation
+from dao import MemoryDAO
+from model.text_classification_model import TextClassificationModel
+from sample import TextClassificationSample
+from selector.uncertainty_selector import ENTROPY, LEAST_CONFIDENCE, MARGIN, UncertaintySampleSelector, uncertainty
+
+TEXTS = ['great product', 'really good', 'bad product', 'really poor', 'love it', 'hate it']
+
+
+def make_samples(texts, labels=None):
+    samples = []
+    for index, text in enumerate(texts):
+        sample = TextClassificationSample(text)
+        sample._id = index
+        if labels:
+            sample.labels = ClassificationAnnotation(index, labels[index], is_valid=True)
+        samples.append(sample)
+    return samples
+
+
+@pytest.fixture
+def untrained_model():
+    model = TextClassificationModel(n_features=2 ** 10)
+    model.finetune([])  # An empty training split leaves the model without any class
+    return model
+
+
+def test_untrained_model_annotates_without_label(untrained_model):
+    annotated = untrained_model.generateAnnotation(make_samples(TEXTS), 'iteration')
+
+    assert len(annotated) == len(TEXTS)
+    for sample in annotated:
+        assert sample.labels.label is None
+        assert sample.labels.confidence is None
+        assert sample.labels.iteration == 'iteration'
+
+
+def test_untrained_model_predicts_no_outcome(untrained_model):
+    assert untrained_model.predict_proba(make_samples(TEXTS)).shape == (len(TEXTS), 0)
+
+
+@pytest.mark.parametrize('strategy', [LEAST_CONFIDENCE, MARGIN, ENTROPY])
+def test_untrained_model_is_fully_uncertain(untrained_model, strategy):
+    dao = MemoryDAO(experiment_id='untrained-test')
+    dao.set_sample_class(TextClassificationSample)
+    dao.saveSamples(make_samples(TEXTS))
+    selector = UncertaintySampleSelector(dao, model=untrained_model, params={'strategy': strategy})
+
+    assert uncertainty(untrained_model.predict_proba(make_samples(TEXTS)), strategy).tolist() == [1.0] * len(TEXTS)
+    assert len(selector.select(2)) == 2
+
+
+def test_trained_model_annotates_with_a_known_class():
+    labels = ['positive', 'positive', 'negative', 'negative', 'positive', 'negative']
+    model = TextClassificationModel(n_features=2 ** 10, epochs=20)
+    model.finetune(make_samples(TEXTS, labels))
+
+    annotated = model.generateAnnotation(make_samples(TEXTS), 'iteration')
+
+    assert [sample.labels.label for sample in annotated] == labels
+    assert all(0.5 < sample.labels.confidence <= 1.0 for sample in annotated)